@@ -3,11 +3,16 @@ Gambling Bot Discord
 A complete Discord bot for gambling games with virtual currency
 """
 import discord
+from discord import app_commands
 from discord.ext import commands
 import asyncio
 import os
 import config
 from database.db_manager import DatabaseManager
+from database.write_queue import DatabaseBusy
+from utils.embeds import busy_embed
+from utils.locks import UserLocks
+from utils.sessions import SessionStore
 
 class GamblingBot(commands.Bot):
     def __init__(self):
@@ -22,12 +27,18 @@ class GamblingBot(commands.Bot):
         )
         
         self.db = DatabaseManager()
+        self.user_locks = UserLocks()
+        # Open interactive blackjack rounds (kept on the bot so a cog reload does not lose them)
+        self.blackjack_sessions = SessionStore(config.BLACKJACK_SESSION_TTL, config.BLACKJACK_MAX_SESSIONS)
+        self.tree.on_error = self.on_app_command_error
     
     async def setup_hook(self):
         """Setup hook called when bot is starting"""
         # Initialize database
         await self.db.initialize()
-        print("✅ Database initialized")
+        print(f"✅ Database initialized ({len(self.db.shards)} shard(s))")
+        pragmas = ", ".join(f"{name}={value}" for name, value in self.db.shards[0].pool.applied_pragmas.items())
+        print(f"✅ SQLite profile: {pragmas}")
         
         # Load cogs
         cogs = ['cogs.economy', 'cogs.games', 'cogs.admin']
@@ -45,6 +56,12 @@ class GamblingBot(commands.Bot):
         except Exception as e:
             print(f"❌ Failed to sync commands: {e}")
     
+    async def close(self):
+        """Close the bot and release database connections"""
+        await super().close()
+        await self.db.close()
+        print("✅ Database closed")
+    
     async def on_ready(self):
         """Called when bot is ready"""
         print(f"\n{'='*50}")
@@ -69,6 +86,18 @@ class GamblingBot(commands.Bot):
             return
         
         print(f"Error: {error}")
+    
+    async def on_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        """Slash command error handler: answer fast when the database write queue is full"""
+        if isinstance(getattr(error, 'original', None), DatabaseBusy):
+            embed = busy_embed()
+            if interaction.response.is_done():
+                await interaction.followup.send(embed=embed, ephemeral=True)
+            else:
+                await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        
+        await app_commands.CommandTree.on_error(self.tree, interaction, error)
 
 # Help command
 @discord.app_commands.command(name="help", description="Afficher l'aide et la liste des commandes")
@@ -88,7 +117,8 @@ async def help_command(interaction: discord.Interaction):
             "`/daily` - Récompense quotidienne\n"
             "`/give` - Donner des coins\n"
             "`/stats` - Voir vos statistiques\n"
-            "`/leaderboard` - Classement des joueurs"
+            "`/leaderboard` - Classement des joueurs\n"
+            "`/rank` - Voir votre rang"
         ),
         inline=False
     )
@@ -97,12 +127,13 @@ async def help_command(interaction: discord.Interaction):
     embed.add_field(
         name="🎮 Jeux",
         value=(
+            "`/jouer` - Jouer à n'importe quel jeu de la liste\n"
             "`/coinflip` - Pile ou face (x2)\n"
             "`/dice` - Lancer de dés (jusqu'à x10)\n"
             "`/slots` - Machine à sous (jusqu'à x50)\n"
             "`/roulette` - Roulette (x2 ou x36)\n"
-            "`/blackjack` - Blackjack (x2 ou x2.5)\n"
-            "`/crash` - Crash game (multiplicateur variable)"
+            "`/blackjack` - Blackjack: tirer, rester, doubler, séparer (x2 ou x2.5)\n"
+            "`/crash` - Crash multijoueur: retirez avant le crash (multiplicateur variable)"
         ),
         inline=False
     )
@@ -115,7 +146,9 @@ async def help_command(interaction: discord.Interaction):
             "`/removecoins` - Retirer des coins\n"
             "`/setbalance` - Définir une balance\n"
             "`/resetuser` - Réinitialiser un utilisateur\n"
-            "`/botstats` - Statistiques du bot"
+            "`/botstats` - Statistiques du bot\n"
+            "`/ledger` - Registre des mouvements d'un joueur\n"
+            "`/rebuildstats` - Recalculer les statistiques"
         ),
         inline=False
     )
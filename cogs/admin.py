@@ -12,6 +12,7 @@ class Admin(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
+        self.locks = bot.user_locks
     
     @app_commands.command(name="addcoins", description="[ADMIN] Ajouter des coins à un utilisateur")
     @app_commands.describe(
@@ -28,8 +29,9 @@ class Admin(commands.Cog):
             )
             return
         
-        await self.db.update_balance(utilisateur.id, montant)
-        new_balance = await self.db.get_balance(utilisateur.id)
+        # The user's lock keeps the change from racing their bets and gifts
+        async with self.locks.hold(utilisateur.id):
+            new_balance = await self.db.update_balance(utilisateur.id, montant, guild_id=interaction.guild_id)
         
         embed = success_embed(
             f"{config.EMOJI_COIN} Coins ajoutés",
@@ -53,8 +55,9 @@ class Admin(commands.Cog):
             )
             return
         
-        await self.db.update_balance(utilisateur.id, -montant)
-        new_balance = await self.db.get_balance(utilisateur.id)
+        # The user's lock keeps the change from racing their bets and gifts
+        async with self.locks.hold(utilisateur.id):
+            new_balance = await self.db.update_balance(utilisateur.id, -montant, guild_id=interaction.guild_id)
         
         embed = success_embed(
             f"{config.EMOJI_COIN} Coins retirés",
@@ -78,7 +81,9 @@ class Admin(commands.Cog):
             )
             return
         
-        await self.db.set_balance(utilisateur.id, montant)
+        # The user's lock keeps the change from racing their bets and gifts
+        async with self.locks.hold(utilisateur.id):
+            await self.db.set_balance(utilisateur.id, montant, guild_id=interaction.guild_id)
         
         embed = success_embed(
             f"{config.EMOJI_COIN} Balance modifiée",
@@ -91,19 +96,9 @@ class Admin(commands.Cog):
     @app_commands.default_permissions(administrator=True)
     async def resetuser_command(self, interaction: discord.Interaction, utilisateur: discord.User):
         """Reset a user's data (admin only)"""
-        await self.db.set_balance(utilisateur.id, config.STARTING_BALANCE)
-        
-        # Reset stats
-        async with self.db._get_connection() as db:
-            await db.execute(
-                "UPDATE users SET total_won = 0, total_lost = 0, games_played = 0, last_daily = NULL WHERE user_id = ?",
-                (utilisateur.id,)
-            )
-            await db.execute(
-                "DELETE FROM game_history WHERE user_id = ?",
-                (utilisateur.id,)
-            )
-            await db.commit()
+        # Reset balance, stats and history in one transaction, under the user's lock like the other changes
+        async with self.locks.hold(utilisateur.id):
+            await self.db.reset_user(utilisateur.id, guild_id=interaction.guild_id)
         
         embed = success_embed(
             "🔄 Utilisateur réinitialisé",
@@ -112,48 +107,83 @@ class Admin(commands.Cog):
         )
         await interaction.response.send_message(embed=embed)
     
+    @app_commands.command(name="ledger", description="[ADMIN] Voir les derniers mouvements de coins d'un utilisateur")
+    @app_commands.describe(utilisateur="L'utilisateur dont voir le registre")
+    @app_commands.default_permissions(administrator=True)
+    async def ledger_command(self, interaction: discord.Interaction, utilisateur: discord.User):
+        """Show the latest balance changes of a user (admin only)"""
+        entries = await self.db.get_ledger(utilisateur.id, limit=10, guild_id=interaction.guild_id)
+        
+        if not entries:
+            description = "Aucun mouvement enregistré."
+        else:
+            lines = []
+            for entry in entries:
+                reason = entry['reason'] if not entry['reference'] else f"{entry['reason']} ({entry['reference']})"
+                lines.append(
+                    f"<t:{entry['timestamp']}:R> **{entry['amount']:+,}** - {reason} → {entry['balance']:,}"
+                )
+            description = "\n".join(lines)
+        
+        embed = info_embed(f"📒 Registre de {utilisateur.display_name}", description)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
     @app_commands.command(name="botstats", description="[ADMIN] Voir les statistiques globales du bot")
     @app_commands.default_permissions(administrator=True)
     async def botstats_command(self, interaction: discord.Interaction):
         """Show global bot statistics (admin only)"""
-        async with self.db._get_connection() as db:
-            # Total users
-            async with db.execute("SELECT COUNT(*) FROM users") as cursor:
-                total_users = (await cursor.fetchone())[0]
-            
-            # Total coins in circulation
-            async with db.execute("SELECT SUM(balance) FROM users") as cursor:
-                total_coins = (await cursor.fetchone())[0] or 0
-            
-            # Total games played
-            async with db.execute("SELECT COUNT(*) FROM game_history") as cursor:
-                total_games = (await cursor.fetchone())[0]
-            
-            # Total won/lost
-            async with db.execute("SELECT SUM(total_won), SUM(total_lost) FROM users") as cursor:
-                row = await cursor.fetchone()
-                total_won = row[0] or 0
-                total_lost = row[1] or 0
-            
-            # Most popular game
-            async with db.execute(
-                "SELECT game_type, COUNT(*) as count FROM game_history GROUP BY game_type ORDER BY count DESC LIMIT 1"
-            ) as cursor:
-                popular_game = await cursor.fetchone()
-                most_popular = f"{popular_game[0]} ({popular_game[1]} parties)" if popular_game else "Aucun"
+        stats = await self.db.get_global_stats(guild_id=interaction.guild_id)
+        popular_game = stats['most_popular']
+        most_popular = f"{popular_game[0]} ({popular_game[1]} parties)" if popular_game else "Aucun"
+        
+        cache = self.db.cache.stats()
+        locks = self.bot.user_locks.stats()
+        writes = self.db.write_stats()
+        reads = self.db.read_stats()
+        
+        # Per-guild economies only show this server's players and counters
+        scope = "de ce serveur" if config.PER_GUILD_ECONOMY else "globales du bot"
         
         embed = info_embed(
-            "📊 Statistiques globales du bot",
-            f"**Utilisateurs totaux:** {total_users:,}\n"
-            f"**Coins en circulation:** {total_coins:,}\n"
-            f"**Parties jouées:** {total_games:,}\n"
-            f"**Total gagné:** {total_won:,} coins\n"
-            f"**Total perdu:** {total_lost:,} coins\n"
-            f"**Jeu le plus populaire:** {most_popular}\n\n"
+            f"📊 Statistiques {scope}",
+            f"**Utilisateurs totaux:** {stats['total_users']:,}\n"
+            f"**Coins en circulation:** {stats['total_coins']:,}\n"
+            f"**Parties jouées:** {stats['total_games']:,}\n"
+            f"**Total gagné:** {stats['total_won']:,} coins\n"
+            f"**Total perdu:** {stats['total_lost']:,} coins\n"
+            f"**Jeu le plus populaire:** {most_popular}\n"
+            f"**Shards:** {len(self.db.shards)}\n"
+            f"**Cache utilisateurs:** {cache['size']:,}/{cache['max_size']:,} "
+            f"({cache['hit_rate']:.0%} de hits)\n"
+            f"**Verrous joueurs:** {locks['active']:,} actifs, "
+            f"{locks['contention_rate']:.0%} de contention, "
+            f"attente max {locks['max_wait_ms']:.0f}ms\n"
+            f"**Mains de blackjack:** {len(self.bot.blackjack_sessions):,}/{self.bot.blackjack_sessions.max_size:,} en cours\n"
+            f"**File d'écriture:** {writes['depth']:,}/{writes['max_size']:,} en attente, "
+            f"{writes['avg_batch']:.1f} écritures/lot (max {writes['max_batch']}), "
+            f"{writes['rejected']:,} refusées\n"
+            f"**Lectures:** {reads['available']}/{reads['size']} connexions libres, "
+            f"{reads['avg_read_ms']:.1f}ms en moyenne, attente max {reads['max_wait_ms']:.0f}ms\n\n"
             f"**Serveurs:** {len(self.bot.guilds)}\n"
             f"**Latence:** {round(self.bot.latency * 1000)}ms"
         )
         await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="rebuildstats", description="[ADMIN] Recalculer les statistiques globales")
+    @app_commands.default_permissions(administrator=True)
+    async def rebuildstats_command(self, interaction: discord.Interaction):
+        """Recompute the global counters from the raw tables (admin only)"""
+        # Full scans can take a while on a big database
+        await interaction.response.defer(ephemeral=True)
+        stats = await self.db.rebuild_stats(guild_id=interaction.guild_id)
+        
+        embed = success_embed(
+            "🔄 Statistiques recalculées",
+            f"**Utilisateurs totaux:** {stats['total_users']:,}\n"
+            f"**Coins en circulation:** {stats['total_coins']:,}\n"
+            f"**Parties jouées:** {stats['total_games']:,}"
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
 
 async def setup(bot):
     await bot.add_cog(Admin(bot))
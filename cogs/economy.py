@@ -5,9 +5,9 @@ Contains economy-related commands like balance, daily, leaderboard, etc.
 import discord
 from discord import app_commands
 from discord.ext import commands
-from datetime import datetime, timedelta
+import time
 import config
-from utils.embeds import balance_embed, success_embed, error_embed, leaderboard_embed, stats_embed
+from utils.embeds import balance_embed, success_embed, error_embed, leaderboard_embed, rank_embed, stats_embed
 
 class Economy(commands.Cog):
     def __init__(self, bot):
@@ -19,7 +19,7 @@ class Economy(commands.Cog):
     async def balance_command(self, interaction: discord.Interaction, utilisateur: discord.User = None):
         """Check user balance"""
         target_user = utilisateur or interaction.user
-        balance = await self.db.get_balance(target_user.id)
+        balance = await self.db.get_balance(target_user.id, guild_id=interaction.guild_id)
         
         embed = balance_embed(target_user, balance)
         await interaction.response.send_message(embed=embed)
@@ -29,17 +29,14 @@ class Economy(commands.Cog):
         """Claim daily reward"""
         user_id = interaction.user.id
         
-        # Check if user can claim
-        can_claim = await self.db.can_claim_daily(user_id)
+        # Check the cooldown and claim in a single database call
+        result = await self.db.claim_daily(user_id, guild_id=interaction.guild_id)
         
-        if not can_claim:
-            user = await self.db.get_user(user_id)
-            last_daily = datetime.fromisoformat(user['last_daily'])
-            next_claim = last_daily + timedelta(hours=24)
-            time_left = next_claim - datetime.now()
+        if not result['claimed']:
+            time_left = max(0, result['next_claim'] - time.time())
             
-            hours = int(time_left.total_seconds() // 3600)
-            minutes = int((time_left.total_seconds() % 3600) // 60)
+            hours = int(time_left // 3600)
+            minutes = int((time_left % 3600) // 60)
             
             embed = error_embed(
                 "⏰ Déjà réclamé",
@@ -49,29 +46,37 @@ class Economy(commands.Cog):
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
         
-        # Claim daily
-        reward = await self.db.claim_daily(user_id)
-        new_balance = await self.db.get_balance(user_id)
-        
         embed = success_embed(
             f"{config.EMOJI_COIN} Récompense quotidienne",
-            f"Vous avez reçu **{reward:,}** coins!\n"
-            f"Nouveau solde: **{new_balance:,}** coins\n\n"
+            f"Vous avez reçu **{result['reward']:,}** coins!\n"
+            f"Nouveau solde: **{result['balance']:,}** coins\n\n"
             f"Revenez dans 24 heures pour votre prochaine récompense!"
         )
         await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="leaderboard", description="Voir le classement des joueurs les plus riches")
-    async def leaderboard_command(self, interaction: discord.Interaction):
+    @app_commands.describe(page="Numéro de la page du classement (10 joueurs par page)")
+    async def leaderboard_command(self, interaction: discord.Interaction, page: app_commands.Range[int, 1] = 1):
         """Show leaderboard"""
-        leaderboard_data = await self.db.get_leaderboard(10)
+        leaderboard_data = await self.db.get_leaderboard(10, (page - 1) * 10, guild_id=interaction.guild_id)
         
         if not leaderboard_data:
             embed = error_embed("📊 Classement", "Aucun joueur trouvé!")
             await interaction.response.send_message(embed=embed)
             return
         
-        embed = leaderboard_embed(leaderboard_data, self.bot)
+        total_pages = max(1, -(-self.db.leaderboard_size(interaction.guild_id) // 10))
+        embed = leaderboard_embed(leaderboard_data, self.bot, page, total_pages)
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="rank", description="Voir votre position dans le classement")
+    @app_commands.describe(utilisateur="L'utilisateur dont vous voulez voir le rang (optionnel)")
+    async def rank_command(self, interaction: discord.Interaction, utilisateur: discord.User = None):
+        """Show a user's leaderboard position"""
+        target_user = utilisateur or interaction.user
+        rank = await self.db.get_rank(target_user.id, guild_id=interaction.guild_id)
+        
+        embed = rank_embed(target_user, rank)
         await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="stats", description="Voir vos statistiques ou celles d'un autre utilisateur")
@@ -79,7 +84,7 @@ class Economy(commands.Cog):
     async def stats_command(self, interaction: discord.Interaction, utilisateur: discord.User = None):
         """Show user statistics"""
         target_user = utilisateur or interaction.user
-        stats = await self.db.get_user_stats(target_user.id)
+        stats = await self.db.get_user_stats(target_user.id, guild_id=interaction.guild_id)
         
         embed = stats_embed(target_user, stats)
         await interaction.response.send_message(embed=embed)
@@ -110,20 +115,19 @@ class Economy(commands.Cog):
             )
             return
         
-        # Check if giver has enough balance
-        giver_balance = await self.db.get_balance(giver_id)
-        if giver_balance < montant:
+        # Transfer coins (the balance check happens inside the transaction)
+        # The giver's lock keeps the gift from racing their own bets
+        async with self.bot.user_locks.hold(giver_id):
+            result = await self.db.transfer(giver_id, receiver_id, montant, guild_id=interaction.guild_id)
+        if result is None:
+            giver_balance = await self.db.get_balance(giver_id, guild_id=interaction.guild_id)
             await interaction.response.send_message(
                 embed=error_embed("❌ Erreur", f"Vous n'avez pas assez de coins! Balance: **{giver_balance:,}** coins"),
                 ephemeral=True
             )
             return
         
-        # Transfer coins
-        await self.db.update_balance(giver_id, -montant)
-        await self.db.update_balance(receiver_id, montant)
-        
-        new_balance = await self.db.get_balance(giver_id)
+        new_balance = result['from_balance']
         
         embed = success_embed(
             f"{config.EMOJI_COIN} Don effectué",
@@ -2,151 +2,208 @@
 Gambling games cog
 Contains all gambling game commands
 """
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
 import discord
 from discord import app_commands
 from discord.ext import commands
 import config
-from utils.embeds import game_result_embed, gambling_embed, error_embed
-from utils.helpers import (
-    validate_bet, coinflip, roll_dice, spin_slots, 
-    spin_roulette, BlackjackGame, crash_game
+from database.write_queue import DatabaseBusy
+from utils.embeds import game_result_embed, gambling_embed, error_embed, busy_embed
+from utils.helpers import validate_bet, BlackjackGame, Shoe
+from utils.game_engine import GAMES, TableGame
+from utils.sessions import (
+    BlackjackSession, CrashPlayer, CrashRound, CRASH_BETTING, CRASH_RUNNING, CRASH_CRASHED, floor_multiplier
 )
 
+# Players listed by name in a crash round message (the embed description is limited to 4096 characters)
+CRASH_LISTED_PLAYERS = 20
+
+async def _run_button(interaction: discord.Interaction, action):
+    """
+    Run the action of a button: its errors do not reach the slash command error handler
+    (bot.on_app_command_error), so a full write queue is answered here the same way
+    """
+    try:
+        await action
+    except DatabaseBusy:
+        if interaction.response.is_done():
+            await interaction.followup.send(embed=busy_embed(), ephemeral=True)
+        else:
+            await interaction.response.send_message(embed=busy_embed(), ephemeral=True)
+
+class BlackjackButton(discord.ui.DynamicItem[discord.ui.Button], template=r"bj:(?P<action>hit|stand|double|split)"):
+    """
+    A button of an interactive blackjack round
+    
+    The custom_id only names the action: the round is looked up from the user and
+    the message, so the buttons need no view stored per message and survive cog reloads.
+    """
+    
+    STYLES = {
+        'hit': ("Tirer", discord.ButtonStyle.primary),
+        'stand': ("Rester", discord.ButtonStyle.secondary),
+        'double': ("Doubler", discord.ButtonStyle.success),
+        'split': ("Séparer", discord.ButtonStyle.success),
+    }
+    
+    def __init__(self, action: str, disabled: bool = False):
+        label, style = self.STYLES[action]
+        super().__init__(discord.ui.Button(label=label, style=style, custom_id=f"bj:{action}", disabled=disabled))
+        self.action = action
+    
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match: re.Match[str]):
+        return cls(match['action'])
+    
+    async def callback(self, interaction: discord.Interaction):
+        await _run_button(interaction, interaction.client.get_cog('Games').blackjack_action(interaction, self.action))
+
+class CrashButton(discord.ui.DynamicItem[discord.ui.Button], template=r"crash:cashout"):
+    """The cashout button of a crash round; the round is looked up from the channel and the message"""
+    
+    def __init__(self):
+        super().__init__(discord.ui.Button(label="Retirer", style=discord.ButtonStyle.success, emoji="💰",
+                                           custom_id="crash:cashout"))
+    
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match: re.Match[str]):
+        return cls()
+    
+    async def callback(self, interaction: discord.Interaction):
+        await _run_button(interaction, interaction.client.get_cog('Games').crash_cashout(interaction))
+
 class Games(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
+        self.locks = bot.user_locks
+        # One blackjack shoe per channel, kept between hands (created on the first hand),
+        # in order of last use: past BLACKJACK_MAX_SHOES the least recently used one is dropped
+        self.shoes: "OrderedDict[int, Shoe]" = OrderedDict()
+        # Open blackjack rounds, one per user (see utils/sessions.py)
+        self.sessions = bot.blackjack_sessions
+        self._expiry_task: Optional[asyncio.Task] = None
+        # Crash round of each channel (one at a time, removed once settled)
+        self.crash_rounds: Dict[int, CrashRound] = {}
+    
+    async def cog_load(self):
+        self.bot.add_dynamic_items(BlackjackButton, CrashButton)
+        self._expiry_task = asyncio.create_task(self._expire_blackjack())
+    
+    async def cog_unload(self):
+        self.bot.remove_dynamic_items(BlackjackButton, CrashButton)
+        if self._expiry_task:
+            self._expiry_task.cancel()
+    
+    async def _insufficient_funds(self, interaction: discord.Interaction):
+        """Reply when the balance no longer covers the bet at settlement time"""
+        balance = await self.db.get_balance(interaction.user.id, guild_id=interaction.guild_id)
+        await interaction.response.send_message(
+            embed=error_embed("❌ Erreur", f"Vous n'avez pas assez de coins! Balance: **{balance}** coins"),
+            ephemeral=True
+        )
+    
+    async def _play_table(self, interaction: discord.Interaction, game: TableGame, bet: Optional[str], mise: int):
+        """Play one round of a fixed-outcome game from config.GAMES"""
+        user_id = interaction.user.id
+        # Serialize this user's bets: validation and settlement see the same balance
+        async with self.locks.hold(user_id):
+            balance = await self.db.get_balance(user_id, guild_id=interaction.guild_id)
+            
+            # Validate bet
+            is_valid, error_msg = validate_bet(balance, mise)
+            if not is_valid:
+                await interaction.response.send_message(embed=error_embed("❌ Erreur", error_msg), ephemeral=True)
+                return
+            
+            # Play game: one table lookup, the result text is pre-rendered
+            multiplier, details = game.play(bet)
+            won = multiplier > 0
+            
+            payout = int(mise * multiplier) if won else 0
+            new_balance = await self.db.settle_bet(user_id, game.name, mise, payout - mise, guild_id=interaction.guild_id)
+            if new_balance is None:
+                await self._insufficient_funds(interaction)
+                return
+        
+        embed = game_result_embed(game.title, won, mise, payout, new_balance, details)
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="jouer", description="Jouez à un des jeux du bot")
+    @app_commands.describe(
+        jeu="Le jeu",
+        mise="Montant à parier",
+        pari="Votre pari (pour les jeux qui en ont)"
+    )
+    async def play_command(self, interaction: discord.Interaction, jeu: str, mise: int, pari: Optional[str] = None):
+        """Generic command for every game declared in config.GAMES"""
+        game = GAMES.get(jeu)
+        if game is None:
+            await interaction.response.send_message(
+                embed=error_embed("❌ Erreur", f"Jeu inconnu! Jeux disponibles: {', '.join(GAMES)}"),
+                ephemeral=True
+            )
+            return
+        
+        if None in game.bets:
+            pari = None
+        elif pari not in game.bets:
+            await interaction.response.send_message(
+                embed=error_embed("❌ Erreur", f"Choisissez un pari: {', '.join(f'`{bet}`' for bet in game.bets)}"),
+                ephemeral=True
+            )
+            return
+        
+        await self._play_table(interaction, game, pari, mise)
+    
+    @play_command.autocomplete('jeu')
+    async def _game_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        current = current.lower()
+        return [
+            app_commands.Choice(name=f"{game.emoji} {game.title} - {game.description}"[:100], value=name)
+            for name, game in GAMES.items()
+            if current in name or current in game.title.lower()
+        ][:25]
+    
+    @play_command.autocomplete('pari')
+    async def _bet_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        game = GAMES.get(interaction.namespace.jeu)
+        if game is None or None in game.bets:
+            return []
+        current = current.lower()
+        return [
+            app_commands.Choice(name=label, value=bet)
+            for bet, label in game.bets.items()
+            if current in bet or current in label.lower()
+        ][:25]
     
     @app_commands.command(name="coinflip", description="Pariez sur pile ou face")
     @app_commands.describe(
-        choix="Choisissez pile ou face",
+        choix="Pile ou Face",
         mise="Montant à parier"
     )
     @app_commands.choices(choix=[
-        app_commands.Choice(name="Pile", value="pile"),
-        app_commands.Choice(name="Face", value="face")
+        app_commands.Choice(name=label, value=bet) for bet, label in GAMES['coinflip'].bets.items()
     ])
     async def coinflip_command(self, interaction: discord.Interaction, choix: app_commands.Choice[str], mise: int):
         """Coinflip gambling game"""
-        user_id = interaction.user.id
-        balance = await self.db.get_balance(user_id)
-        
-        # Validate bet
-        is_valid, error_msg = validate_bet(balance, mise)
-        if not is_valid:
-            await interaction.response.send_message(embed=error_embed("❌ Erreur", error_msg), ephemeral=True)
-            return
-        
-        # Play game
-        won, result = coinflip(choix.value)
-        
-        if won:
-            payout = mise * 2
-            await self.db.update_balance(user_id, mise)
-            await self.db.record_game(user_id, "coinflip", mise, mise)
-        else:
-            payout = 0
-            await self.db.update_balance(user_id, -mise)
-            await self.db.record_game(user_id, "coinflip", mise, -mise)
-        
-        new_balance = await self.db.get_balance(user_id)
-        
-        result_emoji = "🪙" if result == "pile" else "🎴"
-        details = f"Vous avez choisi: **{choix.name}**\nRésultat: {result_emoji} **{result.capitalize()}**"
-        
-        embed = game_result_embed("Coinflip", won, mise, payout, new_balance, details)
-        await interaction.response.send_message(embed=embed)
+        await self._play_table(interaction, GAMES['coinflip'], choix.value, mise)
     
     @app_commands.command(name="dice", description="Lancez les dés et gagnez selon le résultat")
     @app_commands.describe(mise="Montant à parier")
     async def dice_command(self, interaction: discord.Interaction, mise: int):
         """Dice gambling game"""
-        user_id = interaction.user.id
-        balance = await self.db.get_balance(user_id)
-        
-        # Validate bet
-        is_valid, error_msg = validate_bet(balance, mise)
-        if not is_valid:
-            await interaction.response.send_message(embed=error_embed("❌ Erreur", error_msg), ephemeral=True)
-            return
-        
-        # Roll dice
-        dice = roll_dice(2)
-        total = sum(dice)
-        
-        # Determine multiplier
-        if total == 12:  # Double 6
-            multiplier = 10
-            won = True
-        elif total == 2:  # Double 1
-            multiplier = 5
-            won = True
-        elif total >= 10:
-            multiplier = 3
-            won = True
-        elif total >= 7:
-            multiplier = 1.5
-            won = True
-        else:
-            multiplier = 0
-            won = False
-        
-        if won:
-            payout = int(mise * multiplier)
-            profit = payout - mise
-            await self.db.update_balance(user_id, profit)
-            await self.db.record_game(user_id, "dice", mise, profit)
-        else:
-            payout = 0
-            await self.db.update_balance(user_id, -mise)
-            await self.db.record_game(user_id, "dice", mise, -mise)
-        
-        new_balance = await self.db.get_balance(user_id)
-        
-        details = f"{config.EMOJI_DICE} Dés: **{dice[0]}** + **{dice[1]}** = **{total}**\n"
-        if won:
-            details += f"Multiplicateur: **x{multiplier}**"
-        
-        embed = game_result_embed("Dice", won, mise, payout, new_balance, details)
-        await interaction.response.send_message(embed=embed)
+        await self._play_table(interaction, GAMES['dice'], None, mise)
     
     @app_commands.command(name="slots", description="Jouez à la machine à sous")
     @app_commands.describe(mise="Montant à parier")
     async def slots_command(self, interaction: discord.Interaction, mise: int):
         """Slot machine gambling game"""
-        user_id = interaction.user.id
-        balance = await self.db.get_balance(user_id)
-        
-        # Validate bet
-        is_valid, error_msg = validate_bet(balance, mise)
-        if not is_valid:
-            await interaction.response.send_message(embed=error_embed("❌ Erreur", error_msg), ephemeral=True)
-            return
-        
-        # Spin slots
-        symbols, multiplier = spin_slots()
-        won = multiplier > 0
-        
-        if won:
-            payout = int(mise * multiplier)
-            profit = payout - mise
-            await self.db.update_balance(user_id, profit)
-            await self.db.record_game(user_id, "slots", mise, profit)
-        else:
-            payout = 0
-            await self.db.update_balance(user_id, -mise)
-            await self.db.record_game(user_id, "slots", mise, -mise)
-        
-        new_balance = await self.db.get_balance(user_id)
-        
-        details = f"{config.EMOJI_SLOTS} **{symbols[0]} | {symbols[1]} | {symbols[2]}**\n"
-        if won:
-            details += f"Multiplicateur: **x{multiplier}**"
-            if multiplier >= 20:
-                details += " 🎊 **JACKPOT!** 🎊"
-        
-        embed = game_result_embed("Slots", won, mise, payout, new_balance, details)
-        await interaction.response.send_message(embed=embed)
+        await self._play_table(interaction, GAMES['slots'], None, mise)
     
     @app_commands.command(name="roulette", description="Pariez à la roulette")
     @app_commands.describe(
@@ -154,127 +211,412 @@ class Games(commands.Cog):
         mise="Montant à parier"
     )
     @app_commands.choices(type_pari=[
-        app_commands.Choice(name="Rouge (x2)", value="rouge"),
-        app_commands.Choice(name="Noir (x2)", value="noir"),
-        app_commands.Choice(name="Vert (x36)", value="vert"),
-        app_commands.Choice(name="Pair (x2)", value="pair"),
-        app_commands.Choice(name="Impair (x2)", value="impair")
+        app_commands.Choice(name=label, value=bet) for bet, label in GAMES['roulette'].bets.items()
     ])
     async def roulette_command(self, interaction: discord.Interaction, type_pari: app_commands.Choice[str], mise: int):
         """Roulette gambling game"""
-        user_id = interaction.user.id
-        balance = await self.db.get_balance(user_id)
-        
-        # Validate bet
-        is_valid, error_msg = validate_bet(balance, mise)
-        if not is_valid:
-            await interaction.response.send_message(embed=error_embed("❌ Erreur", error_msg), ephemeral=True)
-            return
-        
-        # Spin roulette
-        won, multiplier, result = spin_roulette(type_pari.value)
-        
-        if won:
-            payout = int(mise * multiplier)
-            profit = payout - mise
-            await self.db.update_balance(user_id, profit)
-            await self.db.record_game(user_id, "roulette", mise, profit)
-        else:
-            payout = 0
-            await self.db.update_balance(user_id, -mise)
-            await self.db.record_game(user_id, "roulette", mise, -mise)
-        
-        new_balance = await self.db.get_balance(user_id)
-        
-        details = f"{config.EMOJI_ROULETTE} Vous avez parié sur: **{type_pari.name}**\n"
-        details += f"Résultat: {result}"
-        
-        embed = game_result_embed("Roulette", won, mise, payout, new_balance, details)
-        await interaction.response.send_message(embed=embed)
+        await self._play_table(interaction, GAMES['roulette'], type_pari.value, mise)
     
     @app_commands.command(name="blackjack", description="Jouez au Blackjack contre le croupier")
     @app_commands.describe(mise="Montant à parier")
     async def blackjack_command(self, interaction: discord.Interaction, mise: int):
-        """Blackjack gambling game"""
+        """Blackjack gambling game: the round goes on with the buttons of the message"""
         user_id = interaction.user.id
-        balance = await self.db.get_balance(user_id)
-        
-        # Validate bet
-        is_valid, error_msg = validate_bet(balance, mise)
-        if not is_valid:
-            await interaction.response.send_message(embed=error_embed("❌ Erreur", error_msg), ephemeral=True)
-            return
-        
-        # Play blackjack
-        game = BlackjackGame()
-        won, description, multiplier = game.play()
-        
-        if multiplier > 0:
-            payout = int(mise * multiplier)
-            profit = payout - mise
-            await self.db.update_balance(user_id, profit)
-            await self.db.record_game(user_id, "blackjack", mise, profit)
+        # Serialize this user's bets: validation and escrow see the same balance
+        async with self.locks.hold(user_id):
+            if user_id in self.sessions:
+                await interaction.response.send_message(
+                    embed=error_embed("❌ Erreur", "Vous avez déjà une main de blackjack en cours!"),
+                    ephemeral=True
+                )
+                return
+                
+            balance = await self.db.get_balance(user_id, guild_id=interaction.guild_id)
+            
+            # Validate bet
+            is_valid, error_msg = validate_bet(balance, mise)
+            if not is_valid:
+                await interaction.response.send_message(embed=error_embed("❌ Erreur", error_msg), ephemeral=True)
+                return
+                
+            # The slot is reserved before the bet is escrowed: an escrowed round is always in the
+            # store, where the expiry task settles it if nothing else does
+            game = BlackjackGame(self._shoe(interaction.channel_id))
+            session = BlackjackSession(user_id, interaction.guild_id, None, mise, game)
+            session.interaction = interaction
+            if not self.sessions.add(session):
+                await interaction.response.send_message(
+                    embed=error_embed("❌ Erreur", "Trop de parties de blackjack en cours, réessayez dans un instant!"),
+                    ephemeral=True
+                )
+                return
+                
+            # The bet leaves the balance before any card is dealt
+            try:
+                escrow = await self.db.open_escrow(user_id, "blackjack", mise, guild_id=interaction.guild_id)
+            except BaseException:
+                # Nothing was escrowed (queue full, write error): free the slot
+                self.sessions.remove(session)
+                raise
+            if escrow is None:
+                self.sessions.remove(session)
+                await self._insufficient_funds(interaction)
+                return
+            session.escrow_id = escrow['escrow_id']
+            game.deal()
+            
+            # A blackjack on the deal ends the round at once
+            if game.finished:
+                embed = await self._settle_blackjack(session)
+                await interaction.response.send_message(embed=embed)
+                return
+                
+            # Until the message id is known no button can reach the round; if sending
+            # fails, the round expires like an abandoned one
+            await interaction.response.send_message(embed=self._blackjack_embed(session), view=self._blackjack_view(game))
+            session.message_id = (await interaction.original_response()).id
+    
+    def _shoe(self, channel_id: int) -> Shoe:
+        """The shoe of a channel; a round still open on a dropped shoe keeps dealing from it"""
+        shoe = self.shoes.get(channel_id)
+        if shoe is None:
+            shoe = self.shoes[channel_id] = Shoe()
+            while len(self.shoes) > max(1, config.BLACKJACK_MAX_SHOES):
+                self.shoes.popitem(last=False)
         else:
-            payout = 0
-            await self.db.update_balance(user_id, -mise)
-            await self.db.record_game(user_id, "blackjack", mise, -mise)
-        
-        new_balance = await self.db.get_balance(user_id)
-        
-        details = f"{config.EMOJI_CARDS}\n{description}"
-        
-        embed = game_result_embed("Blackjack", won, mise, payout, new_balance, details)
-        await interaction.response.send_message(embed=embed)
+            self.shoes.move_to_end(channel_id)
+        return shoe
+    
+    async def blackjack_action(self, interaction: discord.Interaction, action: str):
+        """Apply a button of an open blackjack round (see BlackjackButton)"""
+        user_id = interaction.user.id
+        async with self.locks.hold(user_id):
+            session = self.sessions.get(user_id, interaction.message.id)
+            if session is None:
+                await interaction.response.send_message(
+                    embed=error_embed("❌ Erreur", "Cette main n'est pas la vôtre ou elle est déjà terminée."),
+                    ephemeral=True
+                )
+                return
+                
+            game = session.game
+            if game.finished:
+                # Settled already, or its settlement failed and the expiry task will retry it
+                await interaction.response.send_message(
+                    embed=error_embed("❌ Erreur", "Cette main est terminée."),
+                    ephemeral=True
+                )
+                return
+            if action in ('double', 'split'):
+                if not (game.can_double() if action == 'double' else game.can_split()):
+                    await interaction.response.send_message(
+                        embed=error_embed("❌ Erreur", "Cette action n'est pas possible sur cette main."),
+                        ephemeral=True
+                    )
+                    return
+                # Doubling or splitting escrows one more stake of the current hand
+                stake = session.bet * game.stakes[game.active]
+                if await self.db.add_to_escrow(session.escrow_id, user_id, stake, guild_id=session.guild_id) is None:
+                    await self._insufficient_funds(interaction)
+                    return
+                    
+            {'hit': game.hit, 'stand': game.stand, 'double': game.double, 'split': game.split}[action]()
+            session.interaction = interaction
+            
+            if game.finished:
+                embed = await self._settle_blackjack(session)
+                await interaction.response.edit_message(embed=embed, view=None)
+                return
+            self.sessions.touch(session)
+        
+        await interaction.response.edit_message(embed=self._blackjack_embed(session), view=self._blackjack_view(game))
+    
+    async def _settle_blackjack(self, session: BlackjackSession, note: str = "") -> discord.Embed:
+        """
+        Pay out a finished round and close its session (called with the user's lock held)
+        The session is only removed once the settlement has committed: if it fails, the
+        finished round stays in the store (actions are refused) and the expiry task retries it.
+        """
+        game = session.game
+        payout = game.payout(session.bet)
+        new_balance = await self.db.settle_escrow(
+            session.escrow_id, session.user_id, "blackjack", payout, guild_id=session.guild_id
+        )
+        self.sessions.remove(session)
+        if new_balance is None:
+            # The escrow was deleted by /resetuser
+            return error_embed("❌ Partie annulée", "Cette partie a été annulée par un administrateur.")
+            
+        staked = session.bet * sum(game.stakes)
+        details = f"{config.EMOJI_CARDS}\n{game.describe()}"
+        if note:
+            details += f"\n\n{note}"
+        return game_result_embed("Blackjack", payout > staked, staked, payout, new_balance, details)
+    
+    def _blackjack_embed(self, session: BlackjackSession) -> discord.Embed:
+        """Embed of a round still in play"""
+        staked = session.bet * sum(session.game.stakes)
+        return gambling_embed(
+            f"{config.EMOJI_CARDS} Blackjack",
+            f"{session.game.describe()}\n\n"
+            f"Mise: **{staked:,}** coins\n"
+            f"Sans action pendant {self.sessions.ttl}s, vous restez automatiquement."
+        )
     
-    @app_commands.command(name="crash", description="Pariez sur un multiplicateur avant le crash")
+    @staticmethod
+    def _blackjack_view(game: BlackjackGame) -> discord.ui.View:
+        """Buttons of a round; the view only holds dynamic items, so nothing is stored per message"""
+        view = discord.ui.View(timeout=None)
+        view.add_item(BlackjackButton('hit'))
+        view.add_item(BlackjackButton('stand'))
+        view.add_item(BlackjackButton('double', disabled=not game.can_double()))
+        view.add_item(BlackjackButton('split', disabled=not game.can_split()))
+        return view
+    
+    async def _expire_blackjack(self):
+        """Finish the rounds left without action for BLACKJACK_SESSION_TTL seconds"""
+        interval = max(1, min(30, self.sessions.ttl / 4))
+        while True:
+            await asyncio.sleep(interval)
+            for session in self.sessions.expired():
+                try:
+                    await self._expire_session(session)
+                except Exception as e:
+                    print(f"❌ Failed to expire blackjack round of {session.user_id}: {e}")
+    
+    async def _expire_session(self, session: BlackjackSession):
+        """The player stands on every hand, the dealer plays and the round is paid out"""
+        async with self.locks.hold(session.user_id):
+            # A button may have been used while waiting for the lock
+            if self.sessions.get(session.user_id) is not session or session.expires > time.monotonic():
+                return
+            session.game.stand_all()
+            embed = await self._settle_blackjack(session, "⏱️ Temps écoulé: vous restez sur vos mains.")
+        
+        if session.interaction is not None:
+            try:
+                await session.interaction.edit_original_response(embed=embed, view=None)
+            except discord.HTTPException:
+                pass  # Message deleted or interaction token expired: the round is settled anyway
+    
+    @app_commands.command(name="crash", description="Rejoignez la partie de crash du salon")
     @app_commands.describe(
         mise="Montant à parier",
-        multiplicateur="Multiplicateur de retrait (ex: 2.0 pour x2)"
+        multiplicateur="Retrait automatique à ce multiplicateur (optionnel, ex: 2.0 pour x2)"
     )
-    async def crash_command(self, interaction: discord.Interaction, mise: int, multiplicateur: float):
-        """Crash gambling game"""
+    async def crash_command(self, interaction: discord.Interaction, mise: int, multiplicateur: Optional[float] = None):
+        """Crash gambling game: join the round of the channel (created by the first player)"""
         user_id = interaction.user.id
-        balance = await self.db.get_balance(user_id)
-        
-        # Validate bet
-        is_valid, error_msg = validate_bet(balance, mise)
-        if not is_valid:
-            await interaction.response.send_message(embed=error_embed("❌ Erreur", error_msg), ephemeral=True)
-            return
         
         # Validate multiplier
-        if multiplicateur < 1.01 or multiplicateur > 100:
+        if multiplicateur is not None and (multiplicateur < 1.01 or multiplicateur > 100):
             await interaction.response.send_message(
                 embed=error_embed("❌ Erreur", "Le multiplicateur doit être entre 1.01 et 100!"),
                 ephemeral=True
             )
             return
-        
-        # Play crash game
-        won, crash_point = crash_game(multiplicateur)
-        
-        if won:
-            payout = int(mise * multiplicateur)
-            profit = payout - mise
-            await self.db.update_balance(user_id, profit)
-            await self.db.record_game(user_id, "crash", mise, profit)
-        else:
-            payout = 0
-            await self.db.update_balance(user_id, -mise)
-            await self.db.record_game(user_id, "crash", mise, -mise)
-        
-        new_balance = await self.db.get_balance(user_id)
-        
-        details = f"🚀 Votre multiplicateur: **x{multiplicateur}**\n"
-        details += f"💥 Point de crash: **x{crash_point}**\n"
-        
-        if won:
-            details += f"\n✅ Vous avez retiré avant le crash!"
-        else:
-            details += f"\n❌ Crash! Vous avez perdu votre mise."
-        
-        embed = game_result_embed("Crash", won, mise, payout, new_balance, details)
-        await interaction.response.send_message(embed=embed)
+            
+        # Serialize this user's bets: validation and escrow see the same balance
+        async with self.locks.hold(user_id):
+            balance = await self.db.get_balance(user_id, guild_id=interaction.guild_id)
+            
+            # Validate bet
+            is_valid, error_msg = validate_bet(balance, mise)
+            if not is_valid:
+                await interaction.response.send_message(embed=error_embed("❌ Erreur", error_msg), ephemeral=True)
+                return
+                
+            # No await between these checks and the seat reservation: the round cannot take off in between
+            crash_round = self.crash_rounds.get(interaction.channel_id)
+            error_msg = None
+            if crash_round is not None and not crash_round.open:
+                error_msg = "Une partie est en cours dans ce salon, attendez la suivante!"
+            elif crash_round is not None and user_id in crash_round.players:
+                error_msg = "Vous participez déjà à cette partie!"
+            elif crash_round is not None and len(crash_round.players) >= config.CRASH_MAX_PLAYERS:
+                error_msg = "Cette partie est complète, attendez la suivante!"
+            if error_msg:
+                await interaction.response.send_message(embed=error_embed("❌ Erreur", error_msg), ephemeral=True)
+                return
+                
+            if crash_round is None:
+                crash_round = self.crash_rounds[interaction.channel_id] = CrashRound(interaction.channel_id, interaction.guild_id)
+                crash_round.task = asyncio.create_task(self._run_crash_round(crash_round, interaction.channel))
+            player = crash_round.players[user_id] = CrashPlayer(user_id, interaction.user.display_name, mise, multiplicateur)
+            
+            # The bet leaves the balance now; it is paid back (or not) when the round crashes
+            crash_round.joining += 1
+            try:
+                escrow = await self.db.open_escrow(user_id, "crash", mise, guild_id=interaction.guild_id)
+            except BaseException:
+                # Nothing was escrowed (queue full, write error): free the seat
+                del crash_round.players[user_id]
+                raise
+            finally:
+                crash_round.joining -= 1
+            if escrow is None:
+                del crash_round.players[user_id]
+                await self._insufficient_funds(interaction)
+                return
+            player.escrow_id = escrow['escrow_id']
+            crash_round.dirty = True
+        
+        seconds = max(0, crash_round.betting_ends - time.monotonic())
+        details = f"🚀 Vous misez **{mise:,}** coins. Décollage dans **{seconds:.0f}s**.\n"
+        if multiplicateur is not None:
+            details += f"Retrait automatique à **x{multiplicateur}**.\n"
+        details += "Cliquez sur **Retirer** avant le crash pour encaisser votre mise x le multiplicateur!"
+        await interaction.response.send_message(embed=gambling_embed("🚀 Crash", details), ephemeral=True)
+    
+    async def crash_cashout(self, interaction: discord.Interaction):
+        """Cash a player out of the round of the channel (see CrashButton)"""
+        crash_round = self.crash_rounds.get(interaction.channel_id)
+        if crash_round is None or crash_round.message is None or crash_round.message.id != interaction.message.id:
+            await interaction.response.send_message(embed=error_embed("❌ Erreur", "Cette partie est terminée."), ephemeral=True)
+            return
+        if crash_round.phase == CRASH_BETTING:
+            await interaction.response.send_message(
+                embed=error_embed("❌ Erreur", "La partie n'a pas encore décollé!"),
+                ephemeral=True
+            )
+            return
+            
+        player = crash_round.players.get(interaction.user.id)
+        multiplier = crash_round.cash_out(interaction.user.id)
+        if multiplier is None:
+            if player is None or player.escrow_id is None:
+                message = "Vous ne participez pas à cette partie."
+            elif player.cashout is not None:
+                message = f"Vous avez déjà retiré à **x{player.cashout}**."
+            else:
+                message = "Trop tard, la fusée a crashé! 💥"
+            await interaction.response.send_message(embed=error_embed("❌ Erreur", message), ephemeral=True)
+            return
+            
+        await interaction.response.send_message(
+            embed=gambling_embed(
+                "💰 Retrait",
+                f"Retiré à **x{multiplier}**: **{int(player.bet * multiplier):,}** coins "
+                f"vous seront versés au crash de la partie."
+            ),
+            ephemeral=True
+        )
+    
+    async def _run_crash_round(self, crash_round: CrashRound, channel: discord.abc.Messageable):
+        """
+        Drive a crash round: betting phase, takeoff, crash, then one batched settlement
+        
+        The message is edited at most once every CRASH_EDIT_INTERVAL seconds, whatever
+        the number of players: joins and cashouts only mark the round as changed.
+        """
+        try:
+            try:
+                crash_round.message = await channel.send(embed=self._crash_embed(crash_round), view=self._crash_view())
+                crash_round.dirty = False
+            except discord.HTTPException as e:
+                # Without the message there is no cashout button: the round cannot be played
+                print(f"❌ Failed to send the crash round of channel {crash_round.channel_id}, refunding: {e}")
+                await self._cancel_crash(crash_round)
+                return
+                
+            # Betting phase (takeoff also waits for the joins still escrowing their bet)
+            while (remaining := crash_round.betting_ends - time.monotonic()) > 0 or crash_round.joining:
+                await asyncio.sleep(min(config.CRASH_EDIT_INTERVAL, max(remaining, 0.05)))
+                await self._refresh_crash(crash_round)
+            if not crash_round.settlements():
+                crash_round.crash()
+                await self._refresh_crash(crash_round, gambling_embed("🚀 Crash", "Partie annulée: aucun joueur."))
+                return
+                
+            crash_round.start()
+            try:
+                while (remaining := crash_round.crash_time - time.monotonic()) > 0:
+                    await asyncio.sleep(min(config.CRASH_EDIT_INTERVAL, remaining))
+                    # The multiplier moved: the message is always refreshed while flying
+                    crash_round.dirty = True
+                    await self._refresh_crash(crash_round)
+            except Exception as e:
+                # Players may have cashed out already: the round still flies to its crash point
+                print(f"❌ Crash round of channel {crash_round.channel_id}: {e}")
+                await asyncio.sleep(max(0, crash_round.crash_time - time.monotonic()))
+                
+            crash_round.crash()
+            # Retried until it commits (see DatabaseManager.settle_escrows): cashouts are never lost
+            balances = await self.db.settle_escrows("crash", crash_round.settlements(), guild_id=crash_round.guild_id)
+            await self._refresh_crash(crash_round, self._crash_embed(crash_round, balances))
+        except Exception as e:
+            # Before takeoff nobody has cashed out: the escrowed bets are refunded at the next startup
+            print(f"❌ Crash round of channel {crash_round.channel_id} failed: {e}")
+        finally:
+            if self.crash_rounds.get(crash_round.channel_id) is crash_round:
+                del self.crash_rounds[crash_round.channel_id]
+    
+    async def _cancel_crash(self, crash_round: CrashRound):
+        """Close a round before takeoff and give every escrowed bet back"""
+        # No join can start any more; the ones escrowing their bet are waited for
+        crash_round.crash()
+        while crash_round.joining:
+            await asyncio.sleep(0.05)
+        escrows = [(player.escrow_id, player.user_id) for player in crash_round.players.values() if player.escrow_id is not None]
+        if escrows:
+            await self.db.cancel_escrows("crash", escrows, guild_id=crash_round.guild_id)
+    
+    async def _refresh_crash(self, crash_round: CrashRound, embed: Optional[discord.Embed] = None):
+        """Edit the round message if something changed (embed given: final message, without button)"""
+        if crash_round.message is None or not (crash_round.dirty or embed):
+            return
+        crash_round.dirty = False
+        try:
+            if embed is None:
+                await crash_round.message.edit(embed=self._crash_embed(crash_round), view=self._crash_view())
+            else:
+                await crash_round.message.edit(embed=embed, view=None)
+        except discord.HTTPException:
+            pass  # Message deleted: the round goes on and is settled anyway
+    
+    def _crash_embed(self, crash_round: CrashRound, balances: Optional[Dict[int, Optional[int]]] = None) -> discord.Embed:
+        """Embed of a crash round: players and their state, with the multiplier or the results"""
+        players = [player for player in crash_round.players.values() if player.escrow_id is not None]
+        lines = []
+        for player in players[:CRASH_LISTED_PLAYERS]:
+            multiplier = player.result(crash_round.crash_point) if crash_round.phase == CRASH_CRASHED else player.cashout
+            if multiplier is not None:
+                lines.append(f"💰 {player.name}: {player.bet:,} → **x{multiplier}** (+{int(player.bet * multiplier) - player.bet:,})")
+            elif crash_round.phase == CRASH_CRASHED:
+                lines.append(f"💥 {player.name}: -{player.bet:,}")
+            else:
+                auto = f" (retrait auto x{player.auto_cashout})" if player.auto_cashout is not None else ""
+                lines.append(f"🎲 {player.name}: {player.bet:,}{auto}")
+        if len(players) > CRASH_LISTED_PLAYERS:
+            lines.append(f"... et {len(players) - CRASH_LISTED_PLAYERS} autre(s) joueur(s)")
+        listing = '\n'.join(lines) or "Aucun joueur pour l'instant."
+        
+        if crash_round.phase == CRASH_BETTING:
+            seconds = max(0, crash_round.betting_ends - time.monotonic())
+            return gambling_embed(
+                "🚀 Crash: inscriptions",
+                f"Rejoignez la partie avec `/crash <mise>`! Décollage dans **{seconds:.0f}s**.\n\n{listing}"
+            )
+        if crash_round.phase == CRASH_RUNNING:
+            return gambling_embed(
+                f"🚀 Crash: x{floor_multiplier(crash_round.multiplier()):.2f}",
+                f"Cliquez sur **Retirer** avant le crash!\n\n{listing}"
+            )
+            
+        wagered = sum(player.bet for player in players)
+        paid = sum(player.payout(crash_round.crash_point) for player in players)
+        summary = f"💥 Crash à **x{floor_multiplier(crash_round.crash_point):.2f}**\n"
+        summary += f"{len(players)} joueur(s), {wagered:,} coins misés, {paid:,} coins payés\n\n{listing}"
+        if balances is not None and any(balance is None for balance in balances.values()):
+            summary += "\n\n⚠️ Certaines mises ont été annulées par un administrateur."
+        return gambling_embed("💥 Crash!", summary)
+    
+    @staticmethod
+    def _crash_view() -> discord.ui.View:
+        """Cashout button; the view only holds a dynamic item, so nothing is stored per message"""
+        view = discord.ui.View(timeout=None)
+        view.add_item(CrashButton())
+        return view
 
 async def setup(bot):
     await bot.add_cog(Games(bot))
@@ -38,6 +38,15 @@ STARTING_BALANCE = int(os.getenv('STARTING_BALANCE', 1000))
 # Les utilisateurs peuvent réclamer cette récompense une fois toutes les 24 heures
 DAILY_REWARD = int(os.getenv('DAILY_REWARD', 500))
 
+# Délai entre deux récompenses quotidiennes (en secondes)
+DAILY_COOLDOWN = 24 * 60 * 60
+
+# Une économie séparée par serveur Discord (balances, classement, statistiques)
+# Avec false (par défaut), tous les serveurs partagent la même économie
+# Les comptes existants restent dans l'économie globale: activer cette option
+# sur un bot déjà utilisé repart de zéro dans chaque serveur
+PER_GUILD_ECONOMY = os.getenv('PER_GUILD_ECONOMY', 'false').lower() == 'true'
+
 # ============================================================================
 # CONFIGURATION DES JEUX
 # ============================================================================
@@ -50,6 +59,38 @@ MIN_BET = 10
 # Limite les paris pour éviter que les joueurs perdent trop d'un coup
 MAX_BET = 10000
 
+# Blackjack: chaque salon a son propre sabot de BLACKJACK_DECKS jeux de 52 cartes (6 à 8 au casino)
+# La carte de coupe est placée après BLACKJACK_PENETRATION (fraction) du sabot:
+# quand elle sort, le sabot est remélangé avant la main suivante
+BLACKJACK_DECKS = int(os.getenv('BLACKJACK_DECKS', 6))
+BLACKJACK_PENETRATION = float(os.getenv('BLACKJACK_PENETRATION', 0.75))
+# Nombre maximum de sabots gardés en mémoire: celui du salon le moins récemment joué est oublié
+# (le salon reçoit un sabot neuf à sa prochaine main)
+BLACKJACK_MAX_SHOES = int(os.getenv('BLACKJACK_MAX_SHOES', 1000))
+
+# Blackjack interactif (boutons Tirer / Rester / Doubler / Séparer)
+# La mise est bloquée dès la distribution; une main ouverte est gardée en mémoire
+# - BLACKJACK_SESSION_TTL: secondes sans action avant que la main soit terminée
+#   automatiquement (le joueur reste sur toutes ses mains, le croupier joue)
+# - BLACKJACK_MAX_SESSIONS: nombre maximum de mains ouvertes en même temps (mémoire bornée)
+# - BLACKJACK_MAX_HANDS: nombre maximum de mains d'un joueur après des séparations
+# Une main ouverte par joueur; après un redémarrage, les mises en cours sont remboursées
+BLACKJACK_SESSION_TTL = int(os.getenv('BLACKJACK_SESSION_TTL', 120))
+BLACKJACK_MAX_SESSIONS = int(os.getenv('BLACKJACK_MAX_SESSIONS', 5000))
+BLACKJACK_MAX_HANDS = 4
+
+# Crash multijoueur: une partie par salon, partagée par tous les joueurs qui la rejoignent
+# - CRASH_BETTING_SECONDS: durée des inscriptions (/crash) avant le décollage
+# - CRASH_DOUBLING_SECONDS: le multiplicateur double toutes les N secondes (x2 à 5s, x4 à 10s...)
+# - CRASH_EDIT_INTERVAL: secondes minimum entre deux modifications du message de la partie;
+#   les inscriptions et retraits arrivés entre-temps sont regroupés dans la modification suivante
+# - CRASH_MAX_PLAYERS: nombre maximum de joueurs par partie
+# Tous les joueurs sont réglés ensemble au crash, en une transaction par shard
+CRASH_BETTING_SECONDS = int(os.getenv('CRASH_BETTING_SECONDS', 10))
+CRASH_DOUBLING_SECONDS = 5
+CRASH_EDIT_INTERVAL = 1.5
+CRASH_MAX_PLAYERS = 200
+
 # ============================================================================
 # CONFIGURATION DE LA BASE DE DONNÉES
 # ============================================================================
@@ -58,6 +99,69 @@ MAX_BET = 10000
 # La base de données stocke toutes les informations des utilisateurs
 DATABASE_PATH = 'database/gambling.db'
 
+# Nombre de fichiers SQLite (shards) sur lesquels les utilisateurs sont répartis
+# Avec 1, toute la base est dans DATABASE_PATH. Sinon: database/gambling.0-of-4.db, etc.
+# ⚠️ Pour changer ce nombre sur une base existante: python -m database.reshard --to N
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', 1))
+
+# Nombre de connexions de lecture (en lecture seule) gardées ouvertes dans le pool
+# Le pool contient en plus une seule connexion d'écriture
+# Les commandes de lecture (/leaderboard, /stats, /botstats...) n'utilisent que ces connexions
+DATABASE_POOL_SIZE = int(os.getenv('DATABASE_POOL_SIZE', 4))
+
+# Profil de performance SQLite appliqué à chaque connexion du pool
+# - journal_mode WAL: les lectures ne bloquent plus les écritures (et inversement)
+# - synchronous NORMAL: en mode WAL, un fsync par checkpoint au lieu d'un par commit
+# - busy_timeout: temps d'attente (ms) avant l'erreur "database is locked"
+# - mmap_size: taille (octets) du fichier lue via mémoire mappée
+# - cache_size: taille du cache de pages (négatif = en Kio, ici 64 Mo)
+# - temp_store: tables temporaires et tris en mémoire
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -64 * 1024)),
+    'temp_store': os.getenv('SQLITE_TEMP_STORE', 'MEMORY'),
+}
+
+# Écriture groupée de l'historique des parties (game_history)
+# Les parties sont gardées en mémoire puis écrites par lots:
+# dès que HISTORY_BATCH_SIZE parties sont en attente, ou au plus tard après HISTORY_FLUSH_MS ms
+# Mettre HISTORY_BATCH_SIZE à 0 pour écrire chaque partie immédiatement
+HISTORY_BATCH_SIZE = int(os.getenv('HISTORY_BATCH_SIZE', 100))
+HISTORY_FLUSH_MS = int(os.getenv('HISTORY_FLUSH_MS', 250))
+
+# Rétention de l'historique des parties: game_history ne garde que les parties récentes
+# Toutes les HISTORY_RETENTION_INTERVAL secondes, les parties plus vieilles que
+# HISTORY_RETENTION_DAYS jours sont:
+# - résumées par jour, joueur et jeu (table game_history_daily: les statistiques restent exactes)
+# - exportées dans des archives compressées (dossier HISTORY_ARCHIVE_DIR, un fichier par mois)
+# - supprimées par lots de HISTORY_RETENTION_CHUNK parties (une transaction par lot)
+# Mettre HISTORY_RETENTION_DAYS à 0 pour tout garder dans game_history
+HISTORY_RETENTION_DAYS = int(os.getenv('HISTORY_RETENTION_DAYS', 90))
+HISTORY_RETENTION_INTERVAL = int(os.getenv('HISTORY_RETENTION_INTERVAL', 6 * 60 * 60))
+HISTORY_RETENTION_CHUNK = 5000
+HISTORY_ARCHIVE_DIR = os.getenv('HISTORY_ARCHIVE_DIR', 'database/archive')
+
+# Nombre maximum de comptes utilisateurs gardés en mémoire (cache LRU)
+# Mettre 0 pour désactiver le cache
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 10000))
+
+# File d'attente des écritures (toutes les modifications passent par un seul écrivain)
+# - WRITE_QUEUE_SIZE: nombre maximum d'écritures en attente; au-delà, les commandes
+#   sont refusées tout de suite ("bot très sollicité") au lieu d'attendre
+# - WRITE_BATCH_SIZE: nombre maximum d'écritures regroupées dans une même transaction
+WRITE_QUEUE_SIZE = int(os.getenv('WRITE_QUEUE_SIZE', 1000))
+WRITE_BATCH_SIZE = int(os.getenv('WRITE_BATCH_SIZE', 64))
+
+# Registre des balances (table ledger): chaque variation de balance y est enregistrée
+# Un instantané des balances est pris toutes les LEDGER_SNAPSHOT_INTERVAL secondes
+# (et à l'arrêt du bot); au démarrage, seules les lignes écrites depuis sont relues
+# Mettre LEDGER_SNAPSHOT_INTERVAL à 0 pour ne prendre aucun instantané
+LEDGER_SNAPSHOT_INTERVAL = int(os.getenv('LEDGER_SNAPSHOT_INTERVAL', 3600))
+LEDGER_SNAPSHOTS_KEPT = 2
+
 # ============================================================================
 # COULEURS POUR LES EMBEDS DISCORD
 # ============================================================================
@@ -83,3 +187,99 @@ EMOJI_SLOTS = "🎰"      # Pour la machine à sous
 EMOJI_CARDS = "🃏"      # Pour le blackjack
 EMOJI_ROULETTE = "🎡"   # Pour la roulette
 EMOJI_CHART = "📊"      # Pour les statistiques et classements
+
+# ============================================================================
+# TABLES DES JEUX
+# ============================================================================
+# Les jeux à issues fixes sont déclarés ici comme des données (voir utils/game_engine.py):
+# changer une cote ou ajouter un jeu ne demande aucune modification des commandes.
+# Chaque jeu est jouable avec /jouer (les jeux d'origine gardent aussi leur propre commande).
+#
+# Champs de chaque jeu:
+# - code: code du jeu dans l'historique des parties
+#   ⚠️ Unique, entre 1 et 999, ne jamais le changer ni le réutiliser (5 et 6: blackjack et crash)
+# - title, emoji, description: affichage dans Discord
+# - kind: forme de la table des issues
+#   - 'outcomes': liste 'outcomes' de (poids, texte affiché, gains),
+#     gains = multiplicateur pour tous les paris, ou {pari: multiplicateur}
+#   - 'dice': 'dice' dés à 'sides' faces, 'multipliers' = {total des dés: multiplicateur}
+#   - 'reels': 'reels' rouleaux de 'symbols' = {symbole: poids},
+#     'all_match' = {symbole: multiplicateur} et 'pair' = multiplicateur pour deux symboles identiques
+#   - 'wheel': numéros de 0 à 'numbers' - 1, 'red' = numéros rouges (0 est vert, les autres noirs)
+# - bets: paris possibles {valeur: {'label': nom affiché}} (optionnel);
+#   pour 'wheel', chaque pari donne aussi son 'multiplier' et ses 'numbers' gagnants
+# - jackpot: à partir de ce multiplicateur, le gain est affiché comme un jackpot (optionnel)
+# Un total, une combinaison ou un numéro absent des gains est perdu (multiplicateur 0).
+
+ROULETTE_RED = [1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36]
+
+GAMES = {
+    'coinflip': {
+        'code': 1,
+        'title': "Coinflip",
+        'emoji': "🪙",
+        'description': "Pile ou face (x2)",
+        'kind': 'outcomes',
+        'bets': {
+            'pile': {'label': "Pile"},
+            'face': {'label': "Face"},
+        },
+        'outcomes': [
+            (1, "🪙 **Pile**", {'pile': 2}),
+            (1, "🎴 **Face**", {'face': 2}),
+        ],
+    },
+    'dice': {
+        'code': 2,
+        'title': "Dice",
+        'emoji': EMOJI_DICE,
+        'description': "Deux dés: 7 ou plus pour gagner (jusqu'à x10)",
+        'kind': 'dice',
+        'dice': 2,
+        'sides': 6,
+        'multipliers': {
+            12: 10,  # Double 6
+            2: 5,    # Double 1
+            11: 3, 10: 3,
+            9: 1.5, 8: 1.5, 7: 1.5,
+        },
+    },
+    'slots': {
+        'code': 3,
+        'title': "Slots",
+        'emoji': EMOJI_SLOTS,
+        'description': "Machine à sous (jusqu'à x50)",
+        'kind': 'reels',
+        'reels': 3,
+        'symbols': {'🍒': 30, '🍋': 25, '🍊': 20, '🍇': 15, '💎': 8, '7️⃣': 2},
+        'all_match': {'7️⃣': 50, '💎': 20, '🍇': 10, '🍊': 5, '🍋': 3, '🍒': 2},
+        'pair': 1.5,
+        'jackpot': 20,
+    },
+    'roulette': {
+        'code': 4,
+        'title': "Roulette",
+        'emoji': EMOJI_ROULETTE,
+        'description': "Roulette (x2 ou x36)",
+        'kind': 'wheel',
+        'numbers': 37,
+        'red': ROULETTE_RED,
+        'bets': {
+            'rouge': {'label': "Rouge (x2)", 'multiplier': 2, 'numbers': ROULETTE_RED},
+            'noir': {'label': "Noir (x2)", 'multiplier': 2,
+                     'numbers': [n for n in range(1, 37) if n not in ROULETTE_RED]},
+            'vert': {'label': "Vert (x36)", 'multiplier': 36, 'numbers': [0]},
+            'pair': {'label': "Pair (x2)", 'multiplier': 2, 'numbers': list(range(2, 37, 2))},
+            'impair': {'label': "Impair (x2)", 'multiplier': 2, 'numbers': list(range(1, 37, 2))},
+        },
+    },
+}
+
+# Crash: distribution du point de crash, par tranches (probabilité, début, fin)
+# Le point est uniforme dans sa tranche; les petits multiplicateurs sont plus fréquents
+CRASH_BANDS = [
+    (0.33, 1.0, 2.0),
+    (0.33, 2.0, 5.0),
+    (0.24, 5.0, 10.0),
+    (0.10, 10.0, 50.0),
+]
@@ -9,11 +9,490 @@ La base de données stocke:
 - L'historique des parties jouées
 """
 
-import aiosqlite
+import asyncio
 import os
-from datetime import datetime, timedelta
-from typing import Optional, List, Tuple
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, Optional, List, Tuple
 import config
+from database.shard import Shard, shard_index, shard_path
+from database.user_cache import UserCache
+from database.leaderboard import RankIndex
+from database.write_queue import Rollback
+from database.history_archive import write_archive
+
+# Recalcule les compteurs globaux à partir des tables users et game_history
+# Version d'origine (une seule économie), figée: utilisée uniquement par la migration 2
+REBUILD_STATS_V2 = [
+    "DELETE FROM global_stats",
+    """
+    INSERT INTO global_stats (id, total_users, total_coins, total_games, total_won, total_lost)
+    SELECT 1, COUNT(*), COALESCE(SUM(balance), 0), (SELECT COUNT(*) FROM game_history),
+           COALESCE(SUM(total_won), 0), COALESCE(SUM(total_lost), 0)
+    FROM users
+    """,
+    "DELETE FROM game_type_stats",
+    """
+    INSERT INTO game_type_stats (game_type, games, wagered, won, lost)
+    SELECT game_type, COUNT(*), SUM(bet_amount), SUM(MAX(result, 0)), SUM(MAX(-result, 0))
+    FROM game_history
+    GROUP BY game_type
+    """,
+]
+
+# Recalcule les statistiques par joueur et par jeu à partir de game_history
+# Version d'origine (une seule économie), figée: utilisée uniquement par la migration 3
+REBUILD_USER_GAME_STATS_V3 = [
+    "DELETE FROM user_game_stats",
+    """
+    INSERT INTO user_game_stats (user_id, game_type, games, wagered, won, lost, biggest_win)
+    SELECT user_id, game_type, COUNT(*), SUM(bet_amount), SUM(MAX(result, 0)), SUM(MAX(-result, 0)), MAX(MAX(result, 0))
+    FROM game_history
+    GROUP BY user_id, game_type
+    """,
+]
+
+# Codes des types de jeu dans game_history (colonne game_code, table de correspondance game_types)
+# Un petit entier prend 1 octet par partie au lieu du nom complet
+# ⚠️ Un code ne doit jamais changer ni être réutilisé: toujours ajouter les nouveaux jeux à la fin!
+# Les jeux déclarés dans config.GAMES apportent leur propre code (champ 'code')
+GAME_TYPES = {
+    'coinflip': 1,
+    'dice': 2,
+    'slots': 3,
+    'roulette': 4,
+    'blackjack': 5,
+    'crash': 6,
+    **{name: game['code'] for name, game in config.GAMES.items()},
+}
+
+# Toutes les parties d'une économie, par joueur et par jeu: les parties récentes (game_history)
+# plus les résumés quotidiens des parties archivées par la rétention (game_history_daily)
+ALL_GAMES = """
+    SELECT user_id, game_code, COUNT(*) AS games, SUM(bet_amount) AS wagered,
+           SUM(MAX(result, 0)) AS won, SUM(MAX(-result, 0)) AS lost, MAX(MAX(result, 0)) AS biggest_win
+    FROM game_history
+    WHERE guild_id = :guild_id
+    GROUP BY user_id, game_code
+    UNION ALL
+    SELECT user_id, game_code, SUM(games), SUM(wagered), SUM(won), SUM(lost), MAX(biggest_win)
+    FROM game_history_daily
+    WHERE guild_id = :guild_id
+    GROUP BY user_id, game_code
+"""
+
+# Recalcule les compteurs d'une économie à partir des tables users, game_history et game_history_daily
+# Utilisé par la commande /rebuildstats et par l'outil de resharding
+# Paramètre nommé :guild_id (0 = économie globale, voir config.PER_GUILD_ECONOMY)
+REBUILD_STATS = [
+    "DELETE FROM global_stats WHERE guild_id = :guild_id",
+    f"""
+    INSERT INTO global_stats (guild_id, total_users, total_coins, total_games, total_won, total_lost)
+    SELECT :guild_id, COUNT(*), COALESCE(SUM(balance), 0),
+           (SELECT COALESCE(SUM(games), 0) FROM ({ALL_GAMES})),
+           COALESCE(SUM(total_won), 0), COALESCE(SUM(total_lost), 0)
+    FROM users
+    WHERE guild_id = :guild_id
+    """,
+    "DELETE FROM game_type_stats WHERE guild_id = :guild_id",
+    f"""
+    INSERT INTO game_type_stats (guild_id, game_type, games, wagered, won, lost)
+    SELECT :guild_id, game_types.name, SUM(games), SUM(wagered), SUM(won), SUM(lost)
+    FROM ({ALL_GAMES}) AS totals
+    JOIN game_types ON game_types.id = totals.game_code
+    GROUP BY totals.game_code
+    """,
+]
+
+# Recalcule les statistiques par joueur et par jeu d'une économie (parties récentes + résumés)
+# Utilisé par backfill_user_game_stats() (paramètre nommé :guild_id)
+REBUILD_USER_GAME_STATS = [
+    "DELETE FROM user_game_stats WHERE guild_id = :guild_id",
+    f"""
+    INSERT INTO user_game_stats (guild_id, user_id, game_type, games, wagered, won, lost, biggest_win)
+    SELECT :guild_id, totals.user_id, game_types.name, SUM(games), SUM(wagered), SUM(won), SUM(lost), MAX(biggest_win)
+    FROM ({ALL_GAMES}) AS totals
+    JOIN game_types ON game_types.id = totals.game_code
+    GROUP BY totals.user_id, totals.game_code
+    """,
+]
+
+# Un jour en millisecondes (timestamps de game_history)
+DAY_MS = 24 * 60 * 60 * 1000
+
+# Nombre de pages libres rendues au disque par étape de PRAGMA incremental_vacuum
+# (l'écrivain du shard est bloqué pendant chaque étape)
+VACUUM_STEP_PAGES = 1000
+
+# Délai maximum (secondes) entre deux essais du règlement groupé des mises bloquées
+ESCROW_RETRY_MAX_DELAY = 30
+
+# Migrations du schéma, appliquées dans l'ordre au démarrage
+# La version actuelle du schéma est stockée dans PRAGMA user_version:
+# la migration MIGRATIONS[i] fait passer la base de la version i à la version i + 1.
+# ⚠️ Ne jamais modifier une migration existante, toujours en ajouter une nouvelle à la fin!
+MIGRATIONS = [
+    # 1: Index pour les requêtes fréquentes
+    [
+        # get_user_stats (WHERE user_id = ? GROUP BY game_type) et le DELETE de /resetuser
+        "CREATE INDEX IF NOT EXISTS idx_game_history_user_game ON game_history (user_id, game_type)",
+        # Jeu le plus populaire dans /botstats (GROUP BY game_type)
+        "CREATE INDEX IF NOT EXISTS idx_game_history_game_type ON game_history (game_type)",
+        # Requêtes par période (purge, statistiques récentes)
+        "CREATE INDEX IF NOT EXISTS idx_game_history_timestamp ON game_history (timestamp)",
+        # get_leaderboard (ORDER BY balance DESC)
+        "CREATE INDEX IF NOT EXISTS idx_users_balance ON users (balance DESC)",
+    ],
+    # 2: Compteurs globaux pour /botstats, tenus à jour à chaque écriture
+    [
+        """
+        CREATE TABLE IF NOT EXISTS global_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),  -- Une seule ligne
+            total_users INTEGER NOT NULL DEFAULT 0, -- Nombre d'utilisateurs
+            total_coins INTEGER NOT NULL DEFAULT 0, -- Coins en circulation (somme des balances)
+            total_games INTEGER NOT NULL DEFAULT 0, -- Parties jouées
+            total_won INTEGER NOT NULL DEFAULT 0,   -- Somme des total_won des utilisateurs
+            total_lost INTEGER NOT NULL DEFAULT 0   -- Somme des total_lost des utilisateurs
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS game_type_stats (
+            game_type TEXT PRIMARY KEY,             -- Type de jeu (coinflip, dice, slots, etc.)
+            games INTEGER NOT NULL DEFAULT 0,       -- Nombre de parties
+            wagered INTEGER NOT NULL DEFAULT 0,     -- Total misé
+            won INTEGER NOT NULL DEFAULT 0,         -- Total gagné par les joueurs
+            lost INTEGER NOT NULL DEFAULT 0         -- Total perdu par les joueurs
+        )
+        """,
+        *REBUILD_STATS_V2,
+    ],
+    # 3: Statistiques par joueur et par jeu pour /stats, tenues à jour à chaque partie
+    [
+        """
+        CREATE TABLE IF NOT EXISTS user_game_stats (
+            user_id INTEGER NOT NULL,               -- ID Discord de l'utilisateur
+            game_type TEXT NOT NULL,                -- Type de jeu
+            games INTEGER NOT NULL DEFAULT 0,       -- Nombre de parties
+            wagered INTEGER NOT NULL DEFAULT 0,     -- Total misé
+            won INTEGER NOT NULL DEFAULT 0,         -- Total gagné
+            lost INTEGER NOT NULL DEFAULT 0,        -- Total perdu
+            biggest_win INTEGER NOT NULL DEFAULT 0, -- Plus gros gain en une partie
+            PRIMARY KEY (user_id, game_type)
+        ) WITHOUT ROWID
+        """,
+        *REBUILD_USER_GAME_STATS_V3,
+    ],
+    # 4: users.last_daily passe d'une date ISO (TEXT, heure locale) à un timestamp epoch (INTEGER, secondes)
+    # La colonne est recréée car une colonne TEXT reconvertirait les entiers en texte
+    [
+        "ALTER TABLE users ADD COLUMN last_daily_epoch INTEGER",
+        "UPDATE users SET last_daily_epoch = CAST(strftime('%s', last_daily, 'utc') AS INTEGER) WHERE last_daily IS NOT NULL",
+        "ALTER TABLE users DROP COLUMN last_daily",
+        "ALTER TABLE users RENAME COLUMN last_daily_epoch TO last_daily",
+    ],
+    # 5: Registre des dons entre joueurs (/give)
+    [
+        """
+        CREATE TABLE IF NOT EXISTS transfers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,   -- ID unique du don
+            from_user_id INTEGER NOT NULL,          -- Qui a donné
+            to_user_id INTEGER NOT NULL,            -- Qui a reçu
+            amount INTEGER NOT NULL,                -- Montant donné
+            timestamp INTEGER NOT NULL              -- Date du don (timestamp epoch)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_transfers_from ON transfers (from_user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_transfers_to ON transfers (to_user_id)",
+    ],
+    # 6: Dons entre deux shards (en deux phases, voir DatabaseManager.transfer)
+    # Le même don est enregistré dans le shard du donneur et dans celui du receveur,
+    # avec la même clé; le côté donneur reste 'pending' jusqu'au crédit du receveur
+    [
+        "ALTER TABLE transfers ADD COLUMN transfer_key TEXT",
+        "ALTER TABLE transfers ADD COLUMN status TEXT NOT NULL DEFAULT 'done'",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_transfers_key ON transfers (transfer_key)",
+        "CREATE INDEX IF NOT EXISTS idx_transfers_pending ON transfers (status) WHERE status = 'pending'",
+    ],
+    # 7: Registre (ledger) de toutes les variations de balance + instantanés des balances
+    # Le registre commence par une ligne 'opening' par joueur existant (sa balance actuelle)
+    [
+        """
+        CREATE TABLE IF NOT EXISTS ledger (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,   -- Ordre des écritures
+            user_id INTEGER NOT NULL,               -- Joueur concerné
+            amount INTEGER NOT NULL,                -- Variation de balance (positive ou négative)
+            balance INTEGER NOT NULL,               -- Balance après la variation
+            reason TEXT NOT NULL,                   -- create, game, daily, transfer, admin, reset, opening
+            reference TEXT,                         -- Détail: type de jeu, clé du don...
+            timestamp INTEGER NOT NULL              -- Date (timestamp epoch)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_ledger_user ON ledger (user_id, id)",
+        """
+        CREATE TABLE IF NOT EXISTS ledger_snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,   -- ID de l'instantané
+            ledger_id INTEGER NOT NULL,             -- Dernière ligne du registre incluse
+            timestamp INTEGER NOT NULL              -- Date de l'instantané
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS snapshot_balances (
+            snapshot_id INTEGER NOT NULL,           -- Instantané
+            user_id INTEGER NOT NULL,               -- Joueur
+            balance INTEGER NOT NULL,               -- Balance au moment de l'instantané
+            PRIMARY KEY (snapshot_id, user_id)
+        ) WITHOUT ROWID
+        """,
+        """
+        INSERT INTO ledger (user_id, amount, balance, reason, timestamp)
+        SELECT user_id, balance, balance, 'opening', CAST(strftime('%s', 'now') AS INTEGER) FROM users
+        """,
+    ],
+    # 8: Une économie par serveur Discord (config.PER_GUILD_ECONOMY)
+    # Chaque table porte un guild_id (0 = économie globale): les données existantes vont dans l'économie 0.
+    # Les tables dont la clé primaire change sont recréées; les autres gagnent juste la colonne.
+    [
+        """
+        CREATE TABLE users_by_guild (
+            guild_id INTEGER NOT NULL DEFAULT 0,   -- Économie (ID du serveur, 0 = globale)
+            user_id INTEGER NOT NULL,              -- ID Discord de l'utilisateur
+            balance INTEGER DEFAULT 0,             -- Balance actuelle en coins
+            total_won INTEGER DEFAULT 0,           -- Total de coins gagnés (toutes parties)
+            total_lost INTEGER DEFAULT 0,          -- Total de coins perdus (toutes parties)
+            games_played INTEGER DEFAULT 0,        -- Nombre total de parties jouées
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,  -- Date de création du compte
+            last_daily INTEGER,                    -- Dernière récompense quotidienne (timestamp epoch)
+            PRIMARY KEY (guild_id, user_id)
+        )
+        """,
+        """
+        INSERT INTO users_by_guild (guild_id, user_id, balance, total_won, total_lost, games_played, created_at, last_daily)
+        SELECT 0, user_id, balance, total_won, total_lost, games_played, created_at, last_daily FROM users
+        """,
+        "DROP TABLE users",
+        "ALTER TABLE users_by_guild RENAME TO users",
+        # Classement d'une économie (WHERE guild_id = ? ORDER BY balance DESC)
+        "CREATE INDEX IF NOT EXISTS idx_users_guild_balance ON users (guild_id, balance DESC)",
+        """
+        CREATE TABLE user_game_stats_by_guild (
+            guild_id INTEGER NOT NULL DEFAULT 0,
+            user_id INTEGER NOT NULL,
+            game_type TEXT NOT NULL,
+            games INTEGER NOT NULL DEFAULT 0,
+            wagered INTEGER NOT NULL DEFAULT 0,
+            won INTEGER NOT NULL DEFAULT 0,
+            lost INTEGER NOT NULL DEFAULT 0,
+            biggest_win INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id, game_type)
+        ) WITHOUT ROWID
+        """,
+        "INSERT INTO user_game_stats_by_guild SELECT 0, * FROM user_game_stats",
+        "DROP TABLE user_game_stats",
+        "ALTER TABLE user_game_stats_by_guild RENAME TO user_game_stats",
+        # global_stats: une ligne par économie au lieu d'une seule ligne (id = 1)
+        """
+        CREATE TABLE global_stats_by_guild (
+            guild_id INTEGER PRIMARY KEY,           -- Économie (0 = globale)
+            total_users INTEGER NOT NULL DEFAULT 0,
+            total_coins INTEGER NOT NULL DEFAULT 0,
+            total_games INTEGER NOT NULL DEFAULT 0,
+            total_won INTEGER NOT NULL DEFAULT 0,
+            total_lost INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        INSERT INTO global_stats_by_guild (guild_id, total_users, total_coins, total_games, total_won, total_lost)
+        SELECT 0, total_users, total_coins, total_games, total_won, total_lost FROM global_stats
+        """,
+        "DROP TABLE global_stats",
+        "ALTER TABLE global_stats_by_guild RENAME TO global_stats",
+        """
+        CREATE TABLE game_type_stats_by_guild (
+            guild_id INTEGER NOT NULL DEFAULT 0,
+            game_type TEXT NOT NULL,
+            games INTEGER NOT NULL DEFAULT 0,
+            wagered INTEGER NOT NULL DEFAULT 0,
+            won INTEGER NOT NULL DEFAULT 0,
+            lost INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, game_type)
+        ) WITHOUT ROWID
+        """,
+        "INSERT INTO game_type_stats_by_guild SELECT 0, * FROM game_type_stats",
+        "DROP TABLE game_type_stats",
+        "ALTER TABLE game_type_stats_by_guild RENAME TO game_type_stats",
+        """
+        CREATE TABLE snapshot_balances_by_guild (
+            snapshot_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL DEFAULT 0,
+            user_id INTEGER NOT NULL,
+            balance INTEGER NOT NULL,
+            PRIMARY KEY (snapshot_id, guild_id, user_id)
+        ) WITHOUT ROWID
+        """,
+        "INSERT INTO snapshot_balances_by_guild SELECT snapshot_id, 0, user_id, balance FROM snapshot_balances",
+        "DROP TABLE snapshot_balances",
+        "ALTER TABLE snapshot_balances_by_guild RENAME TO snapshot_balances",
+        # Tables d'historique: trop grosses pour être recopiées, elles gagnent juste la colonne
+        "ALTER TABLE game_history ADD COLUMN guild_id INTEGER NOT NULL DEFAULT 0",
+        "DROP INDEX IF EXISTS idx_game_history_user_game",
+        "CREATE INDEX IF NOT EXISTS idx_game_history_guild_user_game ON game_history (guild_id, user_id, game_type)",
+        "ALTER TABLE ledger ADD COLUMN guild_id INTEGER NOT NULL DEFAULT 0",
+        "DROP INDEX IF EXISTS idx_ledger_user",
+        "CREATE INDEX IF NOT EXISTS idx_ledger_guild_user ON ledger (guild_id, user_id, id)",
+        "ALTER TABLE transfers ADD COLUMN guild_id INTEGER NOT NULL DEFAULT 0",
+    ],
+    # 9: Schéma compact pour game_history et users
+    # - game_type (texte) devient game_code, un petit entier (table game_types)
+    # - les dates texte (CURRENT_TIMESTAMP) deviennent des timestamps epoch en millisecondes
+    # - users devient une table WITHOUT ROWID (rangée directement par sa clé (guild_id, user_id))
+    # Un nom de jeu inconnu de GAME_TYPES reçoit un code à partir de 1000 (aucune partie n'est perdue)
+    # ⚠️ Migration hors ligne: les deux tables sont recopiées en une transaction au démarrage,
+    # puis la base est compactée (VACUUM). Le bot ne répond pas pendant ce temps, proportionnel
+    # à la taille de game_history: à faire pendant une fenêtre de maintenance (voir README).
+    [
+        """
+        CREATE TABLE IF NOT EXISTS game_types (
+            id INTEGER PRIMARY KEY,                 -- Code du jeu (voir GAME_TYPES)
+            name TEXT NOT NULL UNIQUE               -- Nom du jeu (coinflip, dice, slots, etc.)
+        )
+        """,
+        """
+        INSERT INTO game_types (id, name) VALUES
+            (1, 'coinflip'), (2, 'dice'), (3, 'slots'), (4, 'roulette'), (5, 'blackjack'), (6, 'crash')
+        """,
+        """
+        INSERT INTO game_types (id, name)
+        SELECT 999 + ROW_NUMBER() OVER (ORDER BY name), name FROM (
+            SELECT DISTINCT COALESCE(game_type, 'unknown') AS name FROM game_history
+        )
+        WHERE name NOT IN (SELECT name FROM game_types)
+        """,
+        """
+        CREATE TABLE game_history_compact (
+            id INTEGER PRIMARY KEY,                 -- ID unique de la partie
+            guild_id INTEGER NOT NULL DEFAULT 0,    -- Économie de la partie
+            user_id INTEGER NOT NULL,               -- ID de l'utilisateur qui a joué
+            game_code INTEGER NOT NULL,             -- Type de jeu (code de la table game_types)
+            bet_amount INTEGER NOT NULL,            -- Montant parié
+            result INTEGER NOT NULL,                -- Résultat (positif = gain, négatif = perte)
+            timestamp INTEGER NOT NULL              -- Date de la partie (epoch en millisecondes)
+        )
+        """,
+        """
+        INSERT INTO game_history_compact (id, guild_id, user_id, game_code, bet_amount, result, timestamp)
+        SELECT history.id, history.guild_id, history.user_id, game_types.id,
+               COALESCE(history.bet_amount, 0), COALESCE(history.result, 0),
+               COALESCE(CAST(strftime('%s', history.timestamp) AS INTEGER) * 1000, 0)
+        FROM game_history AS history
+        JOIN game_types ON game_types.name = COALESCE(history.game_type, 'unknown')
+        """,
+        "DROP TABLE game_history",
+        "ALTER TABLE game_history_compact RENAME TO game_history",
+        "CREATE INDEX IF NOT EXISTS idx_game_history_guild_user_game ON game_history (guild_id, user_id, game_code)",
+        "CREATE INDEX IF NOT EXISTS idx_game_history_timestamp ON game_history (timestamp)",
+        """
+        CREATE TABLE users_compact (
+            guild_id INTEGER NOT NULL DEFAULT 0,    -- Économie (ID du serveur, 0 = globale)
+            user_id INTEGER NOT NULL,               -- ID Discord de l'utilisateur
+            balance INTEGER NOT NULL DEFAULT 0,     -- Balance actuelle en coins
+            total_won INTEGER NOT NULL DEFAULT 0,   -- Total de coins gagnés (toutes parties)
+            total_lost INTEGER NOT NULL DEFAULT 0,  -- Total de coins perdus (toutes parties)
+            games_played INTEGER NOT NULL DEFAULT 0,  -- Nombre total de parties jouées
+            -- Date de création du compte (epoch en millisecondes)
+            created_at INTEGER NOT NULL DEFAULT (CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)),
+            last_daily INTEGER,                     -- Dernière récompense quotidienne (epoch en secondes)
+            PRIMARY KEY (guild_id, user_id)
+        ) WITHOUT ROWID
+        """,
+        """
+        INSERT INTO users_compact (guild_id, user_id, balance, total_won, total_lost, games_played, created_at, last_daily)
+        SELECT guild_id, user_id, COALESCE(balance, 0), COALESCE(total_won, 0), COALESCE(total_lost, 0),
+               COALESCE(games_played, 0), COALESCE(CAST(strftime('%s', created_at) AS INTEGER) * 1000, 0), last_daily
+        FROM users
+        """,
+        "DROP TABLE users",
+        "ALTER TABLE users_compact RENAME TO users",
+        "CREATE INDEX IF NOT EXISTS idx_users_guild_balance ON users (guild_id, balance DESC)",
+    ],
+    # 10: Rétention de l'historique (voir DatabaseManager.prune_history)
+    # Les parties archivées sont résumées par jour, joueur et jeu pour garder des statistiques exactes
+    [
+        """
+        CREATE TABLE IF NOT EXISTS game_history_daily (
+            guild_id INTEGER NOT NULL,              -- Économie des parties
+            user_id INTEGER NOT NULL,               -- Joueur
+            game_code INTEGER NOT NULL,             -- Type de jeu (code de la table game_types)
+            day INTEGER NOT NULL,                   -- Jour (minuit UTC, epoch en millisecondes)
+            games INTEGER NOT NULL,                 -- Nombre de parties
+            wagered INTEGER NOT NULL,               -- Total misé
+            won INTEGER NOT NULL,                   -- Total gagné
+            lost INTEGER NOT NULL,                  -- Total perdu
+            biggest_win INTEGER NOT NULL,           -- Plus gros gain en une partie
+            PRIMARY KEY (guild_id, user_id, game_code, day)
+        ) WITHOUT ROWID
+        """,
+        # Les pages libérées par la rétention pourront être rendues au disque
+        # (PRAGMA incremental_vacuum); le changement prend effet au VACUUM qui suit
+        "PRAGMA auto_vacuum = INCREMENTAL",
+    ],
+    # 11: Mises bloquées des parties en plusieurs étapes (blackjack interactif, crash)
+    # La mise quitte la balance à la distribution et revient avec le gain au règlement
+    [
+        """
+        CREATE TABLE IF NOT EXISTS escrows (
+            id INTEGER PRIMARY KEY,                 -- ID de la mise bloquée
+            guild_id INTEGER NOT NULL,              -- Économie du joueur
+            user_id INTEGER NOT NULL,               -- Joueur
+            game_code INTEGER NOT NULL,             -- Type de jeu (code de la table game_types)
+            amount INTEGER NOT NULL,                -- Total bloqué (mise + doublements/splits)
+            created_at INTEGER NOT NULL             -- Distribution (epoch en millisecondes)
+        )
+        """,
+    ],
+    # 12: game_history.id redevient AUTOINCREMENT (perdu à la migration 9)
+    # Sans lui, les ids des dernières parties supprimées (/resetuser, rétention) étaient
+    # réutilisés, et les archives pouvaient contenir deux parties avec le même id
+    [
+        """
+        CREATE TABLE game_history_sequenced (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,   -- ID unique de la partie (jamais réutilisé)
+            guild_id INTEGER NOT NULL DEFAULT 0,    -- Économie de la partie
+            user_id INTEGER NOT NULL,               -- ID de l'utilisateur qui a joué
+            game_code INTEGER NOT NULL,             -- Type de jeu (code de la table game_types)
+            bet_amount INTEGER NOT NULL,            -- Montant parié
+            result INTEGER NOT NULL,                -- Résultat (positif = gain, négatif = perte)
+            timestamp INTEGER NOT NULL              -- Date de la partie (epoch en millisecondes)
+        )
+        """,
+        """
+        INSERT INTO game_history_sequenced (id, guild_id, user_id, game_code, bet_amount, result, timestamp)
+        SELECT id, guild_id, user_id, game_code, bet_amount, result, timestamp FROM game_history
+        """,
+        "DROP TABLE game_history",
+        "ALTER TABLE game_history_sequenced RENAME TO game_history",
+        "CREATE INDEX IF NOT EXISTS idx_game_history_guild_user_game ON game_history (guild_id, user_id, game_code)",
+        "CREATE INDEX IF NOT EXISTS idx_game_history_timestamp ON game_history (timestamp)",
+    ],
+]
+
+# Migrations qui libèrent beaucoup de place ou changent auto_vacuum:
+# le fichier est compacté (VACUUM) une fois toutes les migrations appliquées
+VACUUM_AFTER_MIGRATIONS = {9, 10}
+
+# Balances attendues d'après le registre: dernier instantané + variations enregistrées depuis
+# Paramètres: (snapshot_id, ledger_id) de l'instantané, (0, 0) s'il n'y en a pas
+LEDGER_MISMATCHES = """
+    SELECT users.guild_id, users.user_id, users.balance,
+           COALESCE(snapshot.balance, 0) + COALESCE(tail.amount, 0) AS expected
+    FROM users
+    LEFT JOIN snapshot_balances AS snapshot
+        ON snapshot.snapshot_id = ? AND snapshot.guild_id = users.guild_id AND snapshot.user_id = users.user_id
+    LEFT JOIN (
+        SELECT guild_id, user_id, SUM(amount) AS amount FROM ledger WHERE id > ? GROUP BY guild_id, user_id
+    ) AS tail ON tail.guild_id = users.guild_id AND tail.user_id = users.user_id
+    WHERE users.balance != COALESCE(snapshot.balance, 0) + COALESCE(tail.amount, 0)
+"""
 
 class DatabaseManager:
     """
@@ -25,17 +504,38 @@ class DatabaseManager:
     - Gestion de la balance (ajout, retrait, consultation)
     - Enregistrement de l'historique des jeux
     - Statistiques et classements
+    
+    Les données sont réparties sur config.SHARD_COUNT fichiers SQLite (voir database/shard.py).
+    Les opérations sur un utilisateur vont au shard de cet utilisateur; le classement
+    et les statistiques globales fusionnent les résultats de tous les shards.
+    
+    Chaque méthode publique accepte un guild_id (l'ID du serveur Discord de la commande).
+    Avec config.PER_GUILD_ECONOMY, chaque serveur a sa propre économie (balances,
+    classement, statistiques); sinon tout le monde partage l'économie globale (guild_id 0).
     """
     
-    def __init__(self, db_path: str = config.DATABASE_PATH):
+    def __init__(self, db_path: str = config.DATABASE_PATH, shard_count: int = config.SHARD_COUNT):
         """
         Initialise le gestionnaire de base de données
         
         Args:
             db_path: Chemin vers le fichier de base de données SQLite
+                     (avec plusieurs shards, le nom de base de leurs fichiers)
+            shard_count: Nombre de fichiers SQLite sur lesquels répartir les utilisateurs
         """
         self.db_path = db_path
         self._ensure_directory()
+        # Un shard par fichier SQLite (connexions ouvertes dans initialize())
+        self.shard_count = max(1, shard_count)
+        self.shards = [Shard(index, shard_path(db_path, index, self.shard_count)) for index in range(self.shard_count)]
+        # Cache LRU des comptes utilisateurs (mis à jour à chaque écriture)
+        self.cache = UserCache(config.USER_CACHE_SIZE)
+        # Classement en mémoire des joueurs, un par économie (rempli dans initialize())
+        self.leaderboards: Dict[int, RankIndex] = defaultdict(RankIndex)
+        # Tâche de fond qui prend les instantanés des balances (lancée dans initialize())
+        self._snapshot_task = None
+        # Tâche de fond qui archive les vieilles parties (lancée dans initialize())
+        self._retention_task = None
     
     def _ensure_directory(self):
         """
@@ -47,95 +547,456 @@ class DatabaseManager:
         """
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
     
+    def _shard(self, user_id: int) -> Shard:
+        """Renvoie le shard qui contient les données d'un utilisateur"""
+        return self.shards[shard_index(user_id, self.shard_count)]
+    
+    @staticmethod
+    def _economy(guild_id: Optional[int]) -> int:
+        """
+        Renvoie l'économie à utiliser pour une commande
+        
+        Avec config.PER_GUILD_ECONOMY, c'est le serveur de la commande
+        (0 pour un message privé). Sinon c'est toujours l'économie globale (0).
+        """
+        if config.PER_GUILD_ECONOMY and guild_id:
+            return guild_id
+        return 0
+    
     async def initialize(self):
         """
         Initialise la base de données avec les tables nécessaires
         
         Cette fonction est appelée au démarrage du bot.
-        Elle crée les tables si elles n'existent pas encore.
+        Elle ouvre le pool de connexions de chaque shard (en appliquant le profil
+        config.SQLITE_PRAGMAS) puis crée les tables si elles n'existent pas encore.
+        Enfin, elle termine les dons entre shards interrompus par un arrêt du bot
+        et rembourse les mises des parties restées en cours.
         
         Tables créées:
         - users: Stocke les informations des utilisateurs
         - game_history: Stocke l'historique de toutes les parties jouées
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            # Table des utilisateurs
-            # Stocke toutes les informations liées à chaque utilisateur
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id INTEGER PRIMARY KEY,           -- ID Discord de l'utilisateur (unique)
-                    balance INTEGER DEFAULT 0,             -- Balance actuelle en coins
-                    total_won INTEGER DEFAULT 0,           -- Total de coins gagnés (toutes parties)
-                    total_lost INTEGER DEFAULT 0,          -- Total de coins perdus (toutes parties)
-                    games_played INTEGER DEFAULT 0,        -- Nombre total de parties jouées
-                    last_daily TEXT,                       -- Date de la dernière récompense quotidienne
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP  -- Date de création du compte
-                )
-            """)
-            
-            # Table de l'historique des jeux
-            # Enregistre chaque partie jouée pour les statistiques
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS game_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT, -- ID unique de la partie
-                    user_id INTEGER,                      -- ID de l'utilisateur qui a joué
-                    game_type TEXT,                       -- Type de jeu (coinflip, dice, slots, etc.)
-                    bet_amount INTEGER,                   -- Montant parié
-                    result INTEGER,                       -- Résultat (positif = gain, négatif = perte)
-                    timestamp TEXT DEFAULT CURRENT_TIMESTAMP,  -- Date et heure de la partie
-                    FOREIGN KEY (user_id) REFERENCES users (user_id)  -- Lien avec la table users
-                )
-            """)
+        players = defaultdict(list)
+        for shard in self.shards:
+            await shard.open(setup=self._create_schema)
             
-            # Sauvegarde les changements dans la base de données
+            # Le classement de chaque économie fusionne les joueurs de tous les shards
+            async with shard.pool.reader() as db:
+                async with db.execute("SELECT guild_id, user_id, balance FROM users") as cursor:
+                    for guild_id, user_id, balance in await cursor.fetchall():
+                        players[guild_id].append((user_id, balance))
+        for guild_id, rows in players.items():
+            self.leaderboards[guild_id].load(rows)
+        
+        for shard in self.shards:
+            shard.start()
+        await self._recover_transfers()
+        await self._refund_escrows()
+        
+        if config.LEDGER_SNAPSHOT_INTERVAL > 0:
+            self._snapshot_task = asyncio.create_task(self._snapshot_loop())
+        if config.HISTORY_RETENTION_DAYS > 0:
+            self._retention_task = asyncio.create_task(self._retention_loop())
+    
+    async def _create_schema(self, db):
+        """
+        Crée les tables manquantes puis applique les migrations
+        
+        Exécutée par le pool sur la connexion d'écriture,
+        avant l'ouverture des connexions de lecture.
+        
+        Args:
+            db: La connexion d'écriture du pool
+        """
+        # Table des utilisateurs
+        # Stocke toutes les informations liées à chaque utilisateur
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                user_id INTEGER PRIMARY KEY,           -- ID Discord de l'utilisateur (unique)
+                balance INTEGER DEFAULT 0,             -- Balance actuelle en coins
+                total_won INTEGER DEFAULT 0,           -- Total de coins gagnés (toutes parties)
+                total_lost INTEGER DEFAULT 0,          -- Total de coins perdus (toutes parties)
+                games_played INTEGER DEFAULT 0,        -- Nombre total de parties jouées
+                last_daily TEXT,                       -- Date de la dernière récompense quotidienne
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP  -- Date de création du compte
+            )
+        """)
+        
+        # Table de l'historique des jeux
+        # Enregistre chaque partie jouée pour les statistiques
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS game_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, -- ID unique de la partie
+                user_id INTEGER,                      -- ID de l'utilisateur qui a joué
+                game_type TEXT,                       -- Type de jeu (coinflip, dice, slots, etc.)
+                bet_amount INTEGER,                   -- Montant parié
+                result INTEGER,                       -- Résultat (positif = gain, négatif = perte)
+                timestamp TEXT DEFAULT CURRENT_TIMESTAMP,  -- Date et heure de la partie
+                FOREIGN KEY (user_id) REFERENCES users (user_id)  -- Lien avec la table users
+            )
+        """)
+        
+        # Sauvegarde les changements dans la base de données
+        await db.commit()
+        
+        # Met le schéma à jour (index, nouvelles tables, etc.)
+        await self._migrate(db)
+        
+        # Ajoute les jeux apparus dans GAME_TYPES depuis la dernière migration
+        await db.executemany(
+            "INSERT INTO game_types (id, name) VALUES (?, ?) ON CONFLICT DO NOTHING",
+            [(code, name) for name, code in GAME_TYPES.items()]
+        )
+        await db.commit()
+        
+        # Un code déjà attribué à un autre jeu mélangerait les historiques des deux jeux
+        async with db.execute("SELECT id, name FROM game_types") as cursor:
+            known = {code: name for code, name in await cursor.fetchall()}
+        for name, code in GAME_TYPES.items():
+            if known[code] != name:
+                raise ValueError(f"Game code {code} of {name!r} is already used by {known[code]!r} in the database")
+        
+        # Vérifie les balances d'après le registre (reprise après un arrêt brutal)
+        await self._verify_ledger(db)
+    
+    async def _verify_ledger(self, db):
+        """
+        Compare chaque balance avec le registre et répare les différences
+        
+        La balance attendue est celle du dernier instantané plus la somme des
+        lignes du registre écrites depuis: seule la fin du registre est relue.
+        Le registre fait foi: une balance différente est remplacée (et signalée).
+        
+        Args:
+            db: La connexion d'écriture du shard (avant l'ouverture des lecteurs)
+        """
+        async with db.execute("SELECT id, ledger_id FROM ledger_snapshots ORDER BY id DESC LIMIT 1") as cursor:
+            snapshot = await cursor.fetchone()
+        async with db.execute(LEDGER_MISMATCHES, tuple(snapshot) if snapshot else (0, 0)) as cursor:
+            mismatches = await cursor.fetchall()
+        if not mismatches:
+            return
+        
+        await db.execute("BEGIN")
+        await db.executemany(
+            "UPDATE users SET balance = ? WHERE guild_id = ? AND user_id = ?",
+            [(expected, guild_id, user_id) for guild_id, user_id, _, expected in mismatches]
+        )
+        # Les coins en circulation sont recomptés (le compteur a pu suivre la mauvaise balance)
+        await db.executemany(
+            "UPDATE global_stats SET total_coins = (SELECT COALESCE(SUM(balance), 0) FROM users WHERE guild_id = ?) "
+            "WHERE guild_id = ?",
+            [(guild_id, guild_id) for guild_id in {row[0] for row in mismatches}]
+        )
+        await db.commit()
+        print(f"❌ Repaired {len(mismatches)} balance(s) that did not match the ledger")
+    
+    async def _migrate(self, db):
+        """
+        Applique les migrations de schéma qui n'ont pas encore été appliquées
+        
+        Chaque migration est exécutée dans sa propre transaction, avec la mise
+        à jour de PRAGMA user_version: si une migration échoue, la base reste
+        à la version précédente et la migration sera retentée au prochain démarrage.
+        
+        Args:
+            db: La connexion d'écriture du pool
+        """
+        async with db.execute("PRAGMA user_version") as cursor:
+            version = (await cursor.fetchone())[0]
+        
+        vacuum = False
+        for target, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+            # BEGIN explicite: sqlite3 n'ouvre pas de transaction tout seul pour le DDL
+            await db.execute("BEGIN")
+            for statement in statements:
+                await db.execute(statement)
+            # PRAGMA n'accepte pas de paramètre "?", la version est un entier sûr
+            await db.execute(f"PRAGMA user_version = {target}")
             await db.commit()
+            print(f"✅ Database migrated to schema version {target}")
+            vacuum = vacuum or target in VACUUM_AFTER_MIGRATIONS
+        
+        if vacuum:
+            # VACUUM ne peut pas être exécuté dans une transaction
+            await db.execute("VACUUM")
+            print("✅ Database compacted")
     
-    async def get_user(self, user_id: int) -> Optional[dict]:
+    async def close(self):
         """
-        Récupère les données d'un utilisateur depuis la base de données
+        Ferme le pool de connexions
+        
+        Cette fonction est appelée à l'arrêt du bot.
+        Les écritures en attente puis les parties encore dans le tampon
+        d'historique sont écrites avant la fermeture. Un dernier instantané
+        des balances accélère la vérification du registre au prochain démarrage.
+        """
+        if self._retention_task is not None:
+            self._retention_task.cancel()
+            try:
+                await self._retention_task
+            except asyncio.CancelledError:
+                pass
+            self._retention_task = None
+        if self._snapshot_task is not None:
+            self._snapshot_task.cancel()
+            try:
+                await self._snapshot_task
+            except asyncio.CancelledError:
+                pass
+            self._snapshot_task = None
+            await self.snapshot_balances()
+        for shard in self.shards:
+            await shard.close()
+    
+    async def flush_history(self):
+        """
+        Écrit immédiatement les parties en attente dans game_history
+        
+        A appeler avant une requête qui doit voir tout l'historique
+        (suppression de l'historique d'un joueur, statistiques exactes).
+        """
+        for shard in self.shards:
+            await shard.flush_history()
+    
+    async def _insert_history(self, shard: Shard, db, guild_id: int, user_id: int, game_type: str, bet_amount: int, result: int) -> bool:
+        """
+        Enregistre une partie dans game_history, dans la transaction en cours
+        
+        Si le tampon d'historique est activé, rien n'est écrit ici:
+        l'appelant doit ajouter la partie au tampon APRÈS le commit
+        (pour ne jamais garder une partie dont la transaction a été annulée).
         
         Args:
-            user_id: L'ID Discord de l'utilisateur
+            shard: Le shard de l'utilisateur
+            db: La connexion d'écriture de ce shard (transaction en cours)
+            guild_id: L'économie de la partie
             
         Returns:
-            Un dictionnaire contenant les données de l'utilisateur, ou None si non trouvé
-            Exemple: {'user_id': 123, 'balance': 1000, 'total_won': 500, ...}
+            True si la partie doit encore être ajoutée au tampon du shard après le commit
+            
+        Raises:
+            ValueError: si le type de jeu n'a pas de code dans GAME_TYPES
+        """
+        game_code = self._game_code(game_type)
+        if shard.history:
+            return True
+        
+        await db.execute(
+            "INSERT INTO game_history (guild_id, user_id, game_code, bet_amount, result, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (guild_id, user_id, game_code, bet_amount, result, int(time.time() * 1000))
+        )
+        return False
+    
+    @staticmethod
+    def _game_code(game_type: str) -> int:
+        """
+        Renvoie le code d'un type de jeu pour game_history (voir GAME_TYPES)
+        
+        Raises:
+            ValueError: si le type de jeu n'a pas de code
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            # row_factory permet de récupérer les résultats sous forme de dictionnaire
-            db.row_factory = aiosqlite.Row
+        try:
+            return GAME_TYPES[game_type]
+        except KeyError:
+            raise ValueError(f"Unknown game type: {game_type}") from None
+    
+    def _apply_row(self, row) -> Optional[dict]:
+        """
+        Reporte une ligne users renvoyée par une écriture (RETURNING *) en mémoire
+        
+        Met à jour le cache des utilisateurs et le classement en mémoire.
+        Enregistrée avec defer() par les opérations d'écriture: la file d'écriture
+        l'appelle juste après le commit, en tenant encore la connexion d'écriture.
+        Les mises à jour en mémoire se font donc dans le même ordre que dans la base.
+        
+        Args:
+            row: La ligne renvoyée par la base, ou None si aucun utilisateur n'a été modifié
             
-            async with db.execute(
-                "SELECT * FROM users WHERE user_id = ?", (user_id,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                # Convertit la Row en dictionnaire, ou retourne None si pas trouvé
-                return dict(row) if row else None
+        Returns:
+            La ligne sous forme de dictionnaire, ou None
+        """
+        if row is None:
+            return None
+        user = dict(row)
+        self.cache.put(user)
+        self.leaderboards[user['guild_id']].update(user['user_id'], user['balance'])
+        return user
     
-    async def create_user(self, user_id: int) -> dict:
+    async def _upsert_user(self, db, guild_id: int, user_id: int):
+        """
+        Récupère la ligne d'un utilisateur en la créant si besoin, dans la transaction en cours
+        
+        Un seul INSERT ... ON CONFLICT DO NOTHING RETURNING * crée le compte de manière
+        atomique: deux premières commandes simultanées du même utilisateur ne peuvent
+        plus se percuter sur la clé primaire. RETURNING ne renvoie une ligne que si
+        le compte vient d'être créé; sinon on lit la ligne existante sur la même connexion.
+        
+        Args:
+            db: La connexion d'écriture (transaction en cours)
+            guild_id: L'économie du compte
+            user_id: L'ID Discord de l'utilisateur
+            
+        Returns:
+            La ligne de l'utilisateur (aiosqlite.Row)
+        """
+        async with db.execute(
+            "INSERT INTO users (guild_id, user_id, balance) VALUES (?, ?, ?) "
+            "ON CONFLICT (guild_id, user_id) DO NOTHING RETURNING *",
+            (guild_id, user_id, config.STARTING_BALANCE)
+        ) as cursor:
+            row = await cursor.fetchone()
+        
+        if row is not None:
+            # Nouveau compte: il compte dans les statistiques globales et dans le registre
+            await self._update_global_stats(db, guild_id, users=1, coins=config.STARTING_BALANCE)
+            await self._record_ledger(db, guild_id, user_id, config.STARTING_BALANCE, config.STARTING_BALANCE, 'create')
+            return row
+        
+        async with db.execute("SELECT * FROM users WHERE guild_id = ? AND user_id = ?", (guild_id, user_id)) as cursor:
+            return await cursor.fetchone()
+    
+    async def _ensure_user(self, db, guild_id: int, user_id: int):
+        """
+        Crée le compte d'un utilisateur s'il n'existe pas, dans la transaction en cours
+        
+        Utilisée par les écritures qui modifient ensuite la ligne avec leur propre
+        UPDATE ... RETURNING: pas besoin de relire la ligne existante.
+        
+        Args:
+            db: La connexion d'écriture (transaction en cours)
+            guild_id: L'économie du compte
+            user_id: L'ID Discord de l'utilisateur
+        """
+        async with db.execute(
+            "INSERT INTO users (guild_id, user_id, balance) VALUES (?, ?, ?) "
+            "ON CONFLICT (guild_id, user_id) DO NOTHING RETURNING user_id",
+            (guild_id, user_id, config.STARTING_BALANCE)
+        ) as cursor:
+            created = await cursor.fetchone()
+        
+        if created is not None:
+            await self._update_global_stats(db, guild_id, users=1, coins=config.STARTING_BALANCE)
+            await self._record_ledger(db, guild_id, user_id, config.STARTING_BALANCE, config.STARTING_BALANCE, 'create')
+    
+    async def _update_global_stats(self, db, guild_id: int, users: int = 0, coins: int = 0, games: int = 0, won: int = 0, lost: int = 0):
+        """
+        Applique une variation aux compteurs globaux d'une économie, dans la transaction en cours
+        
+        Chaque écriture qui change une balance ou les statistiques appelle cette
+        fonction avant son commit: /botstats n'a ainsi plus qu'une ligne à lire.
+        La ligne de l'économie est créée à sa première écriture.
+        
+        Args:
+            db: La connexion d'écriture (transaction en cours)
+            guild_id: L'économie concernée
+            users: Variation du nombre d'utilisateurs
+            coins: Variation des coins en circulation
+            games: Variation du nombre de parties
+            won: Variation du total gagné
+            lost: Variation du total perdu
+        """
+        await db.execute(
+            """
+            INSERT INTO global_stats (guild_id, total_users, total_coins, total_games, total_won, total_lost)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (guild_id) DO UPDATE SET
+                total_users = total_users + excluded.total_users, total_coins = total_coins + excluded.total_coins,
+                total_games = total_games + excluded.total_games,
+                total_won = total_won + excluded.total_won, total_lost = total_lost + excluded.total_lost
+            """,
+            (guild_id, users, coins, games, won, lost)
+        )
+    
+    async def _record_ledger(self, db, guild_id: int, user_id: int, amount: int, balance: int, reason: str, reference: Optional[str] = None):
+        """
+        Ajoute une ligne au registre des balances, dans la transaction en cours
+        
+        Appelée par chaque écriture qui change une balance: le registre contient
+        ainsi toutes les variations (parties, /daily, /give, commandes admin...).
+        Une variation nulle n'est pas enregistrée.
+        
+        Args:
+            db: La connexion d'écriture (transaction en cours)
+            guild_id: L'économie du compte
+            user_id: L'ID Discord de l'utilisateur
+            amount: La variation de la balance
+            balance: La balance après la variation
+            reason: La cause (create, game, escrow, refund, daily, transfer, admin, reset)
+            reference: Un détail optionnel (type de jeu, clé du don...)
+        """
+        if amount == 0:
+            return
+        await db.execute(
+            "INSERT INTO ledger (guild_id, user_id, amount, balance, reason, reference, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (guild_id, user_id, amount, balance, reason, reference, int(time.time()))
+        )
+    
+    async def _update_game_stats(self, db, guild_id: int, user_id: int, game_type: str, bet_amount: int, result: int):
+        """
+        Ajoute une partie aux compteurs par jeu, dans la transaction en cours
+        
+        Met à jour les compteurs globaux du type de jeu (game_type_stats)
+        et ceux du joueur pour ce jeu (user_game_stats).
+        
+        Args:
+            db: La connexion d'écriture (transaction en cours)
+            guild_id: L'économie de la partie
+            user_id: L'ID Discord de l'utilisateur
+            game_type: Le type de jeu
+            bet_amount: Le montant parié
+            result: Le résultat (positif = gain, négatif = perte)
+        """
+        await db.execute(
+            """
+            INSERT INTO user_game_stats (guild_id, user_id, game_type, games, wagered, won, lost, biggest_win)
+            VALUES (?, ?, ?, 1, ?, ?, ?, ?)
+            ON CONFLICT (guild_id, user_id, game_type) DO UPDATE SET
+                games = games + 1, wagered = wagered + excluded.wagered,
+                won = won + excluded.won, lost = lost + excluded.lost,
+                biggest_win = MAX(biggest_win, excluded.biggest_win)
+            """,
+            (guild_id, user_id, game_type, bet_amount, max(result, 0), max(-result, 0), max(result, 0))
+        )
+        await db.execute(
+            """
+            INSERT INTO game_type_stats (guild_id, game_type, games, wagered, won, lost) VALUES (?, ?, 1, ?, ?, ?)
+            ON CONFLICT (guild_id, game_type) DO UPDATE SET
+                games = games + 1, wagered = wagered + excluded.wagered,
+                won = won + excluded.won, lost = lost + excluded.lost
+            """,
+            (guild_id, game_type, bet_amount, max(result, 0), max(-result, 0))
+        )
+    
+    async def create_user(self, user_id: int, guild_id: Optional[int] = None) -> dict:
         """
         Crée un nouvel utilisateur dans la base de données
         
         Quand quelqu'un utilise le bot pour la première fois,
         cette fonction crée son compte avec la balance de départ.
+        Si le compte existe déjà, il est renvoyé tel quel (pas d'erreur).
         
         Args:
             user_id: L'ID Discord de l'utilisateur
+            guild_id: Le serveur Discord de la commande (voir _economy)
             
         Returns:
             Un dictionnaire contenant les données du nouvel utilisateur
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                "INSERT INTO users (user_id, balance) VALUES (?, ?)",
-                (user_id, config.STARTING_BALANCE)
-            )
-            await db.commit()
+        guild_id = self._economy(guild_id)
+        
+        async def operation(db, defer):
+            row = await self._upsert_user(db, guild_id, user_id)
+            # Garde les données de l'utilisateur en cache après le commit
+            defer(self._apply_row, row)
+            return dict(row)
         
-        # Récupère et retourne les données du nouvel utilisateur
-        return await self.get_user(user_id)
+        return await self._shard(user_id).writes.submit(operation)
     
-    async def get_or_create_user(self, user_id: int) -> dict:
+    async def get_or_create_user(self, user_id: int, guild_id: Optional[int] = None) -> dict:
         """
         Récupère un utilisateur ou le crée s'il n'existe pas
         
@@ -143,18 +1004,35 @@ class DatabaseManager:
         un utilisateur valide. Si l'utilisateur existe, on le récupère.
         Sinon, on le crée automatiquement.
         
+        Les joueurs actifs sont servis par le cache. Sinon, le compte est lu sur
+        une connexion de lecture: seul un nouveau joueur passe par la file d'écriture
+        (voir create_user), pour que /balance, /stats et /rank n'attendent pas les paris.
+        
         Args:
             user_id: L'ID Discord de l'utilisateur
+            guild_id: Le serveur Discord de la commande (voir _economy)
             
         Returns:
             Un dictionnaire contenant les données de l'utilisateur
         """
-        user = await self.get_user(user_id)
-        if not user:
-            user = await self.create_user(user_id)
-        return user
+        guild_id = self._economy(guild_id)
+        user = self.cache.get(guild_id, user_id)
+        if user is not None:
+            return user
+        
+        async with self._shard(user_id).pool.reader() as db:
+            async with db.execute(
+                "SELECT * FROM users WHERE guild_id = ? AND user_id = ?", (guild_id, user_id)
+            ) as cursor:
+                row = await cursor.fetchone()
+        if row is not None:
+            user = dict(row)
+            # Une écriture pendant la lecture a mis une version plus récente en cache
+            self.cache.put_if_absent(user)
+            return user
+        return await self.create_user(user_id, guild_id)
     
-    async def update_balance(self, user_id: int, amount: int) -> int:
+    async def update_balance(self, user_id: int, amount: int, reason: str = 'admin', guild_id: Optional[int] = None) -> int:
         """
         Met à jour la balance d'un utilisateur (ajoute ou retire des coins)
         
@@ -162,28 +1040,36 @@ class DatabaseManager:
             user_id: L'ID Discord de l'utilisateur
             amount: Montant à ajouter (positif) ou retirer (négatif)
                    Exemple: +100 pour ajouter 100 coins, -50 pour retirer 50 coins
+            reason: La cause enregistrée dans le registre (par défaut: admin)
+            guild_id: Le serveur Discord de la commande (voir _economy)
             
         Returns:
             La nouvelle balance de l'utilisateur après modification
         """
-        async with aiosqlite.connect(self.db_path) as db:
+        guild_id = self._economy(guild_id)
+        
+        async def operation(db, defer):
             # UPDATE users SET balance = balance + amount
             # Si amount = +100, on ajoute 100 à la balance
             # Si amount = -50, on retire 50 de la balance
-            await db.execute(
-                "UPDATE users SET balance = balance + ? WHERE user_id = ?",
-                (amount, user_id)
-            )
-            await db.commit()
-            
-            # Récupère et retourne la nouvelle balance
+            # RETURNING * renvoie la ligne à jour, qui remplace celle du cache
+            await self._ensure_user(db, guild_id, user_id)
             async with db.execute(
-                "SELECT balance FROM users WHERE user_id = ?", (user_id,)
+                "UPDATE users SET balance = balance + ? WHERE guild_id = ? AND user_id = ? RETURNING *",
+                (amount, guild_id, user_id)
             ) as cursor:
                 row = await cursor.fetchone()
-                return row[0] if row else 0
+            if row:
+                await self._update_global_stats(db, guild_id, coins=amount)
+                await self._record_ledger(db, guild_id, user_id, amount, row['balance'], reason)
+            defer(self._apply_row, row)
+            
+            # Retourne la nouvelle balance
+            return row['balance'] if row else 0
+        
+        return await self._shard(user_id).writes.submit(operation)
     
-    async def set_balance(self, user_id: int, amount: int):
+    async def set_balance(self, user_id: int, amount: int, guild_id: Optional[int] = None):
         """
         Définit la balance d'un utilisateur à une valeur spécifique
         
@@ -194,145 +1080,1097 @@ class DatabaseManager:
         Args:
             user_id: L'ID Discord de l'utilisateur
             amount: Le nouveau montant de la balance
+            guild_id: Le serveur Discord de la commande (voir _economy)
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                "UPDATE users SET balance = ? WHERE user_id = ?",
-                (amount, user_id)
-            )
-            await db.commit()
+        guild_id = self._economy(guild_id)
+        
+        async def operation(db, defer):
+            await self._ensure_user(db, guild_id, user_id)
+            # La variation des coins en circulation dépend de l'ancienne balance
+            async with db.execute(
+                "SELECT balance FROM users WHERE guild_id = ? AND user_id = ?", (guild_id, user_id)
+            ) as cursor:
+                old_balance = (await cursor.fetchone())['balance']
+            await self._update_global_stats(db, guild_id, coins=amount - old_balance)
+            async with db.execute(
+                "UPDATE users SET balance = ? WHERE guild_id = ? AND user_id = ? RETURNING *",
+                (amount, guild_id, user_id)
+            ) as cursor:
+                row = await cursor.fetchone()
+            await self._record_ledger(db, guild_id, user_id, amount - old_balance, amount, 'admin')
+            defer(self._apply_row, row)
+        
+        await self._shard(user_id).writes.submit(operation)
     
-    async def get_balance(self, user_id: int) -> int:
+    async def get_balance(self, user_id: int, guild_id: Optional[int] = None) -> int:
         """
         Récupère la balance d'un utilisateur
         
         Args:
             user_id: L'ID Discord de l'utilisateur
+            guild_id: Le serveur Discord de la commande (voir _economy)
             
         Returns:
             La balance actuelle de l'utilisateur en coins
         """
-        user = await self.get_or_create_user(user_id)
+        user = await self.get_or_create_user(user_id, guild_id)
         return user['balance']
     
-    async def record_game(self, user_id: int, game_type: str, bet_amount: int, result: int):
+    async def settle_bet(self, user_id: int, game_type: str, bet: int, profit: int, guild_id: Optional[int] = None) -> Optional[int]:
         """
-        Enregistre une partie dans l'historique et met à jour les statistiques
+        Règle un pari en une seule transaction
+        
+        Remplace la suite get_balance → update_balance → enregistrement de la partie → get_balance
+        utilisée par les jeux. Tout est fait avec un seul commit:
+        - Vérifie que l'utilisateur a toujours assez de coins pour la mise
+        - Applique le profit (ou la perte) à la balance
+        - Met à jour total_won / total_lost / games_played
+        - Enregistre la partie dans l'historique
         
-        Cette fonction est appelée après chaque partie jouée.
-        Elle enregistre la partie dans l'historique et met à jour
-        les statistiques de l'utilisateur (total gagné/perdu, parties jouées).
+        La vérification de la balance se fait dans le UPDATE lui-même
+        (WHERE balance >= mise), donc deux paris simultanés ne peuvent pas
+        dépenser les mêmes coins.
         
         Args:
             user_id: L'ID Discord de l'utilisateur
             game_type: Le type de jeu (coinflip, dice, slots, etc.)
-            bet_amount: Le montant parié
-            result: Le résultat (positif = gain, négatif = perte)
-                   Exemple: +100 si le joueur a gagné 100 coins
-                           -50 si le joueur a perdu 50 coins
+            bet: Le montant parié
+            profit: Le gain net (positif) ou la perte (négatif)
+            guild_id: Le serveur Discord de la commande (voir _economy)
+            
+        Returns:
+            La nouvelle balance, ou None si la balance ne couvre plus la mise
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            # Enregistre la partie dans l'historique
-            await db.execute(
-                "INSERT INTO game_history (user_id, game_type, bet_amount, result) VALUES (?, ?, ?, ?)",
-                (user_id, game_type, bet_amount, result)
+        guild_id = self._economy(guild_id)
+        won = profit if profit > 0 else 0
+        lost = -profit if profit < 0 else 0
+        
+        shard = self._shard(user_id)
+        
+        async def operation(db, defer):
+            # Crée le compte s'il n'existe pas encore (sans erreur s'il existe)
+            await self._ensure_user(db, guild_id, user_id)
+            
+            async with db.execute(
+                """
+                UPDATE users
+                SET balance = balance + ?,
+                    total_won = total_won + ?,
+                    total_lost = total_lost + ?,
+                    games_played = games_played + 1
+                WHERE guild_id = ? AND user_id = ? AND balance >= ?
+                RETURNING *
+                """,
+                (profit, won, lost, guild_id, user_id, bet)
+            ) as cursor:
+                row = await cursor.fetchone()
+                
+            if row is None:
+                # Balance insuffisante: on annule (y compris la création éventuelle)
+                raise Rollback(None)
+                
+            if await self._insert_history(shard, db, guild_id, user_id, game_type, bet, profit):
+                defer(shard.history.add, guild_id, user_id, self._game_code(game_type), bet, profit)
+            await self._update_global_stats(db, guild_id, coins=profit, games=1, won=won, lost=lost)
+            await self._update_game_stats(db, guild_id, user_id, game_type, bet, profit)
+            await self._record_ledger(db, guild_id, user_id, profit, row['balance'], 'game', game_type)
+            defer(self._apply_row, row)
+            return row['balance']
+        
+        return await shard.writes.submit(operation)
+    
+    async def open_escrow(self, user_id: int, game_type: str, amount: int, guild_id: Optional[int] = None) -> Optional[dict]:
+        """
+        Bloque la mise d'une partie en plusieurs étapes (blackjack interactif, crash)
+        
+        La mise quitte la balance tout de suite, dans la même transaction que la
+        création de la ligne escrows: le joueur ne peut pas la dépenser ailleurs
+        pendant la partie. La partie est ensuite réglée par settle_escrow().
+        Si le bot s'arrête avant, la mise est remboursée au démarrage (_refund_escrows).
+        
+        Args:
+            user_id: L'ID Discord de l'utilisateur
+            game_type: Le type de jeu (blackjack, crash)
+            amount: La mise
+            guild_id: Le serveur Discord de la commande (voir _economy)
+            
+        Returns:
+            {'escrow_id', 'balance'}, ou None si la balance ne couvre pas la mise
+        """
+        guild_id = self._economy(guild_id)
+        game_code = self._game_code(game_type)
+        shard = self._shard(user_id)
+        
+        async def operation(db, defer):
+            await self._ensure_user(db, guild_id, user_id)
+            
+            async with db.execute(
+                "UPDATE users SET balance = balance - ? WHERE guild_id = ? AND user_id = ? AND balance >= ? RETURNING *",
+                (amount, guild_id, user_id, amount)
+            ) as cursor:
+                row = await cursor.fetchone()
+            if row is None:
+                raise Rollback(None)
+                
+            cursor = await db.execute(
+                "INSERT INTO escrows (guild_id, user_id, game_code, amount, created_at) VALUES (?, ?, ?, ?, ?)",
+                (guild_id, user_id, game_code, amount, int(time.time() * 1000))
             )
+            await self._update_global_stats(db, guild_id, coins=-amount)
+            await self._record_ledger(db, guild_id, user_id, -amount, row['balance'], 'escrow', game_type)
+            defer(self._apply_row, row)
+            return {'escrow_id': cursor.lastrowid, 'balance': row['balance']}
+        
+        return await shard.writes.submit(operation)
+    
+    async def add_to_escrow(self, escrow_id: int, user_id: int, amount: int, guild_id: Optional[int] = None) -> Optional[int]:
+        """
+        Ajoute des coins à une mise bloquée (doublement ou split au blackjack)
+        
+        Args:
+            escrow_id: La mise bloquée (voir open_escrow)
+            user_id: L'ID Discord de l'utilisateur
+            amount: Le montant ajouté
+            guild_id: Le serveur Discord de la commande (voir _economy)
             
-            # Met à jour les statistiques de l'utilisateur
-            if result > 0:
-                # Le joueur a gagné: on ajoute au total_won
-                await db.execute(
-                    "UPDATE users SET total_won = total_won + ?, games_played = games_played + 1 WHERE user_id = ?",
-                    (result, user_id)
-                )
+        Returns:
+            La nouvelle balance, ou None si la balance ne couvre pas le montant
+            (ou si la mise n'existe plus)
+        """
+        guild_id = self._economy(guild_id)
+        shard = self._shard(user_id)
+        
+        async def operation(db, defer):
+            async with db.execute(
+                "UPDATE escrows SET amount = amount + ? WHERE id = ? AND guild_id = ? AND user_id = ? "
+                "RETURNING (SELECT name FROM game_types WHERE game_types.id = game_code) AS game_type",
+                (amount, escrow_id, guild_id, user_id)
+            ) as cursor:
+                escrow = await cursor.fetchone()
+            async with db.execute(
+                "UPDATE users SET balance = balance - ? WHERE guild_id = ? AND user_id = ? AND balance >= ? RETURNING *",
+                (amount, guild_id, user_id, amount)
+            ) as cursor:
+                row = await cursor.fetchone()
+            if escrow is None or row is None:
+                raise Rollback(None)
+                
+            await self._update_global_stats(db, guild_id, coins=-amount)
+            await self._record_ledger(db, guild_id, user_id, -amount, row['balance'], 'escrow', escrow['game_type'])
+            defer(self._apply_row, row)
+            return row['balance']
+        
+        return await shard.writes.submit(operation)
+    
+    async def settle_escrow(self, escrow_id: int, user_id: int, game_type: str, payout: int, guild_id: Optional[int] = None) -> Optional[int]:
+        """
+        Règle une partie dont la mise est bloquée, en une seule transaction
+        
+        Supprime la mise bloquée, verse le paiement (mise comprise, 0 si la partie
+        est perdue) et enregistre la partie comme settle_bet: la mise de la partie
+        est le total bloqué, le profit est paiement - mise.
+        
+        Args:
+            escrow_id: La mise bloquée (voir open_escrow)
+            user_id: L'ID Discord de l'utilisateur
+            game_type: Le type de jeu (blackjack)
+            payout: Les coins rendus au joueur
+            guild_id: Le serveur Discord de la commande (voir _economy)
+            
+        Returns:
+            La nouvelle balance, ou None si la mise n'existe plus (déjà réglée,
+            ou supprimée par /resetuser)
+        """
+        guild_id = self._economy(guild_id)
+        shard = self._shard(user_id)
+        
+        async def operation(db, defer):
+            return await self._settle_escrow(shard, db, defer, guild_id, escrow_id, user_id, game_type, payout)
+        
+        # La mise est déjà bloquée: le règlement attend une place dans la file plutôt que d'être refusé
+        return await shard.writes.submit(operation, wait=True)
+    
+    async def settle_escrows(self, game_type: str, settlements: List[Tuple[int, int, int]], guild_id: Optional[int] = None) -> Dict[int, Optional[int]]:
+        """
+        Règle d'un coup toutes les mises bloquées d'une partie à plusieurs joueurs (crash)
+        
+        Les joueurs de chaque shard sont réglés dans une seule opération de la file
+        d'écriture (une transaction, un commit), quel que soit leur nombre; les shards
+        sont réglés en parallèle.
+        
+        Les mises sont déjà bloquées et des joueurs ont pu retirer leurs gains: le règlement
+        ne doit pas être perdu (au démarrage, _refund_escrows ne rendrait que les mises).
+        Il attend donc une place dans la file au lieu d'échouer avec DatabaseBusy, et la
+        transaction d'un shard est retentée jusqu'à ce qu'elle soit validée. C'est sans
+        risque: une mise déjà réglée n'existe plus et n'est pas payée deux fois.
+        
+        Args:
+            game_type: Le type de jeu (crash)
+            settlements: (escrow_id, user_id, paiement) pour chaque joueur
+            guild_id: Le serveur Discord de la partie (voir _economy)
+            
+        Returns:
+            {user_id: nouvelle balance, ou None si la mise n'existe plus}
+        """
+        guild_id = self._economy(guild_id)
+        by_shard = defaultdict(list)
+        for settlement in settlements:
+            by_shard[self._shard(settlement[1])].append(settlement)
+            
+        async def settle(shard: Shard, rows: List[Tuple[int, int, int]]) -> Dict[int, Optional[int]]:
+            async def operation(db, defer):
+                return {
+                    user_id: await self._settle_escrow(shard, db, defer, guild_id, escrow_id, user_id, game_type, payout)
+                    for escrow_id, user_id, payout in rows
+                }
+            
+            return await self._submit_until_committed(shard, operation, f"Settlement of {len(rows)} {game_type} bet(s)")
+        
+        balances = {}
+        for result in await asyncio.gather(*(settle(shard, rows) for shard, rows in by_shard.items())):
+            balances.update(result)
+        return balances
+    
+    async def cancel_escrows(self, game_type: str, escrows: List[Tuple[int, int]], guild_id: Optional[int] = None) -> Dict[int, Optional[int]]:
+        """
+        Annule une partie à plusieurs joueurs (crash dont le message n'a pas pu être envoyé)
+        
+        Chaque mise bloquée est rendue à son joueur comme au démarrage (voir _refund_escrows):
+        ligne 'refund' du registre, la partie n'est pas comptée. Comme settle_escrows, une
+        opération par shard, retentée jusqu'à ce qu'elle soit validée.
+        
+        Args:
+            game_type: Le type de jeu (crash)
+            escrows: (escrow_id, user_id) pour chaque joueur
+            guild_id: Le serveur Discord de la partie (voir _economy)
+            
+        Returns:
+            {user_id: nouvelle balance, ou None si la mise n'existe plus}
+        """
+        guild_id = self._economy(guild_id)
+        by_shard = defaultdict(list)
+        for escrow in escrows:
+            by_shard[self._shard(escrow[1])].append(escrow)
+            
+        async def cancel(shard: Shard, rows: List[Tuple[int, int]]) -> Dict[int, Optional[int]]:
+            async def operation(db, defer):
+                balances = {}
+                for escrow_id, user_id in rows:
+                    async with db.execute(
+                        "DELETE FROM escrows WHERE id = ? AND guild_id = ? AND user_id = ? RETURNING amount",
+                        (escrow_id, guild_id, user_id)
+                    ) as cursor:
+                        escrow = await cursor.fetchone()
+                    balances[user_id] = None
+                    if escrow is not None:
+                        row = await self._refund_escrow(db, defer, guild_id, user_id, escrow['amount'], game_type)
+                        balances[user_id] = row['balance']
+                return balances
+            
+            return await self._submit_until_committed(shard, operation, f"Refund of {len(rows)} {game_type} bet(s)")
+        
+        balances = {}
+        for result in await asyncio.gather(*(cancel(shard, rows) for shard, rows in by_shard.items())):
+            balances.update(result)
+        return balances
+    
+    async def _submit_until_committed(self, shard: Shard, operation, description: str):
+        """
+        Soumet une opération sur des mises déjà bloquées et la retente jusqu'à ce qu'elle soit validée
+        
+        Elle attend une place dans la file au lieu d'échouer avec DatabaseBusy, puis chaque
+        échec est retenté après un délai qui double (au plus ESCROW_RETRY_MAX_DELAY secondes).
+        """
+        delay = 1
+        while True:
+            try:
+                return await shard.writes.submit(operation, wait=True)
+            except Exception as e:
+                print(f"❌ {description} failed on shard {shard.index}, retrying in {delay}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, ESCROW_RETRY_MAX_DELAY)
+    
+    async def _refund_escrow(self, db, defer, guild_id: int, user_id: int, amount: int, game_type: str):
+        """Rend une mise bloquée (déjà supprimée de escrows) dans la transaction en cours"""
+        async with db.execute(
+            "UPDATE users SET balance = balance + ? WHERE guild_id = ? AND user_id = ? RETURNING *",
+            (amount, guild_id, user_id)
+        ) as cursor:
+            row = await cursor.fetchone()
+        await self._update_global_stats(db, guild_id, coins=amount)
+        await self._record_ledger(db, guild_id, user_id, amount, row['balance'], 'refund', game_type)
+        defer(self._apply_row, row)
+        return row
+    
+    async def _settle_escrow(self, shard: Shard, db, defer, guild_id: int, escrow_id: int, user_id: int, game_type: str, payout: int) -> Optional[int]:
+        """
+        Règle une mise bloquée dans la transaction en cours (voir settle_escrow)
+        
+        Returns:
+            La nouvelle balance, ou None si la mise n'existe plus (rien n'est écrit)
+        """
+        async with db.execute(
+            "DELETE FROM escrows WHERE id = ? AND guild_id = ? AND user_id = ? RETURNING amount",
+            (escrow_id, guild_id, user_id)
+        ) as cursor:
+            escrow = await cursor.fetchone()
+        if escrow is None:
+            return None
+            
+        bet = escrow['amount']
+        profit = payout - bet
+        won = profit if profit > 0 else 0
+        lost = -profit if profit < 0 else 0
+        async with db.execute(
+            """
+            UPDATE users
+            SET balance = balance + ?,
+                total_won = total_won + ?,
+                total_lost = total_lost + ?,
+                games_played = games_played + 1
+            WHERE guild_id = ? AND user_id = ?
+            RETURNING *
+            """,
+            (payout, won, lost, guild_id, user_id)
+        ) as cursor:
+            row = await cursor.fetchone()
+            
+        if await self._insert_history(shard, db, guild_id, user_id, game_type, bet, profit):
+            defer(shard.history.add, guild_id, user_id, self._game_code(game_type), bet, profit)
+        await self._update_global_stats(db, guild_id, coins=payout, games=1, won=won, lost=lost)
+        await self._update_game_stats(db, guild_id, user_id, game_type, bet, profit)
+        await self._record_ledger(db, guild_id, user_id, payout, row['balance'], 'game', game_type)
+        defer(self._apply_row, row)
+        return row['balance']
+    
+    async def transfer(self, from_id: int, to_id: int, amount: int, guild_id: Optional[int] = None) -> Optional[dict]:
+        """
+        Transfère des coins d'un utilisateur à un autre
+        
+        Le débit vérifie la balance dans le UPDATE lui-même (WHERE balance >= montant):
+        deux dons simultanés ne peuvent pas dépenser les mêmes coins.
+        
+        Si les deux joueurs sont dans le même shard, le débit, le crédit et l'écriture
+        dans le registre transfers sont faits avec un seul commit.
+        Sinon le don se fait en deux phases:
+        1. Shard du donneur: débit + ligne transfers 'pending' (un commit)
+        2. Shard du receveur: crédit + ligne transfers avec la même clé (un commit),
+           puis la ligne du donneur passe à 'done'
+        Si le bot s'arrête entre les deux, initialize() termine le don au redémarrage
+        (voir _recover_transfers): un don débité est toujours crédité, une seule fois.
+        Seule la phase 1 peut échouer avec DatabaseBusy (file pleine): une fois le débit
+        validé, la phase 2 attend une place dans la file du receveur.
+        
+        Args:
+            from_id: L'ID Discord de celui qui donne
+            to_id: L'ID Discord de celui qui reçoit
+            amount: Le montant à transférer (positif)
+            guild_id: Le serveur Discord de la commande (voir _economy)
+            
+        Returns:
+            Un dictionnaire {'transfer_id', 'from_balance', 'to_balance'},
+            ou None si la balance du donneur ne couvre pas le montant
+        """
+        guild_id = self._economy(guild_id)
+        giver_shard = self._shard(from_id)
+        same_shard = giver_shard is self._shard(to_id)
+        transfer_key = uuid.uuid4().hex
+        now = int(time.time())
+        
+        async def debit(db, defer):
+            await self._ensure_user(db, guild_id, from_id)
+            if same_shard:
+                await self._ensure_user(db, guild_id, to_id)
+            
+            async with db.execute(
+                "UPDATE users SET balance = balance - ? WHERE guild_id = ? AND user_id = ? AND balance >= ? RETURNING *",
+                (amount, guild_id, from_id, amount)
+            ) as cursor:
+                giver = await cursor.fetchone()
+            
+            if giver is None:
+                # Balance insuffisante: on annule (y compris la création éventuelle des comptes)
+                raise Rollback(None)
+            
+            receiver = None
+            if same_shard:
+                async with db.execute(
+                    "UPDATE users SET balance = balance + ? WHERE guild_id = ? AND user_id = ? RETURNING *",
+                    (amount, guild_id, to_id)
+                ) as cursor:
+                    receiver = await cursor.fetchone()
+                await self._record_ledger(db, guild_id, to_id, amount, receiver['balance'], 'transfer', transfer_key)
+                defer(self._apply_row, receiver)
             else:
-                # Le joueur a perdu: on ajoute au total_lost
-                # abs() pour convertir le nombre négatif en positif
-                await db.execute(
-                    "UPDATE users SET total_lost = total_lost + ?, games_played = games_played + 1 WHERE user_id = ?",
-                    (abs(result), user_id)
-                )
+                # Les coins quittent ce shard (ils arriveront dans celui du receveur)
+                await self._update_global_stats(db, guild_id, coins=-amount)
             
-            await db.commit()
+            cursor = await db.execute(
+                "INSERT INTO transfers (guild_id, from_user_id, to_user_id, amount, timestamp, transfer_key, status) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (guild_id, from_id, to_id, amount, now, transfer_key, 'done' if same_shard else 'pending')
+            )
+            await self._record_ledger(db, guild_id, from_id, -amount, giver['balance'], 'transfer', transfer_key)
+            defer(self._apply_row, giver)
+            
+            return {
+                'transfer_id': cursor.lastrowid,
+                'from_balance': giver['balance'],
+                'to_balance': receiver['balance'] if receiver else None
+            }
+        
+        result = await giver_shard.writes.submit(debit)
+        if result is not None and not same_shard:
+            result['to_balance'] = await self._complete_transfer(transfer_key, from_id, to_id, amount, now, guild_id)
+        return result
     
-    async def can_claim_daily(self, user_id: int) -> bool:
+    async def _complete_transfer(self, transfer_key: str, from_id: int, to_id: int, amount: int, timestamp: int, guild_id: int) -> int:
         """
-        Vérifie si un utilisateur peut réclamer sa récompense quotidienne
+        Deuxième phase d'un don entre deux shards: crédite le receveur puis clôt le don
         
-        La récompense quotidienne peut être réclamée une fois toutes les 24 heures.
+        Le crédit est idempotent: si la clé du don existe déjà dans le shard
+        du receveur, il a déjà été crédité et rien n'est refait.
+        
+        Returns:
+            La balance du receveur
+        """
+        async def credit(db, defer):
+            async with db.execute("SELECT 1 FROM transfers WHERE transfer_key = ?", (transfer_key,)) as cursor:
+                already_credited = await cursor.fetchone()
+            if already_credited:
+                async with db.execute(
+                    "SELECT balance FROM users WHERE guild_id = ? AND user_id = ?", (guild_id, to_id)
+                ) as cursor:
+                    return (await cursor.fetchone())['balance']
+            
+            await self._ensure_user(db, guild_id, to_id)
+            async with db.execute(
+                "UPDATE users SET balance = balance + ? WHERE guild_id = ? AND user_id = ? RETURNING *",
+                (amount, guild_id, to_id)
+            ) as cursor:
+                receiver = await cursor.fetchone()
+            await db.execute(
+                "INSERT INTO transfers (guild_id, from_user_id, to_user_id, amount, timestamp, transfer_key, status) "
+                "VALUES (?, ?, ?, ?, ?, ?, 'done')",
+                (guild_id, from_id, to_id, amount, timestamp, transfer_key)
+            )
+            await self._update_global_stats(db, guild_id, coins=amount)
+            await self._record_ledger(db, guild_id, to_id, amount, receiver['balance'], 'transfer', transfer_key)
+            defer(self._apply_row, receiver)
+            return receiver['balance']
+        
+        async def close_transfer(db, defer):
+            await db.execute("UPDATE transfers SET status = 'done' WHERE transfer_key = ?", (transfer_key,))
+        
+        # Le débit est déjà validé: ces deux écritures attendent une place dans la file
+        # au lieu d'échouer avec DatabaseBusy (le donneur serait débité sans que le don aboutisse)
+        balance = await self._shard(to_id).writes.submit(credit, wait=True)
+        await self._shard(from_id).writes.submit(close_transfer, wait=True)
+        return balance
+    
+    async def _recover_transfers(self):
+        """
+        Termine les dons entre shards restés 'pending' (bot arrêté entre les deux phases)
+        
+        Appelée par initialize(), une fois les files d'écriture lancées.
+        """
+        recovered = 0
+        for shard in self.shards:
+            async with shard.pool.reader() as db:
+                async with db.execute(
+                    "SELECT transfer_key, from_user_id, to_user_id, amount, timestamp, guild_id FROM transfers "
+                    "WHERE status = 'pending'"
+                ) as cursor:
+                    pending = await cursor.fetchall()
+            for row in pending:
+                await self._complete_transfer(*row)
+                recovered += 1
+        if recovered:
+            print(f"✅ Recovered {recovered} pending transfer(s)")
+    
+    async def _refund_escrows(self):
+        """
+        Rembourse les mises bloquées des parties interrompues par un arrêt du bot
+        
+        Les parties en cours (blackjack interactif) ne vivent qu'en mémoire: après un
+        redémarrage, personne ne peut plus les terminer. Chaque mise bloquée est rendue
+        à son joueur (ligne 'refund' du registre) et la partie n'est pas comptée.
+        Appelée par initialize(), une fois les files d'écriture lancées.
+        """
+        refunded = 0
+        for shard in self.shards:
+            async def operation(db, defer):
+                async with db.execute(
+                    "DELETE FROM escrows "
+                    "RETURNING guild_id, user_id, amount, (SELECT name FROM game_types WHERE game_types.id = game_code)"
+                ) as cursor:
+                    escrows = await cursor.fetchall()
+                for guild_id, user_id, amount, game_type in escrows:
+                    await self._refund_escrow(db, defer, guild_id, user_id, amount, game_type)
+                return len(escrows)
+            
+            refunded += await shard.writes.submit(operation)
+        if refunded:
+            print(f"✅ Refunded {refunded} open bet(s)")
+    
+    async def reset_user(self, user_id: int, guild_id: Optional[int] = None) -> dict:
+        """
+        Réinitialise complètement un utilisateur
+        
+        Remet la balance de départ, efface les statistiques et la date du dernier /daily,
+        et supprime tout son historique de parties (les archives compressées ne sont pas modifiées). Utilisée par la commande admin /resetuser.
         
         Args:
             user_id: L'ID Discord de l'utilisateur
+            guild_id: Le serveur Discord de la commande (voir _economy)
             
         Returns:
-            True si l'utilisateur peut réclamer, False sinon
+            La ligne de l'utilisateur après réinitialisation
         """
-        user = await self.get_or_create_user(user_id)
+        guild_id = self._economy(guild_id)
+        shard = self._shard(user_id)
         
-        # Si l'utilisateur n'a jamais réclamé, il peut réclamer
-        if not user['last_daily']:
-            return True
-        
-        # Convertit la date de la dernière réclamation en objet datetime
-        last_daily = datetime.fromisoformat(user['last_daily'])
-        now = datetime.now()
+        async def operation(db, defer):
+            await self._ensure_user(db, guild_id, user_id)
+            
+            # Retire la contribution de l'utilisateur aux compteurs globaux
+            async with db.execute(
+                "SELECT balance, total_won, total_lost FROM users WHERE guild_id = ? AND user_id = ?", (guild_id, user_id)
+            ) as cursor:
+                old = await cursor.fetchone()
+            async with db.execute(
+                "SELECT game_type, games, wagered, won, lost FROM user_game_stats WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id)
+            ) as cursor:
+                per_game = await cursor.fetchall()
+            await self._update_global_stats(
+                db,
+                guild_id,
+                coins=config.STARTING_BALANCE - old['balance'],
+                games=-sum(row[1] for row in per_game),
+                won=-old['total_won'],
+                lost=-old['total_lost']
+            )
+            await db.executemany(
+                "UPDATE game_type_stats SET games = games - ?, wagered = wagered - ?, won = won - ?, lost = lost - ? "
+                "WHERE guild_id = ? AND game_type = ?",
+                [(games, wagered, won, lost, guild_id, game_type) for game_type, games, wagered, won, lost in per_game]
+            )
+            
+            async with db.execute(
+                """
+                UPDATE users
+                SET balance = ?, total_won = 0, total_lost = 0, games_played = 0, last_daily = NULL
+                WHERE guild_id = ? AND user_id = ?
+                RETURNING *
+                """,
+                (config.STARTING_BALANCE, guild_id, user_id)
+            ) as cursor:
+                row = await cursor.fetchone()
+            await db.execute(
+                "DELETE FROM game_history WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id)
+            )
+            await db.execute(
+                "DELETE FROM game_history_daily WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id)
+            )
+            await db.execute(
+                "DELETE FROM user_game_stats WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id)
+            )
+            # Une partie en cours ne pourra plus être réglée (settle_escrow renvoie None)
+            await db.execute(
+                "DELETE FROM escrows WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id)
+            )
+            # Le registre n'est jamais effacé: la remise à zéro y est une ligne de plus
+            await self._record_ledger(db, guild_id, user_id, config.STARTING_BALANCE - old['balance'], row['balance'], 'reset')
+            defer(self._apply_row, row)
+            # Les parties encore dans le tampon d'historique ne doivent pas survivre au DELETE.
+            # Appelé après le commit, dans l'ordre du lot: les parties réglées avant la
+            # remise à zéro (même dans ce lot) sont déjà dans le tampon et sont oubliées,
+            # celles réglées après sont gardées.
+            if shard.history:
+                defer(shard.history.discard, guild_id, user_id)
+            return dict(row)
         
-        # Vérifie si 24 heures se sont écoulées
-        return (now - last_daily) >= timedelta(hours=24)
+        return await shard.writes.submit(operation)
     
-    async def claim_daily(self, user_id: int) -> int:
+    async def claim_daily(self, user_id: int, guild_id: Optional[int] = None) -> dict:
         """
         Réclame la récompense quotidienne pour un utilisateur
         
-        Ajoute la récompense quotidienne à la balance et met à jour
-        la date de la dernière réclamation.
+        La vérification du délai de 24 heures et le versement se font dans un seul
+        UPDATE conditionnel: deux clics rapides ne peuvent pas réclamer deux fois,
+        et la commande /daily n'a besoin que de cet appel.
         
         Args:
             user_id: L'ID Discord de l'utilisateur
+            guild_id: Le serveur Discord de la commande (voir _economy)
             
         Returns:
-            Le montant de la récompense reçue
+            Un dictionnaire {'claimed', 'reward', 'balance', 'next_claim'}
+            - claimed: True si la récompense a été versée
+            - reward: Le montant versé (0 si pas réclamée)
+            - balance: La balance après l'opération
+            - next_claim: Timestamp epoch à partir duquel on pourra réclamer à nouveau
+        """
+        guild_id = self._economy(guild_id)
+        now = int(time.time())
+        
+        async def operation(db, defer):
+            await self._ensure_user(db, guild_id, user_id)
+            async with db.execute(
+                """
+                UPDATE users SET balance = balance + ?, last_daily = ?
+                WHERE guild_id = ? AND user_id = ? AND (last_daily IS NULL OR last_daily <= ?)
+                RETURNING *
+                """,
+                (config.DAILY_REWARD, now, guild_id, user_id, now - config.DAILY_COOLDOWN)
+            ) as cursor:
+                row = await cursor.fetchone()
+            
+            if row is None:
+                # Déjà réclamée: on lit la date de la dernière réclamation sur la même connexion
+                async with db.execute(
+                    "SELECT * FROM users WHERE guild_id = ? AND user_id = ?", (guild_id, user_id)
+                ) as cursor:
+                    row = await cursor.fetchone()
+                defer(self._apply_row, row)
+                return {
+                    'claimed': False,
+                    'reward': 0,
+                    'balance': row['balance'],
+                    'next_claim': row['last_daily'] + config.DAILY_COOLDOWN
+                }
+            
+            await self._update_global_stats(db, guild_id, coins=config.DAILY_REWARD)
+            await self._record_ledger(db, guild_id, user_id, config.DAILY_REWARD, row['balance'], 'daily')
+            defer(self._apply_row, row)
+            return {
+                'claimed': True,
+                'reward': config.DAILY_REWARD,
+                'balance': row['balance'],
+                'next_claim': now + config.DAILY_COOLDOWN
+            }
+        
+        return await self._shard(user_id).writes.submit(operation)
+    
+    async def snapshot_balances(self):
         """
-        async with aiosqlite.connect(self.db_path) as db:
+        Prend un instantané des balances de chaque shard
+        
+        L'instantané retient la dernière ligne du registre qu'il inclut: au démarrage,
+        seules les lignes écrites après lui sont relues (voir _verify_ledger).
+        Seuls les LEDGER_SNAPSHOTS_KEPT derniers instantanés sont gardés.
+        Le registre lui-même n'est jamais modifié.
+        """
+        async def operation(db, defer):
+            async with db.execute("SELECT COALESCE(MAX(id), 0) FROM ledger") as cursor:
+                ledger_id = (await cursor.fetchone())[0]
+            async with db.execute("SELECT id, ledger_id FROM ledger_snapshots ORDER BY id DESC LIMIT 1") as cursor:
+                latest = await cursor.fetchone()
+            previous_id, previous_ledger_id = tuple(latest) if latest else (0, 0)
+            if latest and previous_ledger_id == ledger_id:
+                # Rien n'a changé depuis le dernier instantané
+                return
+            
+            cursor = await db.execute(
+                "INSERT INTO ledger_snapshots (ledger_id, timestamp) VALUES (?, ?)",
+                (ledger_id, int(time.time()))
+            )
+            # Calculé à partir du registre (instantané précédent + nouvelles lignes),
+            # jamais copié depuis users: une balance modifiée à la main n'y entre pas
+            await db.execute(
+                """
+                INSERT INTO snapshot_balances (snapshot_id, guild_id, user_id, balance)
+                SELECT ?, guild_id, user_id, SUM(amount) FROM (
+                    SELECT guild_id, user_id, balance AS amount FROM snapshot_balances WHERE snapshot_id = ?
+                    UNION ALL
+                    SELECT guild_id, user_id, amount FROM ledger WHERE id > ? AND id <= ?
+                )
+                GROUP BY guild_id, user_id
+                """,
+                (cursor.lastrowid, previous_id, previous_ledger_id, ledger_id)
+            )
+            
+            # Supprime les instantanés les plus anciens
             await db.execute(
-                "UPDATE users SET balance = balance + ?, last_daily = ? WHERE user_id = ?",
-                (config.DAILY_REWARD, datetime.now().isoformat(), user_id)
+                "DELETE FROM snapshot_balances WHERE snapshot_id <= ?",
+                (cursor.lastrowid - config.LEDGER_SNAPSHOTS_KEPT,)
+            )
+            await db.execute(
+                "DELETE FROM ledger_snapshots WHERE id <= ?",
+                (cursor.lastrowid - config.LEDGER_SNAPSHOTS_KEPT,)
             )
-            await db.commit()
         
-        return config.DAILY_REWARD
+        for shard in self.shards:
+            await shard.writes.submit(operation)
     
-    async def get_leaderboard(self, limit: int = 10) -> List[Tuple]:
+    async def _snapshot_loop(self):
+        """Boucle de fond: un instantané des balances toutes les LEDGER_SNAPSHOT_INTERVAL secondes"""
+        while True:
+            await asyncio.sleep(config.LEDGER_SNAPSHOT_INTERVAL)
+            try:
+                await self.snapshot_balances()
+            except Exception as e:
+                print(f"❌ Failed to snapshot balances: {e}")
+    
+    async def prune_history(self, retention_days: int = config.HISTORY_RETENTION_DAYS) -> int:
         """
-        Récupère le classement des joueurs les plus riches
+        Archive puis supprime les parties plus vieilles que retention_days jours
+        
+        Pour chaque shard, par lots de HISTORY_RETENTION_CHUNK parties (un lot = une transaction
+        de la file d'écriture, les paris ne sont jamais bloqués longtemps):
+        1. Les parties du lot sont ajoutées aux résumés quotidiens (game_history_daily)
+        2. Elles sont écrites dans les archives compressées (voir database/history_archive.py),
+           synchronisées sur le disque AVANT le commit: une partie supprimée est toujours archivée
+        3. Elles sont supprimées de game_history
+        Puis les pages libérées sont rendues au disque (PRAGMA incremental_vacuum).
+        
+        Seuls des jours complets sont traités: la limite est arrondie à minuit UTC.
+        Les compteurs (global_stats, game_type_stats, user_game_stats) ne changent pas,
+        et rebuild_stats() tient compte des résumés: les statistiques restent exactes.
+        
+        Args:
+            retention_days: Nombre de jours de parties gardés dans game_history
+            
+        Returns:
+            Le nombre de parties archivées
+        """
+        cutoff = (int(time.time() * 1000) - retention_days * DAY_MS) // DAY_MS * DAY_MS
+        await self.flush_history()
+        
+        archived = 0
+        for shard in self.shards:
+            while True:
+                moved = await shard.writes.submit(self._prune_chunk(shard, cutoff))
+                archived += moved
+                if moved < config.HISTORY_RETENTION_CHUNK:
+                    break
+            await self._incremental_vacuum(shard)
+        return archived
+    
+    def _prune_chunk(self, shard: Shard, cutoff: int):
+        """
+        Prépare l'opération d'écriture qui archive un lot de vieilles parties d'un shard
+        
+        Le lot est défini par le plus grand id des HISTORY_RETENTION_CHUNK premières
+        parties avant la limite: les trois étapes travaillent ainsi sur les mêmes lignes.
+        
+        Args:
+            shard: Le shard à traiter
+            cutoff: Les parties avant ce timestamp (epoch en millisecondes) sont archivées
+            
+        Returns:
+            L'opération, qui renvoie le nombre de parties archivées
+        """
+        async def operation(db, defer):
+            async with db.execute(
+                "SELECT MAX(id), COUNT(*) FROM ("
+                "SELECT id FROM game_history WHERE timestamp < ? ORDER BY id LIMIT ?"
+                ")",
+                (cutoff, config.HISTORY_RETENTION_CHUNK)
+            ) as cursor:
+                last_id, count = await cursor.fetchone()
+            if not count:
+                return 0
+            
+            await db.execute(
+                """
+                INSERT INTO game_history_daily (guild_id, user_id, game_code, day, games, wagered, won, lost, biggest_win)
+                SELECT guild_id, user_id, game_code, timestamp / ? * ?, COUNT(*), SUM(bet_amount),
+                       SUM(MAX(result, 0)), SUM(MAX(-result, 0)), MAX(MAX(result, 0))
+                FROM game_history
+                WHERE id <= ? AND timestamp < ?
+                GROUP BY guild_id, user_id, game_code, timestamp / ?
+                ON CONFLICT (guild_id, user_id, game_code, day) DO UPDATE SET
+                    games = games + excluded.games, wagered = wagered + excluded.wagered,
+                    won = won + excluded.won, lost = lost + excluded.lost,
+                    biggest_win = MAX(biggest_win, excluded.biggest_win)
+                """,
+                (DAY_MS, DAY_MS, last_id, cutoff, DAY_MS)
+            )
+            
+            async with db.execute(
+                """
+                SELECT history.id, history.guild_id, history.user_id, game_types.name AS game_type,
+                       history.bet_amount, history.result, history.timestamp
+                FROM game_history AS history
+                JOIN game_types ON game_types.id = history.game_code
+                WHERE history.id <= ? AND history.timestamp < ?
+                ORDER BY history.id
+                """,
+                (last_id, cutoff)
+            ) as cursor:
+                rows = [dict(row) for row in await cursor.fetchall()]
+            # Écriture de fichier bloquante: faite dans un thread pour ne pas figer le bot
+            await asyncio.to_thread(write_archive, config.HISTORY_ARCHIVE_DIR, shard.db_path, rows)
+            
+            await db.execute("DELETE FROM game_history WHERE id <= ? AND timestamp < ?", (last_id, cutoff))
+            return count
+        
+        return operation
+    
+    async def _incremental_vacuum(self, shard: Shard):
+        """
+        Rend au disque les pages libérées d'un shard, par étapes de VACUUM_STEP_PAGES pages
+        
+        Utilise directement la connexion d'écriture (en dehors de toute transaction),
+        en la rendant entre deux étapes pour laisser passer les paris.
+        """
+        while True:
+            async with shard.pool.writer() as db:
+                async with db.execute("PRAGMA freelist_count") as cursor:
+                    free_pages = (await cursor.fetchone())[0]
+                if free_pages == 0:
+                    return
+                # executescript: avec execute(), sqlite3 ne libère qu'une page par appel
+                await db.executescript(f"PRAGMA incremental_vacuum({min(free_pages, VACUUM_STEP_PAGES)})")
+                async with db.execute("PRAGMA freelist_count") as cursor:
+                    if (await cursor.fetchone())[0] >= free_pages:
+                        # Base sans auto_vacuum incrémental: rien ne peut être rendu
+                        return
+    
+    async def _retention_loop(self):
+        """Boucle de fond: archive les vieilles parties toutes les HISTORY_RETENTION_INTERVAL secondes"""
+        while True:
+            await asyncio.sleep(config.HISTORY_RETENTION_INTERVAL)
+            try:
+                archived = await self.prune_history()
+                if archived:
+                    print(f"✅ Archived {archived:,} game(s) older than {config.HISTORY_RETENTION_DAYS} day(s)")
+            except Exception as e:
+                print(f"❌ Failed to prune game history: {e}")
+    
+    async def get_ledger(self, user_id: int, limit: int = 10, guild_id: Optional[int] = None) -> List[dict]:
+        """
+        Récupère les dernières lignes du registre d'un utilisateur
+        
+        Args:
+            user_id: L'ID Discord de l'utilisateur
+            limit: Nombre de lignes à récupérer (par défaut: 10)
+            guild_id: Le serveur Discord de la commande (voir _economy)
+            
+        Returns:
+            Une liste de dictionnaires {'amount', 'balance', 'reason', 'reference', 'timestamp'},
+            de la plus récente à la plus ancienne
+        """
+        guild_id = self._economy(guild_id)
+        async with self._shard(user_id).pool.reader() as db:
+            async with db.execute(
+                "SELECT amount, balance, reason, reference, timestamp FROM ledger "
+                "WHERE guild_id = ? AND user_id = ? ORDER BY id DESC LIMIT ?",
+                (guild_id, user_id, limit)
+            ) as cursor:
+                return [dict(row) for row in await cursor.fetchall()]
+    
+    async def get_global_stats(self, guild_id: Optional[int] = None) -> dict:
+        """
+        Récupère les statistiques globales d'une économie
+        
+        Lit les compteurs tenus à jour à chaque écriture (tables global_stats
+        et game_type_stats) au lieu de parcourir users et game_history.
+        Seules les lignes de l'économie demandée sont lues (clé primaire),
+        quel que soit le nombre de serveurs ou de joueurs.
+        Chaque shard a ses propres compteurs: on additionne ceux de tous les shards.
+        
+        Args:
+            guild_id: Le serveur Discord de la commande (voir _economy)
+            
+        Returns:
+            Un dictionnaire {'total_users', 'total_coins', 'total_games', 'total_won',
+            'total_lost', 'most_popular'} où most_popular est un tuple
+            (game_type, nombre de parties) ou None
+        """
+        guild_id = self._economy(guild_id)
+        stats = dict.fromkeys(('total_users', 'total_coins', 'total_games', 'total_won', 'total_lost'), 0)
+        games_by_type = defaultdict(int)
+        for shard in self.shards:
+            async with shard.pool.reader() as db:
+                async with db.execute(
+                    "SELECT total_users, total_coins, total_games, total_won, total_lost FROM global_stats "
+                    "WHERE guild_id = ?",
+                    (guild_id,)
+                ) as cursor:
+                    row = await cursor.fetchone()
+                async with db.execute(
+                    "SELECT game_type, games FROM game_type_stats WHERE guild_id = ? AND games > 0", (guild_id,)
+                ) as cursor:
+                    game_rows = await cursor.fetchall()
+            # Pas de ligne: aucun joueur de cette économie dans ce shard
+            if row is not None:
+                for key in row.keys():
+                    stats[key] += row[key]
+            for game_type, games in game_rows:
+                games_by_type[game_type] += games
+        
+        stats['most_popular'] = max(games_by_type.items(), key=lambda item: item[1], default=None)
+        return stats
+    
+    async def rebuild_stats(self, guild_id: Optional[int] = None) -> dict:
+        """
+        Recalcule les compteurs d'une économie à partir des tables users et game_history
+        
+        Les compteurs sont normalement toujours exacts; cette fonction sert
+        à les réparer après une modification manuelle de la base.
+        Elle parcourt les lignes de l'économie dans les deux tables,
+        elle est donc lente sur une grosse base.
+        
+        Args:
+            guild_id: Le serveur Discord de la commande (voir _economy)
+            
+        Returns:
+            Les statistiques globales recalculées (voir get_global_stats)
+        """
+        guild_id = self._economy(guild_id)
+        await self.flush_history()
+        
+        async def operation(db, defer):
+            for statement in REBUILD_STATS:
+                await db.execute(statement, {'guild_id': guild_id})
+        
+        for shard in self.shards:
+            await shard.writes.submit(operation)
+        
+        await self.backfill_user_game_stats(guild_id)
+        return await self.get_global_stats(guild_id)
+    
+    async def backfill_user_game_stats(self, guild_id: Optional[int] = None):
+        """
+        Recalcule la table user_game_stats d'une économie à partir de son historique
+        
+        La table est remplie automatiquement par la migration qui la crée,
+        puis tenue à jour à chaque partie. Cette fonction sert à la reconstruire
+        (par exemple après une modification manuelle de game_history).
+        
+        Args:
+            guild_id: Le serveur Discord de la commande (voir _economy)
+        """
+        guild_id = self._economy(guild_id)
+        await self.flush_history()
+        
+        async def operation(db, defer):
+            for statement in REBUILD_USER_GAME_STATS:
+                await db.execute(statement, {'guild_id': guild_id})
+        
+        for shard in self.shards:
+            await shard.writes.submit(operation)
+    
+    def leaderboard_size(self, guild_id: Optional[int] = None) -> int:
+        """
+        Nombre de joueurs classés dans une économie
+        
+        Args:
+            guild_id: Le serveur Discord de la commande (voir _economy)
+        """
+        leaderboard = self.leaderboards.get(self._economy(guild_id))
+        return len(leaderboard) if leaderboard is not None else 0
+    
+    async def get_leaderboard(self, limit: int = 10, offset: int = 0, guild_id: Optional[int] = None) -> List[Tuple]:
+        """
+        Récupère le classement des joueurs les plus riches d'une économie
+        
+        L'ordre vient du classement en mémoire de l'économie (pas de tri de la table users),
+        qui contient ses joueurs de tous les shards. Seules les statistiques
+        des joueurs de la page sont lues, dans le shard de chacun.
         
         Args:
             limit: Nombre de joueurs à récupérer (par défaut: 10)
+            offset: Nombre de joueurs à sauter, pour les pages suivantes (par défaut: 0)
+            guild_id: Le serveur Discord de la commande (voir _economy)
             
         Returns:
             Une liste de tuples contenant (user_id, balance, total_won, total_lost, games_played)
             Triée par balance décroissante (du plus riche au moins riche)
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute(
-                "SELECT user_id, balance, total_won, total_lost, games_played FROM users ORDER BY balance DESC LIMIT ?",
-                (limit,)
-            ) as cursor:
-                return await cursor.fetchall()
+        guild_id = self._economy(guild_id)
+        leaderboard = self.leaderboards.get(guild_id)
+        page = leaderboard.top(limit, offset) if leaderboard is not None else []
+        if not page:
+            return []
+        
+        # Regroupe les joueurs de la page par shard: une requête par shard concerné
+        by_shard = defaultdict(list)
+        for user_id, _ in page:
+            by_shard[self._shard(user_id)].append(user_id)
+        
+        stats = {}
+        for shard, user_ids in by_shard.items():
+            placeholders = ", ".join("?" * len(user_ids))
+            async with shard.pool.reader() as db:
+                async with db.execute(
+                    f"SELECT user_id, total_won, total_lost, games_played FROM users "
+                    f"WHERE guild_id = ? AND user_id IN ({placeholders})",
+                    (guild_id, *user_ids)
+                ) as cursor:
+                    stats.update((row['user_id'], tuple(row)[1:]) for row in await cursor.fetchall())
+        
+        return [(user_id, balance, *stats.get(user_id, (0, 0, 0))) for user_id, balance in page]
+    
+    async def get_rank(self, user_id: int, guild_id: Optional[int] = None) -> dict:
+        """
+        Récupère la position d'un joueur dans le classement de son économie
+        
+        Args:
+            user_id: L'ID Discord de l'utilisateur
+            guild_id: Le serveur Discord de la commande (voir _economy)
+            
+        Returns:
+            Un dictionnaire {'rank', 'total', 'balance'}
+            Exemple: {'rank': 3, 'total': 120, 'balance': 15000}
+        """
+        guild_id = self._economy(guild_id)
+        user = await self.get_or_create_user(user_id, guild_id)
+        leaderboard = self.leaderboards[guild_id]
+        return {
+            'rank': leaderboard.rank(user_id),
+            'total': len(leaderboard),
+            'balance': user['balance']
+        }
     
-    def _get_connection(self):
+    def write_stats(self) -> dict:
         """
-        Obtient une connexion à la base de données
+        Statistiques des files d'écriture, additionnées sur tous les shards
         
-        Cette méthode est utilisée par les commandes admin
-        pour effectuer des opérations spéciales.
+        Returns:
+            Le même dictionnaire que WriteQueue.stats()
+        """
+        shards = [shard.writes.stats() for shard in self.shards]
+        batches = sum(stats['batches'] for stats in shards)
+        operations = sum(stats['operations'] for stats in shards)
+        return {
+            'depth': sum(stats['depth'] for stats in shards),
+            'max_size': sum(stats['max_size'] for stats in shards),
+            'batches': batches,
+            'operations': operations,
+            'avg_batch': operations / batches if batches else 0.0,
+            'last_batch': max(stats['last_batch'] for stats in shards),
+            'max_batch': max(stats['max_batch'] for stats in shards),
+            'rejected': sum(stats['rejected'] for stats in shards),
+        }
+    
+    def read_stats(self) -> dict:
+        """
+        Statistiques des connexions de lecture, additionnées sur tous les shards
         
         Returns:
-            Une connexion aiosqlite
+            Le même dictionnaire que ConnectionPool.read_stats()
         """
-        return aiosqlite.connect(self.db_path)
+        pools = [shard.pool for shard in self.shards]
+        reads = sum(pool.reads for pool in pools)
+        return {
+            'size': sum(pool.size for pool in pools),
+            'available': sum(pool.read_stats()['available'] for pool in pools),
+            'reads': reads,
+            'avg_wait_ms': sum(pool.read_wait for pool in pools) / reads * 1000 if reads else 0.0,
+            'max_wait_ms': max(pool.max_read_wait for pool in pools) * 1000,
+            'avg_read_ms': sum(pool.read_time for pool in pools) / reads * 1000 if reads else 0.0,
+            'max_read_ms': max(pool.max_read_time for pool in pools) * 1000,
+        }
     
-    async def get_user_stats(self, user_id: int) -> dict:
+    async def get_user_stats(self, user_id: int, guild_id: Optional[int] = None) -> dict:
         """
         Récupère les statistiques détaillées d'un utilisateur
         
@@ -341,25 +2179,32 @@ class DatabaseManager:
         - Total gagné et perdu
         - Nombre de parties jouées
         - Profit net (total gagné - total perdu)
-        - Nombre de parties par type de jeu
+        - Total misé et plus gros gain
+        - Statistiques par type de jeu
+        
+        Les statistiques par jeu sont lues dans user_game_stats (une ligne par jeu)
+        au lieu d'être recalculées sur tout l'historique du joueur.
         
         Args:
             user_id: L'ID Discord de l'utilisateur
+            guild_id: Le serveur Discord de la commande (voir _economy)
             
         Returns:
             Un dictionnaire contenant toutes les statistiques
         """
+        guild_id = self._economy(guild_id)
+        
         # Récupère les données de base de l'utilisateur
-        user = await self.get_or_create_user(user_id)
+        user = await self.get_or_create_user(user_id, guild_id)
         
-        async with aiosqlite.connect(self.db_path) as db:
-            # Compte le nombre de parties par type de jeu
-            # Exemple de résultat: [('coinflip', 5), ('dice', 3), ('slots', 10)]
+        async with self._shard(user_id).pool.reader() as db:
+            # Une ligne par type de jeu, triée du plus joué au moins joué
             async with db.execute(
-                "SELECT game_type, COUNT(*) as count FROM game_history WHERE user_id = ? GROUP BY game_type",
-                (user_id,)
+                "SELECT game_type, games, wagered, won, lost, biggest_win FROM user_game_stats "
+                "WHERE guild_id = ? AND user_id = ? ORDER BY games DESC",
+                (guild_id, user_id)
             ) as cursor:
-                game_counts = await cursor.fetchall()
+                games = {row['game_type']: dict(row) for row in await cursor.fetchall()}
         
         # Compile toutes les statistiques dans un dictionnaire
         return {
@@ -368,5 +2213,10 @@ class DatabaseManager:
             'total_lost': user['total_lost'],
             'games_played': user['games_played'],
             'net_profit': user['total_won'] - user['total_lost'],  # Profit net (peut être négatif)
-            'game_counts': dict(game_counts) if game_counts else {}  # Convertit en dictionnaire
+            'total_wagered': sum(game['wagered'] for game in games.values()),
+            'biggest_win': max((game['biggest_win'] for game in games.values()), default=0),
+            # Exemple: {'coinflip': 5, 'dice': 3, 'slots': 10}
+            'game_counts': {game_type: game['games'] for game_type, game in games.items()},
+            # Exemple: {'dice': {'games': 3, 'wagered': 300, 'won': 150, 'lost': 200, 'biggest_win': 90}, ...}
+            'games': games
         }
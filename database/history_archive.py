@@ -0,0 +1,66 @@
+"""
+Compressed history archives for the gambling bot
+
+Ce fichier écrit les archives des parties retirées de game_history
+par la rétention (voir DatabaseManager.prune_history).
+
+Format: une partie par ligne, en JSON, compressé avec gzip.
+Il y a un fichier par shard et par mois de jeu, par exemple:
+    database/archive/gambling.history-2025-01.jsonl.gz
+
+Les archives ne sont jamais réécrites: chaque lot est ajouté à la fin du fichier
+comme un nouveau "membre" gzip. gzip.open() et zcat lisent tous les membres
+à la suite, comme un seul fichier:
+    zcat database/archive/gambling.history-2025-01.jsonl.gz | head
+"""
+
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import List
+
+
+def archive_path(directory: str, db_path: str, month: str) -> str:
+    """
+    Chemin du fichier d'archive d'un shard pour un mois
+    
+    Args:
+        directory: Dossier des archives (config.HISTORY_ARCHIVE_DIR)
+        db_path: Chemin du fichier SQLite du shard
+        month: Le mois des parties, au format AAAA-MM
+    """
+    root = os.path.splitext(os.path.basename(db_path))[0]
+    return os.path.join(directory, f"{root}.history-{month}.jsonl.gz")
+
+
+def write_archive(directory: str, db_path: str, rows: List[dict]) -> int:
+    """
+    Ajoute des parties à la fin des archives d'un shard
+    
+    Chaque fichier est synchronisé sur le disque (fsync) avant le retour:
+    les parties peuvent ensuite être supprimées de la base sans risque.
+    Fonction bloquante, à appeler avec asyncio.to_thread().
+    
+    Args:
+        directory: Dossier des archives (créé si besoin)
+        db_path: Chemin du fichier SQLite du shard
+        rows: Les parties, avec un 'timestamp' epoch en millisecondes
+        
+    Returns:
+        Le nombre de fichiers écrits
+    """
+    by_month = defaultdict(list)
+    for row in rows:
+        month = datetime.fromtimestamp(row['timestamp'] / 1000, timezone.utc).strftime('%Y-%m')
+        by_month[month].append(row)
+        
+    os.makedirs(directory, exist_ok=True)
+    for month, month_rows in by_month.items():
+        data = "".join(json.dumps(row, separators=(',', ':')) + "\n" for row in month_rows)
+        with open(archive_path(directory, db_path, month), 'ab') as file:
+            file.write(gzip.compress(data.encode()))
+            file.flush()
+            os.fsync(file.fileno())
+    return len(by_month)
@@ -0,0 +1,136 @@
+"""
+Buffered game history writer for the gambling bot
+
+Ce fichier regroupe les insertions dans game_history ("group commit").
+Au lieu d'un INSERT + commit par partie, les lignes sont gardées en mémoire
+puis écrites en une seule transaction avec executemany():
+- dès que le lot atteint HISTORY_BATCH_SIZE lignes
+- ou au plus tard HISTORY_FLUSH_MS millisecondes après la première ligne en attente
+
+Seul l'historique (la piste d'audit) peut être en retard.
+Les balances et les statistiques des utilisateurs restent mises à jour
+immédiatement dans la transaction du pari.
+"""
+
+import asyncio
+import time
+from typing import List, Tuple
+
+from database.pool import ConnectionPool
+
+
+class HistoryWriter:
+    """
+    Tampon d'écriture pour la table game_history
+    
+    Une tâche de fond attend qu'un lot soit plein ou que le délai soit écoulé,
+    puis vide le tampon. close() vide les lignes restantes à l'arrêt du bot.
+    """
+    
+    def __init__(self, pool: ConnectionPool, batch_size: int, flush_ms: int):
+        """
+        Prépare le tampon (la tâche de fond est lancée par start())
+        
+        Args:
+            pool: Le pool de connexions du DatabaseManager
+            batch_size: Nombre de lignes qui déclenche une écriture immédiate
+            flush_ms: Délai maximum (ms) avant qu'une ligne en attente soit écrite
+        """
+        self.pool = pool
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(1, flush_ms) / 1000
+        self._pending: List[Tuple[int, int, int, int, int, int]] = []
+        # Lot retiré du tampon par flush() qui attend encore la connexion d'écriture
+        self._writing: List[Tuple[int, int, int, int, int, int]] = []
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+    
+    @property
+    def pending(self) -> int:
+        """Nombre de lignes en attente d'écriture"""
+        return len(self._pending)
+    
+    def start(self):
+        """Lance la tâche de fond qui vide le tampon"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    def add(self, guild_id: int, user_id: int, game_code: int, bet_amount: int, result: int):
+        """
+        Ajoute une partie au tampon
+        
+        L'horodatage (epoch en millisecondes) est pris maintenant, pas au moment
+        de l'écriture, pour que l'historique garde l'heure réelle de la partie.
+        """
+        timestamp = int(time.time() * 1000)
+        self._pending.append((guild_id, user_id, game_code, bet_amount, result, timestamp))
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+    
+    def discard(self, guild_id: int, user_id: int):
+        """
+        Oublie les parties en attente d'un joueur (remise à zéro du compte)
+        
+        A appeler sous le verrou d'écriture, après le commit qui efface son historique:
+        le lot d'un flush() qui attend la connexion est filtré lui aussi.
+        """
+        def keep(row):
+            return row[0] != guild_id or row[1] != user_id
+        
+        self._pending[:] = [row for row in self._pending if keep(row)]
+        self._writing[:] = [row for row in self._writing if keep(row)]
+    
+    async def flush(self):
+        """
+        Écrit toutes les lignes en attente en une seule transaction
+        
+        Si l'écriture échoue, les lignes sont remises en tête du tampon
+        pour être retentées au prochain passage.
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return
+                
+            rows, self._pending = self._pending, []
+            self._writing = rows
+            try:
+                async with self.pool.writer() as db:
+                    await db.executemany(
+                        "INSERT INTO game_history (guild_id, user_id, game_code, bet_amount, result, timestamp) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        rows
+                    )
+                    await db.commit()
+            except BaseException:
+                self._pending[:0] = rows
+                raise
+            finally:
+                self._writing = []
+    
+    async def _run(self):
+        """Boucle de fond: attend un lot plein ou la fin du délai, puis écrit"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"❌ Failed to flush game history: {e}")
+    
+    async def close(self):
+        """Arrête la tâche de fond et écrit les lignes restantes"""
+        if self._task is not None:
+            # On prend le verrou pour ne pas interrompre une écriture en cours
+            async with self._flush_lock:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
@@ -0,0 +1,217 @@
+"""
+Ranked leaderboard index for the gambling bot
+
+Ce fichier contient un classement en mémoire de tous les joueurs, trié par balance.
+Il remplace le "ORDER BY balance DESC" sur toute la table users:
+- Le top N se lit en O(log n + N)
+- Le rang d'un joueur se calcule en O(log n)
+- Une modification de balance coûte O(log n)
+
+La structure utilisée est une "skiplist indexable": une liste chaînée triée
+avec plusieurs niveaux de raccourcis. Chaque raccourci retient combien
+d'éléments il saute (sa "largeur"), ce qui permet de compter les positions
+sans parcourir toute la liste.
+"""
+
+import random
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Nombre maximum de niveaux de raccourcis (suffisant pour des millions de joueurs)
+MAX_LEVELS = 24
+
+
+class _Node:
+    """Un élément de la skiplist: une clé, ses liens suivants et leurs largeurs"""
+    
+    __slots__ = ('key', 'next', 'width')
+    
+    def __init__(self, key, levels: int):
+        self.key = key
+        self.next: List[Optional['_Node']] = [None] * levels
+        self.width: List[int] = [1] * levels
+
+
+class RankIndex:
+    """
+    Classement en mémoire des joueurs par balance décroissante
+    
+    Les joueurs sont triés par la clé (-balance, user_id): la plus grosse balance
+    est en premier et, à balance égale, le plus petit user_id passe devant.
+    Le rang 1 est donc le joueur le plus riche.
+    """
+    
+    def __init__(self):
+        self._nil = _Node(None, 0)
+        self._head = _Node(None, MAX_LEVELS)
+        self._head.next = [self._nil] * MAX_LEVELS
+        self._balances: Dict[int, int] = {}
+    
+    def __len__(self) -> int:
+        return len(self._balances)
+    
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._balances
+    
+    @staticmethod
+    def _random_levels() -> int:
+        """Tire le nombre de niveaux d'un nouvel élément (1 avec une chance sur 2, 2 sur 4...)"""
+        levels = 1
+        while levels < MAX_LEVELS and random.random() < 0.5:
+            levels += 1
+        return levels
+    
+    def _find_path(self, key) -> Tuple[List[_Node], List[int]]:
+        """
+        Cherche, à chaque niveau, le dernier élément strictement avant la clé
+        
+        Returns:
+            (chain, steps): chain[niveau] est cet élément, steps[niveau] le nombre
+            de positions parcourues à ce niveau pour l'atteindre
+        """
+        chain = [self._head] * MAX_LEVELS
+        steps = [0] * MAX_LEVELS
+        node = self._head
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level] is not self._nil and node.next[level].key < key:
+                steps[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+        return chain, steps
+    
+    def _insert(self, key):
+        """Insère une clé à sa place dans la skiplist"""
+        chain, steps_at_level = self._find_path(key)
+        levels = self._random_levels()
+        new_node = _Node(key, levels)
+        
+        steps = 0
+        for level in range(levels):
+            previous = chain[level]
+            new_node.next[level] = previous.next[level]
+            previous.next[level] = new_node
+            new_node.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+            
+        # Les raccourcis plus hauts sautent maintenant un élément de plus
+        for level in range(levels, MAX_LEVELS):
+            chain[level].width[level] += 1
+    
+    def _remove(self, key):
+        """Retire une clé de la skiplist"""
+        chain, _ = self._find_path(key)
+        node = chain[0].next[0]
+        if node is self._nil or node.key != key:
+            raise KeyError(key)
+            
+        for level in range(len(node.next)):
+            previous = chain[level]
+            previous.width[level] += node.width[level] - 1
+            previous.next[level] = node.next[level]
+            
+        for level in range(len(node.next), MAX_LEVELS):
+            chain[level].width[level] -= 1
+    
+    def load(self, rows: Iterable[Tuple[int, int]]):
+        """
+        Remplit le classement au démarrage
+        
+        Si le classement est vide, il est construit d'un coup à partir de la liste
+        triée (plus rapide que d'insérer les joueurs un par un).
+        
+        Args:
+            rows: Des couples (user_id, balance), par exemple lus dans la table users
+        """
+        if self._balances:
+            for user_id, balance in rows:
+                self.update(user_id, balance)
+            return
+        
+        self._balances = dict(rows)
+        keys = sorted((-balance, user_id) for user_id, balance in self._balances.items())
+        
+        # Dernier élément relié à chaque niveau, et sa position
+        last = [self._head] * MAX_LEVELS
+        last_position = [0] * MAX_LEVELS
+        for position, key in enumerate(keys, start=1):
+            node = _Node(key, self._random_levels())
+            for level in range(len(node.next)):
+                last[level].next[level] = node
+                last[level].width[level] = position - last_position[level]
+                last[level] = node
+                last_position[level] = position
+        
+        # Referme chaque niveau sur la fin de liste
+        for level in range(MAX_LEVELS):
+            last[level].next[level] = self._nil
+            last[level].width[level] = len(keys) + 1 - last_position[level]
+    
+    def update(self, user_id: int, balance: int):
+        """
+        Ajoute un joueur ou met à jour sa balance
+        
+        Appelée après chaque modification de balance.
+        """
+        old_balance = self._balances.get(user_id)
+        if old_balance == balance:
+            return
+        if old_balance is not None:
+            self._remove((-old_balance, user_id))
+        self._insert((-balance, user_id))
+        self._balances[user_id] = balance
+    
+    def remove(self, user_id: int):
+        """Retire un joueur du classement (sans erreur s'il n'y est pas)"""
+        balance = self._balances.pop(user_id, None)
+        if balance is not None:
+            self._remove((-balance, user_id))
+    
+    def rank(self, user_id: int) -> Optional[int]:
+        """
+        Calcule la position d'un joueur dans le classement
+        
+        Returns:
+            Le rang (1 = le plus riche), ou None si le joueur n'est pas classé
+        """
+        balance = self._balances.get(user_id)
+        if balance is None:
+            return None
+            
+        key = (-balance, user_id)
+        position = 0
+        node = self._head
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level] is not self._nil and node.next[level].key <= key:
+                position += node.width[level]
+                node = node.next[level]
+        return position
+    
+    def top(self, limit: int, offset: int = 0) -> List[Tuple[int, int]]:
+        """
+        Récupère une page du classement
+        
+        Args:
+            limit: Nombre de joueurs à récupérer
+            offset: Nombre de joueurs à sauter (0 = à partir du premier)
+            
+        Returns:
+            Une liste de couples (user_id, balance), du plus riche au moins riche
+        """
+        if offset >= len(self._balances) or limit <= 0:
+            return []
+            
+        # Descend les niveaux pour atteindre directement la position offset + 1
+        remaining = offset + 1
+        node = self._head
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level] is not self._nil and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+                
+        # Puis suit le niveau 0 élément par élément
+        page = []
+        while node is not self._nil and len(page) < limit:
+            balance, user_id = node.key
+            page.append((user_id, -balance))
+            node = node.next[0]
+        return page
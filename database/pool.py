@@ -0,0 +1,224 @@
+"""
+Connection pool for the gambling bot
+
+Ce fichier gère un pool de connexions SQLite persistantes.
+Au lieu d'ouvrir une nouvelle connexion aiosqlite (et donc un nouveau thread
+et un nouveau descripteur de fichier) à chaque requête, le pool ouvre
+toutes ses connexions une seule fois au démarrage du bot.
+
+Le pool contient:
+- Une seule connexion d'écriture (SQLite n'accepte qu'un écrivain à la fois)
+- Plusieurs connexions de lecture, prêtées puis rendues au pool
+
+Les connexions de lecture sont ouvertes en lecture seule (mode=ro + query_only):
+une commande de lecture ne peut ni écrire ni prendre le verrou d'écriture,
+et en mode WAL elle ne fait jamais attendre le règlement d'un pari.
+"""
+
+import asyncio
+import os
+import time
+from urllib.parse import quote
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+import aiosqlite
+
+
+class ConnectionPool:
+    """
+    Pool borné de connexions aiosqlite
+    
+    La connexion d'écriture est protégée par un verrou asyncio:
+    une seule coroutine peut l'utiliser à la fois, ce qui évite
+    les erreurs "database is locked" entre nos propres écrivains.
+    
+    Les connexions de lecture sont stockées dans une file asyncio.
+    Si toutes sont occupées, l'appelant attend qu'une se libère
+    au lieu d'en ouvrir une nouvelle.
+    """
+    
+    def __init__(self, db_path: str, readers: int, pragmas: Optional[Dict[str, Union[str, int]]] = None):
+        """
+        Prépare le pool (les connexions sont ouvertes dans open())
+        
+        Args:
+            db_path: Chemin vers le fichier de base de données SQLite
+            readers: Nombre de connexions de lecture à ouvrir
+            pragmas: PRAGMAs SQLite à appliquer sur chaque connexion
+                     Exemple: {'journal_mode': 'WAL', 'synchronous': 'NORMAL'}
+        """
+        self.db_path = db_path
+        self.size = max(1, readers)
+        self.pragmas = dict(pragmas or {})
+        # Valeurs réellement appliquées par SQLite (lues après open())
+        self.applied_pragmas: Dict[str, Union[str, int]] = {}
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._write_lock = asyncio.Lock()
+        self._readers: "asyncio.Queue[aiosqlite.Connection]" = asyncio.Queue()
+        self._all_readers: List[aiosqlite.Connection] = []
+        # Statistiques des lectures
+        self.reads = 0
+        self.read_wait = 0.0
+        self.read_time = 0.0
+        self.max_read_wait = 0.0
+        self.max_read_time = 0.0
+    
+    @property
+    def is_open(self) -> bool:
+        """True si le pool a été ouvert et pas encore fermé"""
+        return self._writer is not None
+    
+    async def _connect(self, read_only: bool = False) -> aiosqlite.Connection:
+        """
+        Ouvre une connexion configurée pour le pool
+        
+        Les PRAGMAs du profil sont appliqués à chaque connexion car la plupart
+        (synchronous, cache_size, mmap_size...) ne valent que pour la connexion
+        qui les exécute. Seul journal_mode=WAL est enregistré dans le fichier.
+        
+        Args:
+            read_only: True pour une connexion de lecture (URI mode=ro + PRAGMA query_only)
+            
+        Returns:
+            Une connexion aiosqlite dont les lignes sont des aiosqlite.Row
+        """
+        if read_only:
+            uri = f"file:{quote(os.path.abspath(self.db_path))}?mode=ro"
+            conn = await aiosqlite.connect(uri, uri=True)
+        else:
+            conn = await aiosqlite.connect(self.db_path)
+        conn.row_factory = aiosqlite.Row
+        for name, value in self.pragmas.items():
+            await conn.execute(f"PRAGMA {name} = {value}")
+        if read_only:
+            await conn.execute("PRAGMA query_only = ON")
+        return conn
+    
+    async def _read_pragmas(self, conn: aiosqlite.Connection) -> Dict[str, Union[str, int]]:
+        """
+        Relit la valeur effective de chaque PRAGMA du profil
+        
+        SQLite ignore silencieusement certaines valeurs (par exemple WAL
+        sur une base en mémoire), donc on rapporte ce qui est réellement actif.
+        """
+        applied = {}
+        for name in self.pragmas:
+            async with conn.execute(f"PRAGMA {name}") as cursor:
+                row = await cursor.fetchone()
+                applied[name] = row[0] if row else None
+        return applied
+    
+    async def open(self, setup: Optional[Callable[[aiosqlite.Connection], Awaitable[None]]] = None):
+        """
+        Ouvre la connexion d'écriture et toutes les connexions de lecture
+        
+        Appelée une seule fois par DatabaseManager.initialize().
+        
+        Args:
+            setup: Coroutine optionnelle exécutée sur la connexion d'écriture
+                   avant l'ouverture des lecteurs (création du schéma, migrations).
+                   Ainsi les lecteurs voient directement le schéma à jour.
+        """
+        if self.is_open:
+            return
+            
+        self._writer = await self._connect()
+        self.applied_pragmas = await self._read_pragmas(self._writer)
+        if setup is not None:
+            async with self.writer() as db:
+                await setup(db)
+        for _ in range(self.size):
+            conn = await self._connect(read_only=True)
+            self._all_readers.append(conn)
+            self._readers.put_nowait(conn)
+    
+    async def close(self):
+        """
+        Ferme toutes les connexions du pool
+        
+        Appelée à l'arrêt du bot. On attend que l'écrivain en cours
+        ait terminé avant de fermer sa connexion.
+        
+        Les lecteurs sont fermés d'abord: une connexion en lecture seule (mode=ro)
+        ne peut pas vider le WAL. L'écrivain, fermé en dernier, reporte tout le WAL
+        dans la base (checkpoint) et supprime les fichiers -wal et -shm.
+        """
+        if not self.is_open:
+            return
+            
+        async with self._write_lock:
+            for conn in self._all_readers:
+                await conn.close()
+            self._all_readers.clear()
+            self._readers = asyncio.Queue()
+            
+            await self._writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            await self._writer.close()
+            self._writer = None
+    
+    @asynccontextmanager
+    async def writer(self):
+        """
+        Prête la connexion d'écriture de manière exclusive
+        
+        Si une exception se produit dans le bloc, la transaction en cours
+        est annulée (rollback) pour ne pas laisser de modifications à moitié faites.
+        
+        Exemple:
+            async with pool.writer() as db:
+                await db.execute("UPDATE ...")
+                await db.commit()
+        """
+        async with self._write_lock:
+            try:
+                yield self._writer
+            except BaseException:
+                await self._writer.rollback()
+                raise
+    
+    @asynccontextmanager
+    async def reader(self):
+        """
+        Prête une connexion de lecture (en lecture seule), puis la rend au pool
+        
+        Le temps d'attente d'une connexion libre et la durée de la lecture
+        sont mesurés (voir read_stats()).
+        
+        Exemple:
+            async with pool.reader() as db:
+                async with db.execute("SELECT ...") as cursor:
+                    rows = await cursor.fetchall()
+        """
+        start = time.perf_counter()
+        conn = await self._readers.get()
+        acquired = time.perf_counter()
+        try:
+            yield conn
+        finally:
+            self._readers.put_nowait(conn)
+            waited = acquired - start
+            held = time.perf_counter() - acquired
+            self.reads += 1
+            self.read_wait += waited
+            self.read_time += held
+            self.max_read_wait = max(self.max_read_wait, waited)
+            self.max_read_time = max(self.max_read_time, held)
+    
+    def read_stats(self) -> dict:
+        """
+        Statistiques des connexions de lecture
+        
+        Returns:
+            Un dictionnaire {'size', 'available', 'reads', 'avg_wait_ms',
+            'max_wait_ms', 'avg_read_ms', 'max_read_ms'}
+        """
+        return {
+            'size': self.size,
+            'available': self._readers.qsize(),
+            'reads': self.reads,
+            'avg_wait_ms': self.read_wait / self.reads * 1000 if self.reads else 0.0,
+            'max_wait_ms': self.max_read_wait * 1000,
+            'avg_read_ms': self.read_time / self.reads * 1000 if self.reads else 0.0,
+            'max_read_ms': self.max_read_time * 1000,
+        }
@@ -0,0 +1,194 @@
+"""
+Offline resharding tool for the gambling bot
+
+Ce script redistribue toutes les données sur un nouveau nombre de shards.
+⚠️ Le bot doit être arrêté pendant l'opération.
+
+Étapes:
+1. Ouvre l'ancienne répartition avec DatabaseManager: migrations à jour,
+   dons entre shards terminés, mises bloquées remboursées, historique en attente écrit
+2. Crée les nouveaux fichiers (vides, avec le schéma complet)
+3. Copie chaque ligne dans le shard de son utilisateur
+4. Recalcule les compteurs de chaque économie dans chaque nouveau shard
+
+Les anciens fichiers ne sont pas modifiés ni supprimés: il suffit ensuite
+de mettre SHARD_COUNT à la nouvelle valeur (fichier .env) et de redémarrer le bot.
+
+Usage:
+    python -m database.reshard --to 4
+    python -m database.reshard --from 4 --to 8 --path database/gambling.db
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+from typing import Dict, List
+from urllib.parse import quote
+
+import config
+from database.db_manager import DatabaseManager, GAME_TYPES, REBUILD_STATS
+from database.shard import shard_index, shard_path
+
+# Tables copiées, avec la colonne qui désigne l'utilisateur propriétaire de la ligne
+# (game_history, ledger et transfers sont copiées sans leur id, dans l'ordre)
+# Les instantanés des balances ne sont pas copiés: le registre complet suffit
+USER_TABLES = [
+    ('users', 'user_id'),
+    ('user_game_stats', 'user_id'),
+    ('game_history', 'user_id'),
+    ('game_history_daily', 'user_id'),
+    ('ledger', 'user_id'),
+]
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    """Colonnes d'une table, sans la clé 'id'"""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})") if row[1] != 'id']
+
+
+def _game_codes(sources: List[sqlite3.Connection], targets: List[sqlite3.Connection]) -> List[Dict[int, int]]:
+    """
+    Prépare la traduction des codes de jeu de game_history et game_history_daily
+    
+    Les codes de GAME_TYPES sont les mêmes dans tous les shards, mais un ancien nom
+    de jeu inconnu a reçu un code (à partir de 1000) propre à son shard lors de la
+    migration 9. Chaque nom est donc ajouté aux nouveaux shards avec un code unique.
+    
+    Returns:
+        Pour chaque ancien shard, un dictionnaire {ancien code: nouveau code}
+    """
+    names = {}
+    for source in sources:
+        for (name,) in source.execute("SELECT name FROM game_types"):
+            names.setdefault(name, GAME_TYPES.get(name))
+    next_code = max([999, *(code for code in names.values() if code is not None)]) + 1
+    for name in sorted(name for name, code in names.items() if code is None):
+        names[name] = next_code
+        next_code += 1
+        
+    for target in targets:
+        target.executemany(
+            "INSERT INTO game_types (id, name) VALUES (?, ?) ON CONFLICT DO NOTHING",
+            [(code, name) for name, code in names.items()]
+        )
+    return [
+        {code: names[name] for code, name in source.execute("SELECT id, name FROM game_types")}
+        for source in sources
+    ]
+
+
+def _copy(sources: List[sqlite3.Connection], targets: List[sqlite3.Connection]) -> dict:
+    """
+    Copie toutes les lignes des anciens shards vers les nouveaux
+    
+    Un don entre deux utilisateurs est copié dans le shard du donneur et,
+    s'il est différent, dans celui du receveur (comme le fait DatabaseManager.transfer).
+    
+    Returns:
+        Le nombre de lignes copiées par table
+    """
+    count = len(targets)
+    game_codes = _game_codes(sources, targets)
+    copied = {}
+    for table, owner in USER_TABLES:
+        columns = _columns(sources[0], table)
+        owner_position = columns.index(owner)
+        code_position = columns.index('game_code') if 'game_code' in columns else None
+        insert = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        order = " ORDER BY id" if table in ('game_history', 'ledger') else ""
+        copied[table] = 0
+        for source, codes in zip(sources, game_codes):
+            for row in source.execute(f"SELECT {', '.join(columns)} FROM {table}{order}"):
+                if code_position is not None:
+                    row = list(row)
+                    row[code_position] = codes[row[code_position]]
+                targets[shard_index(row[owner_position], count)].execute(insert, row)
+                copied[table] += 1
+                
+    columns = _columns(sources[0], 'transfers')
+    insert = f"INSERT INTO transfers ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    seen_keys = set()
+    copied['transfers'] = 0
+    for source in sources:
+        for row in source.execute(f"SELECT {', '.join(columns)} FROM transfers ORDER BY id"):
+            transfer = dict(zip(columns, row))
+            # Un don entre deux anciens shards existe en deux exemplaires: on n'en garde qu'un
+            if transfer['transfer_key'] is not None:
+                if transfer['transfer_key'] in seen_keys:
+                    continue
+                seen_keys.add(transfer['transfer_key'])
+            giver = shard_index(transfer['from_user_id'], count)
+            receiver = shard_index(transfer['to_user_id'], count)
+            for index in {giver, receiver}:
+                targets[index].execute(insert, row)
+            copied['transfers'] += 1
+    return copied
+
+
+async def _prepare(db_path: str, shard_count: int):
+    """Ouvre puis ferme une répartition: schéma à jour et plus rien en attente"""
+    manager = DatabaseManager(db_path, shard_count)
+    await manager.initialize()
+    await manager.close()
+
+
+async def reshard(db_path: str, old_count: int, new_count: int):
+    """
+    Redistribue la base de old_count shards vers new_count shards
+    
+    Args:
+        db_path: Chemin de base des fichiers (config.DATABASE_PATH)
+        old_count: Nombre de shards actuel
+        new_count: Nombre de shards voulu
+    """
+    old_paths = [shard_path(db_path, index, old_count) for index in range(old_count)]
+    new_paths = [shard_path(db_path, index, new_count) for index in range(new_count)]
+    
+    missing = [path for path in old_paths if not os.path.exists(path)]
+    if missing:
+        raise SystemExit(f"❌ Missing shard file(s): {', '.join(missing)}")
+    existing = [path for path in new_paths if os.path.exists(path)]
+    if existing:
+        raise SystemExit(f"❌ Target file(s) already exist, remove them first: {', '.join(existing)}")
+        
+    await _prepare(db_path, old_count)
+    await _prepare(db_path, new_count)
+    
+    sources = [sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True) for path in old_paths]
+    targets = [sqlite3.connect(path) for path in new_paths]
+    try:
+        copied = _copy(sources, targets)
+        for target in targets:
+            # Les compteurs sont recalculés économie par économie
+            guild_ids = [row[0] for row in target.execute("SELECT DISTINCT guild_id FROM users")]
+            for guild_id in guild_ids:
+                for statement in REBUILD_STATS:
+                    target.execute(statement, {'guild_id': guild_id})
+            target.commit()
+    finally:
+        for conn in sources + targets:
+            conn.close()
+            
+    for table, rows in copied.items():
+        print(f"✅ {table}: {rows:,} row(s) copied")
+    print(f"✅ Resharded {old_count} → {new_count} shard(s). Set SHARD_COUNT={new_count} and restart the bot.")
+    print(f"   Old file(s) kept: {', '.join(old_paths)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Redistribute the gambling database over a new number of shards")
+    parser.add_argument('--from', dest='old_count', type=int, default=config.SHARD_COUNT,
+                        help="current shard count (default: SHARD_COUNT)")
+    parser.add_argument('--to', dest='new_count', type=int, required=True, help="new shard count")
+    parser.add_argument('--path', default=config.DATABASE_PATH, help="database path (default: DATABASE_PATH)")
+    args = parser.parse_args(argv)
+    
+    if args.old_count < 1 or args.new_count < 1 or args.old_count == args.new_count:
+        parser.error("shard counts must be positive and different")
+    asyncio.run(reshard(args.path, args.old_count, args.new_count))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
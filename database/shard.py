@@ -0,0 +1,104 @@
+"""
+Database shards for the gambling bot
+
+Ce fichier répartit les données sur plusieurs fichiers SQLite ("shards").
+Chaque utilisateur appartient à un seul shard, choisi à partir de son user_id:
+sa ligne users, son historique et ses statistiques sont tous dans ce fichier.
+
+Chaque shard a ses propres connexions, sa propre file d'écriture et son propre
+tampon d'historique: avec SHARD_COUNT shards, il y a SHARD_COUNT écrivains
+indépendants et des index plus petits.
+
+Le nombre de shards se règle avec config.SHARD_COUNT.
+Pour changer ce nombre sur une base existante, utiliser l'outil hors ligne:
+    python -m database.reshard --to 4
+"""
+
+import os
+import zlib
+from typing import Awaitable, Callable, Optional
+
+import aiosqlite
+
+import config
+from database.pool import ConnectionPool
+from database.history_writer import HistoryWriter
+from database.write_queue import WriteQueue
+
+
+def shard_path(db_path: str, index: int, count: int) -> str:
+    """
+    Chemin du fichier d'un shard
+    
+    Avec un seul shard, c'est le fichier d'origine (database/gambling.db).
+    Sinon le nombre de shards fait partie du nom (database/gambling.2-of-4.db):
+    deux répartitions différentes ne peuvent pas se mélanger.
+    """
+    if count == 1:
+        return db_path
+    root, ext = os.path.splitext(db_path)
+    return f"{root}.{index}-of-{count}{ext}"
+
+
+def shard_index(user_id: int, count: int) -> int:
+    """
+    Numéro du shard d'un utilisateur
+    
+    On hache le user_id (CRC32, stable d'un démarrage à l'autre) plutôt que
+    de prendre user_id % count: les bits bas des IDs Discord ne sont pas bien répartis.
+    """
+    if count == 1:
+        return 0
+    return zlib.crc32(user_id.to_bytes(8, 'little', signed=True)) % count
+
+
+class Shard:
+    """
+    Un fichier SQLite de la base, avec son pool de connexions,
+    sa file d'écriture et son tampon d'historique
+    """
+    
+    def __init__(self, index: int, db_path: str):
+        """
+        Prépare le shard (les connexions sont ouvertes dans open())
+        
+        Args:
+            index: Numéro du shard
+            db_path: Chemin vers le fichier SQLite du shard
+        """
+        self.index = index
+        self.db_path = db_path
+        # Pool de connexions persistantes
+        self.pool = ConnectionPool(db_path, config.DATABASE_POOL_SIZE, config.SQLITE_PRAGMAS)
+        # Tampon d'écriture de l'historique (None = écriture immédiate)
+        self.history: Optional[HistoryWriter] = None
+        if config.HISTORY_BATCH_SIZE > 0:
+            self.history = HistoryWriter(self.pool, config.HISTORY_BATCH_SIZE, config.HISTORY_FLUSH_MS)
+        # File d'écriture: toutes les modifications du shard passent par un seul écrivain
+        self.writes = WriteQueue(self.pool, config.WRITE_QUEUE_SIZE, config.WRITE_BATCH_SIZE)
+    
+    async def open(self, setup: Optional[Callable[[aiosqlite.Connection], Awaitable[None]]] = None):
+        """
+        Ouvre les connexions du shard (setup: création du schéma et migrations)
+        
+        La file d'écriture et le tampon d'historique sont lancés par start().
+        """
+        await self.pool.open(setup=setup)
+    
+    def start(self):
+        """Lance la file d'écriture et le tampon d'historique"""
+        self.writes.start()
+        if self.history:
+            self.history.start()
+    
+    async def flush_history(self):
+        """Écrit immédiatement les parties en attente dans game_history"""
+        if self.history:
+            await self.history.flush()
+    
+    async def close(self):
+        """Écrit tout ce qui est en attente puis ferme les connexions"""
+        await self.writes.close()
+        if self.history:
+            await self.history.close()
+        await self.pool.close()
@@ -0,0 +1,108 @@
+"""
+User cache for the gambling bot
+
+Ce fichier contient un cache LRU (Least Recently Used) des comptes utilisateurs.
+Les joueurs actifs consultent sans arrêt les mêmes lignes de la table users
+(/balance, validation des mises, affichage de la nouvelle balance...).
+Le cache garde ces lignes en mémoire pour éviter d'interroger SQLite à chaque fois.
+
+C'est un cache "write-through": chaque modification d'une balance est d'abord
+écrite dans la base, puis la ligne à jour est copiée dans le cache.
+Quand le cache est plein, l'utilisateur utilisé le moins récemment est retiré.
+"""
+
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class UserCache:
+    """
+    Cache LRU borné des lignes de la table users, indexé par (guild_id, user_id)
+    
+    Un même joueur a une ligne par économie (voir config.PER_GUILD_ECONOMY).
+    
+    Les dictionnaires renvoyés sont des copies: modifier le résultat
+    de get() ne modifie pas le cache.
+    """
+    
+    def __init__(self, max_size: int):
+        """
+        Args:
+            max_size: Nombre maximum d'utilisateurs gardés en mémoire (0 = cache désactivé)
+        """
+        self.max_size = max(0, max_size)
+        self._users: "OrderedDict[Tuple[int, int], dict]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def __len__(self) -> int:
+        return len(self._users)
+    
+    def get(self, guild_id: int, user_id: int) -> Optional[dict]:
+        """
+        Récupère un utilisateur depuis le cache
+        
+        Returns:
+            Une copie de la ligne de l'utilisateur, ou None s'il n'est pas en cache
+        """
+        key = (guild_id, user_id)
+        user = self._users.get(key)
+        if user is None:
+            self.misses += 1
+            return None
+            
+        # L'utilisateur devient le plus récemment utilisé
+        self._users.move_to_end(key)
+        self.hits += 1
+        return dict(user)
+    
+    def put(self, user: dict):
+        """
+        Ajoute ou remplace un utilisateur dans le cache
+        
+        Appelée après chaque écriture réussie, avec la ligne renvoyée par la base.
+        """
+        if self.max_size == 0:
+            return
+            
+        key = (user['guild_id'], user['user_id'])
+        self._users[key] = dict(user)
+        self._users.move_to_end(key)
+        
+        # Retire les utilisateurs les moins récemment utilisés si le cache est plein
+        while len(self._users) > self.max_size:
+            self._users.popitem(last=False)
+            self.evictions += 1
+    
+    def put_if_absent(self, user: dict):
+        """
+        Ajoute un utilisateur lu depuis la base, sauf s'il est déjà en cache
+        
+        Utilisée après une lecture (cache miss): si une écriture a mis la ligne
+        en cache pendant la lecture, la version du cache est plus récente
+        et ne doit pas être écrasée.
+        """
+        if (user['guild_id'], user['user_id']) not in self._users:
+            self.put(user)
+    
+    def invalidate(self, guild_id: int, user_id: int):
+        """Retire un utilisateur du cache (la prochaine lecture ira dans la base)"""
+        self._users.pop((guild_id, user_id), None)
+    
+    def stats(self) -> dict:
+        """
+        Statistiques du cache
+        
+        Returns:
+            Un dictionnaire {'size', 'max_size', 'hits', 'misses', 'evictions', 'hit_rate'}
+        """
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._users),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
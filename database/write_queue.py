@@ -0,0 +1,231 @@
+"""
+Single writer queue for the gambling bot
+
+Ce fichier fait passer toutes les modifications de la base par un seul écrivain.
+Les commandes ne touchent plus directement la connexion d'écriture: elles déposent
+une "opération" dans une file asyncio bornée, puis attendent son résultat.
+
+Une tâche de fond vide la file:
+- Elle prend toutes les opérations en attente (au plus WRITE_BATCH_SIZE)
+- Elle les exécute dans UNE seule transaction, chacune dans son propre SAVEPOINT:
+  une opération qui échoue (ou qui s'annule, par exemple balance insuffisante)
+  n'annule que ses propres modifications
+- Elle fait un seul commit pour tout le lot
+- Puis, dans l'ordre, elle applique les mises à jour en mémoire (cache, classement...)
+  et renvoie son résultat à chaque appelant
+
+Si la file est pleine, l'appelant reçoit tout de suite DatabaseBusy
+au lieu d'attendre indéfiniment.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
+
+import aiosqlite
+
+from database.pool import ConnectionPool
+
+# Une opération reçoit la connexion d'écriture (transaction en cours) et une fonction
+# defer(callback, *args) pour enregistrer ce qui doit être fait APRÈS le commit
+Operation = Callable[[aiosqlite.Connection, Callable[..., None]], Awaitable[Any]]
+
+
+class DatabaseBusy(Exception):
+    """Levée quand la file d'écriture est pleine: la commande doit être retentée plus tard"""
+
+
+class Rollback(Exception):
+    """
+    Levée par une opération pour annuler ses propres modifications
+    
+    Le reste du lot n'est pas touché. L'appelant reçoit result comme résultat
+    (par exemple None pour "balance insuffisante").
+    """
+    
+    def __init__(self, result: Any = None):
+        super().__init__()
+        self.result = result
+
+
+class _Write:
+    """Une opération en attente, avec le futur de son appelant"""
+    
+    __slots__ = ('operation', 'future', 'deferred', 'result', 'error')
+    
+    def __init__(self, operation: Operation, future: asyncio.Future):
+        self.operation = operation
+        self.future = future
+        self.deferred: List[tuple] = []
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+    
+    def defer(self, callback: Callable[..., Any], *args):
+        """Enregistre un appel à faire après le commit"""
+        self.deferred.append((callback, args))
+
+
+class WriteQueue:
+    """
+    File bornée d'opérations d'écriture, exécutées par une seule tâche de fond
+    
+    Exemple:
+        async def operation(db, defer):
+            async with db.execute("UPDATE users ... RETURNING *", (...)) as cursor:
+                row = await cursor.fetchone()
+            defer(cache.put, dict(row))
+            return row['balance']
+            
+        balance = await writes.submit(operation)
+    """
+    
+    def __init__(self, pool: ConnectionPool, max_size: int, batch_size: int):
+        """
+        Prépare la file (la tâche de fond est lancée par start())
+        
+        Args:
+            pool: Le pool de connexions du DatabaseManager
+            max_size: Nombre maximum d'opérations en attente
+            batch_size: Nombre maximum d'opérations par transaction
+        """
+        self.pool = pool
+        self.max_size = max(1, max_size)
+        self.batch_size = max(1, batch_size)
+        self._queue: "asyncio.Queue[_Write]" = asyncio.Queue(self.max_size)
+        self._task = None
+        # Statistiques
+        self.batches = 0
+        self.operations = 0
+        self.rejected = 0
+        self.last_batch = 0
+        self.max_batch = 0
+    
+    @property
+    def depth(self) -> int:
+        """Nombre d'opérations en attente dans la file"""
+        return self._queue.qsize()
+    
+    def start(self):
+        """Lance la tâche de fond qui exécute les opérations"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def submit(self, operation: Operation, wait: bool = False) -> Any:
+        """
+        Dépose une opération dans la file et attend son résultat
+        
+        Args:
+            operation: La coroutine à exécuter dans la transaction du lot
+            wait: True pour attendre une place dans la file plutôt que lever DatabaseBusy.
+                  Réservé à la suite d'une opération déjà validée (2e phase d'un don,
+                  règlement de mises déjà bloquées...): elle ne doit jamais être refusée.
+            
+        Returns:
+            La valeur renvoyée par l'opération (ou celle de son Rollback)
+            
+        Raises:
+            DatabaseBusy: si la file est pleine (seulement avec wait=False)
+            Exception: l'erreur levée par l'opération elle-même
+        """
+        write = _Write(operation, asyncio.get_running_loop().create_future())
+        if wait:
+            await self._queue.put(write)
+            return await write.future
+        try:
+            self._queue.put_nowait(write)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise DatabaseBusy("write queue is full") from None
+        return await write.future
+    
+    async def _run(self):
+        """Boucle de fond: attend une opération, prend tout le lot disponible, l'exécute"""
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                
+            try:
+                await self._execute(batch)
+            except Exception as e:
+                print(f"❌ Failed to commit write batch: {e}")
+                for write in batch:
+                    if not write.future.done():
+                        write.future.set_exception(e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    async def _execute(self, batch: List[_Write]):
+        """
+        Exécute un lot d'opérations dans une seule transaction
+        
+        Les effets en mémoire (defer) et les résultats ne sont appliqués
+        qu'après le commit, dans l'ordre des opérations. Seule une erreur avant
+        le commit remonte à _run (qui la renvoie aux appelants du lot).
+        """
+        async with self.pool.writer() as db:
+            await db.execute("BEGIN")
+            for write in batch:
+                await db.execute("SAVEPOINT operation")
+                try:
+                    write.result = await write.operation(db, write.defer)
+                except Exception as e:
+                    await db.execute("ROLLBACK TO operation")
+                    write.deferred.clear()
+                    if isinstance(e, Rollback):
+                        write.result = e.result
+                    else:
+                        write.error = e
+                await db.execute("RELEASE operation")
+            await db.commit()
+            
+            self.batches += 1
+            self.operations += len(batch)
+            self.last_batch = len(batch)
+            self.max_batch = max(self.max_batch, len(batch))
+            
+            # Toujours sous le verrou d'écriture: la mémoire suit l'ordre des commits.
+            # Le lot est validé: un effet en mémoire qui échoue est signalé mais
+            # n'empêche ni les suivants ni la réponse aux appelants.
+            for write in batch:
+                for callback, args in write.deferred:
+                    try:
+                        callback(*args)
+                    except Exception as e:
+                        print(f"❌ Failed to apply a committed write in memory: {e}")
+                if write.future.done():
+                    continue
+                if write.error is not None:
+                    write.future.set_exception(write.error)
+                else:
+                    write.future.set_result(write.result)
+    
+    async def close(self):
+        """Exécute les opérations encore en attente puis arrête la tâche de fond"""
+        if self._task is not None:
+            await self._queue.join()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def stats(self) -> dict:
+        """
+        Statistiques de la file d'écriture
+        
+        Returns:
+            Un dictionnaire {'depth', 'max_size', 'batches', 'operations',
+            'avg_batch', 'last_batch', 'max_batch', 'rejected'}
+        """
+        return {
+            'depth': self.depth,
+            'max_size': self.max_size,
+            'batches': self.batches,
+            'operations': self.operations,
+            'avg_batch': self.operations / self.batches if self.batches else 0.0,
+            'last_batch': self.last_batch,
+            'max_batch': self.max_batch,
+            'rejected': self.rejected,
+        }
@@ -0,0 +1,97 @@
+"""
+Minimal stand-ins for the discord objects the game cogs use
+"""
+import discord
+
+from database.db_manager import DatabaseManager
+from utils.locks import UserLocks
+from utils.sessions import SessionStore
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.done = False
+    
+    def is_done(self) -> bool:
+        return self.done
+    
+    async def send_message(self, embed=None, view=None, ephemeral=False):
+        self.done = True
+        self.interaction.sent.append(embed)
+    
+    async def edit_message(self, embed=None, view=None):
+        self.done = True
+        self.interaction.sent.append(embed)
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+    
+    async def send(self, embed=None, ephemeral=False):
+        self.interaction.sent.append(embed)
+
+
+class FakeUser:
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.display_name = f"user{user_id}"
+        self.mention = f"<@{user_id}>"
+
+
+class FakeMessage:
+    def __init__(self, message_id: int):
+        self.id = message_id
+        self.embeds = []
+    
+    async def edit(self, embed=None, view=None):
+        self.embeds.append(embed)
+
+
+class FakeHTTPResponse:
+    status = 403
+    reason = "Forbidden"
+
+
+class FakeChannel:
+    """A channel whose messages can be sent, or fail to be (fail=True)"""
+    
+    def __init__(self, channel_id: int = 5, fail: bool = False):
+        self.id = channel_id
+        self.fail = fail
+        self.messages = []
+    
+    async def send(self, embed=None, view=None):
+        if self.fail:
+            raise discord.HTTPException(FakeHTTPResponse(), "Missing Permissions")
+        message = FakeMessage(len(self.messages) + 1)
+        self.messages.append(message)
+        return message
+
+
+class FakeInteraction:
+    def __init__(self, user_id: int, channel: FakeChannel = None, message_id: int = None):
+        self.user = FakeUser(user_id)
+        self.guild_id = 1
+        self.channel = channel or FakeChannel()
+        self.channel_id = self.channel.id
+        self.message = FakeMessage(message_id) if message_id is not None else None
+        self.client = None
+        self.sent = []
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+    
+    async def original_response(self) -> FakeMessage:
+        return FakeMessage(777)
+
+
+class FakeBot:
+    def __init__(self, db: DatabaseManager):
+        self.db = db
+        self.user_locks = UserLocks()
+        self.blackjack_sessions = SessionStore(60, 10)
+        self.cogs = {}
+    
+    def get_cog(self, name: str):
+        return self.cogs.get(name)
@@ -0,0 +1,37 @@
+"""
+Admin balance commands wait for the user's lock like games and gifts
+"""
+import asyncio
+
+from cogs.admin import Admin
+from database.db_manager import DatabaseManager
+from fakes import FakeBot, FakeInteraction, FakeUser
+
+
+async def admin_while_playing(db_path: str) -> tuple:
+    """Run /addcoins, /removecoins and /setbalance while a game holds the user's lock"""
+    db = DatabaseManager(db_path, shard_count=1)
+    await db.initialize()
+    try:
+        bot = FakeBot(db)
+        cog = Admin(bot)
+        target = FakeUser(42)
+        commands = [
+            cog.addcoins_command.callback(cog, FakeInteraction(1), target, 100),
+            cog.removecoins_command.callback(cog, FakeInteraction(1), target, 50),
+            cog.setbalance_command.callback(cog, FakeInteraction(1), target, 500),
+        ]
+        async with bot.user_locks.hold(42):
+            tasks = [asyncio.create_task(command) for command in commands]
+            await asyncio.sleep(0.2)
+            waiting = not any(task.done() for task in tasks)
+        await asyncio.gather(*tasks)
+        return waiting, await db.get_balance(42, guild_id=1)
+    finally:
+        await db.close()
+
+
+def test_admin_changes_take_the_user_lock(tmp_path):
+    waiting, balance = asyncio.run(admin_while_playing(str(tmp_path / "casino.db")))
+    assert waiting
+    assert balance == 500
@@ -0,0 +1,76 @@
+"""
+Interactive blackjack: full write queue and shoes kept in memory
+"""
+import asyncio
+
+import pytest
+
+import config
+from cogs.games import BlackjackButton, Games
+from database.db_manager import DatabaseManager
+from database.write_queue import DatabaseBusy
+from fakes import FakeBot, FakeInteraction
+
+
+async def escrow_failure(db_path: str) -> tuple:
+    """Start a round while open_escrow raises, then look at the store"""
+    db = DatabaseManager(db_path, shard_count=1)
+    await db.initialize()
+    try:
+        cog = Games(FakeBot(db))
+        
+        async def busy(*args, **kwargs):
+            raise DatabaseBusy("write queue is full")
+        
+        db.open_escrow = busy
+        with pytest.raises(DatabaseBusy):
+            await cog.blackjack_command.callback(cog, FakeInteraction(42), 100)
+        return 42 in cog.sessions, len(cog.sessions)
+    finally:
+        await db.close()
+
+
+def test_failed_escrow_frees_the_session(tmp_path):
+    assert asyncio.run(escrow_failure(str(tmp_path / "casino.db"))) == (False, 0)
+
+
+async def double_while_busy(db_path: str) -> tuple:
+    """Press Doubler while add_to_escrow raises: the player gets the busy message"""
+    db = DatabaseManager(db_path, shard_count=1)
+    await db.initialize()
+    try:
+        bot = FakeBot(db)
+        cog = bot.cogs['Games'] = Games(bot)
+        # A blackjack on the deal ends the round at once: deal until a round stays open
+        while 42 not in cog.sessions:
+            await cog.blackjack_command.callback(cog, FakeInteraction(42), 100)
+        
+        async def busy(*args, **kwargs):
+            raise DatabaseBusy("write queue is full")
+        
+        db.add_to_escrow = busy
+        interaction = FakeInteraction(42, message_id=777)
+        interaction.client = bot
+        await BlackjackButton('double').callback(interaction)
+        session = cog.sessions.get(42)
+        return [embed.title for embed in interaction.sent], session.game.stakes
+    finally:
+        await db.close()
+
+
+def test_busy_queue_is_answered_on_buttons(tmp_path):
+    titles, stakes = asyncio.run(double_while_busy(str(tmp_path / "casino.db")))
+    assert titles == ["⏳ Bot très sollicité"]
+    # The hand was not doubled
+    assert stakes == [1]
+
+
+def test_shoes_are_bounded(monkeypatch):
+    monkeypatch.setattr(config, 'BLACKJACK_MAX_SHOES', 2)
+    cog = Games(FakeBot(None))
+    first = cog._shoe(1)
+    cog._shoe(2)
+    # Channel 1 played again: channel 2 is now the least recently used
+    assert cog._shoe(1) is first
+    cog._shoe(3)
+    assert list(cog.shoes) == [1, 3]
@@ -0,0 +1,74 @@
+"""
+Crash rounds when a bet cannot be escrowed or the round message cannot be posted
+"""
+import asyncio
+
+import pytest
+
+import config
+from cogs.games import Games
+from database.db_manager import DatabaseManager
+from database.write_queue import DatabaseBusy
+from fakes import FakeBot, FakeChannel, FakeInteraction
+
+
+async def join_while_busy(db_path: str) -> tuple:
+    """Join a round while open_escrow raises, then look at the round"""
+    db = DatabaseManager(db_path, shard_count=1)
+    await db.initialize()
+    try:
+        cog = Games(FakeBot(db))
+        open_escrow = db.open_escrow
+        
+        async def busy(*args, **kwargs):
+            raise DatabaseBusy("write queue is full")
+        
+        db.open_escrow = busy
+        channel = FakeChannel()
+        with pytest.raises(DatabaseBusy):
+            await cog.crash_command.callback(cog, FakeInteraction(42, channel), 100)
+        crash_round = cog.crash_rounds[channel.id]
+        seated = 42 in crash_round.players
+        
+        # Once the queue drains, the same player can join the round
+        db.open_escrow = open_escrow
+        await cog.crash_command.callback(cog, FakeInteraction(42, channel), 100)
+        escrowed = crash_round.players[42].escrow_id is not None
+        crash_round.task.cancel()
+        return seated, escrowed
+    finally:
+        await db.close()
+
+
+def test_failed_escrow_frees_the_seat(tmp_path):
+    assert asyncio.run(join_while_busy(str(tmp_path / "casino.db"))) == (False, True)
+
+
+async def round_without_message(db_path: str) -> tuple:
+    """Join a round in a channel where the bot cannot post, then let the round end"""
+    db = DatabaseManager(db_path, shard_count=1)
+    await db.initialize()
+    try:
+        cog = Games(FakeBot(db))
+        channel = FakeChannel(fail=True)
+        for user_id in (42, 43):
+            await cog.crash_command.callback(cog, FakeInteraction(user_id, channel), 100)
+        crash_round = cog.crash_rounds[channel.id]
+        await asyncio.wait_for(crash_round.task, timeout=config.CRASH_BETTING_SECONDS)
+        
+        balances = [await db.get_balance(user_id, guild_id=1) for user_id in (42, 43)]
+        async with db.shards[0].pool.reader() as conn:
+            async with conn.execute("SELECT COUNT(*) FROM escrows") as cursor:
+                escrows = (await cursor.fetchone())[0]
+        stats = await db.get_global_stats(guild_id=1)
+        return balances, escrows, stats['total_games'], channel.id in cog.crash_rounds
+    finally:
+        await db.close()
+
+
+def test_round_without_message_is_refunded(tmp_path):
+    balances, escrows, games, open_round = asyncio.run(round_without_message(str(tmp_path / "casino.db")))
+    assert balances == [config.STARTING_BALANCE] * 2
+    assert escrows == 0
+    assert games == 0
+    assert not open_round
@@ -0,0 +1,34 @@
+"""
+Vérifie qu'un id de game_history n'est jamais réutilisé (les archives s'appuient dessus)
+"""
+import asyncio
+
+from database.db_manager import DatabaseManager
+
+
+async def ids_after_delete(db_path: str) -> tuple:
+    """Insère deux parties, supprime la dernière (comme /resetuser), puis en insère une autre"""
+    manager = DatabaseManager(db_path, shard_count=1)
+    await manager.initialize()
+    try:
+        insert = (
+            "INSERT INTO game_history (guild_id, user_id, game_code, bet_amount, result, timestamp) "
+            "VALUES (0, ?, 1, 10, 10, 0) RETURNING id"
+        )
+        async with manager.shards[0].pool.writer() as db:
+            ids = []
+            for user_id in (1, 2):
+                async with db.execute(insert, (user_id,)) as cursor:
+                    ids.append((await cursor.fetchone())[0])
+            await db.execute("DELETE FROM game_history WHERE user_id = 2")
+            async with db.execute(insert, (3,)) as cursor:
+                ids.append((await cursor.fetchone())[0])
+            await db.commit()
+        return tuple(ids)
+    finally:
+        await manager.close()
+
+
+def test_deleted_ids_are_not_reused(tmp_path):
+    first, deleted, new = asyncio.run(ids_after_delete(str(tmp_path / "casino.db")))
+    assert new > deleted > first
@@ -0,0 +1,96 @@
+"""
+Vérifie que les requêtes fréquentes utilisent bien les index créés par les migrations
+"""
+import asyncio
+import sqlite3
+
+import pytest
+
+from database.db_manager import MIGRATIONS, DatabaseManager
+
+# Schéma d'origine, avant toute migration (celui que la migration 1 indexe)
+ORIGINAL_SCHEMA = [
+    """
+    CREATE TABLE users (
+        user_id INTEGER PRIMARY KEY,
+        balance INTEGER DEFAULT 0,
+        total_won INTEGER DEFAULT 0,
+        total_lost INTEGER DEFAULT 0,
+        games_played INTEGER DEFAULT 0,
+        last_daily TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE game_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        game_type TEXT,
+        bet_amount INTEGER,
+        result INTEGER,
+        timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (user_id)
+    )
+    """,
+]
+
+
+def version_1_plan(query: str, params: tuple) -> str:
+    """Plan d'une requête sur le schéma d'origine après la migration 1 (index des requêtes fréquentes)"""
+    db = sqlite3.connect(":memory:")
+    try:
+        for statement in ORIGINAL_SCHEMA + MIGRATIONS[0]:
+            db.execute(statement)
+        rows = db.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+    finally:
+        db.close()
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+@pytest.mark.parametrize("query, params, index", [
+    # Statistiques par jeu d'un joueur (/stats)
+    ("SELECT game_type, COUNT(*) FROM game_history WHERE user_id = ? GROUP BY game_type", (1,), "idx_game_history_user_game"),
+    # Suppression de l'historique d'un joueur (/resetuser)
+    ("DELETE FROM game_history WHERE user_id = ?", (1,), "idx_game_history_user_game"),
+    # Jeu le plus populaire (/botstats)
+    ("SELECT game_type, COUNT(*) FROM game_history GROUP BY game_type", (), "idx_game_history_game_type"),
+    # Classement (/leaderboard)
+    ("SELECT user_id, balance FROM users ORDER BY balance DESC LIMIT 10", (), "idx_users_balance"),
+])
+def test_version_1_queries_use_indexes(query, params, index):
+    plan = version_1_plan(query, params)
+    assert index in plan, plan
+    # L'index donne déjà l'ordre ou les groupes: pas de tri temporaire
+    assert "USE TEMP B-TREE" not in plan, plan
+
+
+async def query_plan(db_path: str, query: str, params: tuple) -> str:
+    """Crée le schéma dans une base vide et renvoie le plan de la requête (EXPLAIN QUERY PLAN)"""
+    manager = DatabaseManager(db_path, shard_count=1)
+    await manager.initialize()
+    try:
+        async with manager.shards[0].pool.writer() as db:
+            async with db.execute(f"EXPLAIN QUERY PLAN {query}", params) as cursor:
+                rows = await cursor.fetchall()
+    finally:
+        await manager.close()
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+@pytest.mark.parametrize("query, params", [
+    # Historique d'un joueur par jeu (statistiques par jeu)
+    ("SELECT game_code, COUNT(*) FROM game_history WHERE guild_id = ? AND user_id = ? GROUP BY game_code", (0, 1)),
+    # Suppression de l'historique d'un joueur (/resetuser)
+    ("DELETE FROM game_history WHERE guild_id = ? AND user_id = ?", (0, 1)),
+])
+def test_history_uses_user_index(tmp_path, query, params):
+    plan = asyncio.run(query_plan(str(tmp_path / "casino.db"), query, params))
+    assert "idx_game_history_guild_user_game" in plan, plan
+
+
+def test_leaderboard_uses_balance_index(tmp_path):
+    query = "SELECT user_id, balance FROM users WHERE guild_id = ? ORDER BY balance DESC LIMIT 10"
+    plan = asyncio.run(query_plan(str(tmp_path / "casino.db"), query, (0,)))
+    assert "idx_users_guild_balance" in plan, plan
+    # L'index donne déjà l'ordre: pas de tri temporaire
+    assert "USE TEMP B-TREE" not in plan, plan
@@ -0,0 +1,23 @@
+"""
+Fermeture du pool de connexions
+"""
+import asyncio
+import os
+
+from database.db_manager import DatabaseManager
+
+
+async def close_after_writes(db_path: str) -> list:
+    """Écrit puis lit (les lecteurs ouvrent le WAL), ferme, et liste les fichiers restants"""
+    manager = DatabaseManager(db_path, shard_count=1)
+    await manager.initialize()
+    await manager.settle_bet(42, 'coinflip', 10, 10)
+    await manager.flush_history()
+    manager.cache.invalidate(0, 42)
+    await manager.get_balance(42)
+    await manager.close()
+    return sorted(os.listdir(os.path.dirname(db_path)))
+
+
+def test_close_leaves_no_wal(tmp_path):
+    assert asyncio.run(close_after_writes(str(tmp_path / "casino.db"))) == ["casino.db"]
@@ -0,0 +1,35 @@
+"""
+Vérifie qu'une remise à zéro ne laisse aucune partie d'avant dans l'historique
+"""
+import asyncio
+
+from database.db_manager import DatabaseManager
+
+
+async def reset_during_bets(db_path: str) -> tuple:
+    """Règle des paris, remet le joueur à zéro pendant qu'ils sont encore en file, puis compte ce qui reste"""
+    manager = DatabaseManager(db_path, shard_count=1)
+    await manager.initialize()
+    try:
+        user_id = 42
+        await manager.get_or_create_user(user_id)
+        # Les paris et la remise à zéro partent dans le même lot de la file d'écriture:
+        # les parties arrivent dans le tampon d'historique juste avant la remise à zéro
+        bets = [asyncio.create_task(manager.settle_bet(user_id, 'coinflip', 10, 10)) for _ in range(5)]
+        await asyncio.sleep(0)
+        await manager.reset_user(user_id)
+        await asyncio.gather(*bets)
+        await manager.flush_history()
+        
+        async with manager.shards[0].pool.writer() as db:
+            async with db.execute("SELECT COUNT(*) FROM game_history WHERE user_id = ?", (user_id,)) as cursor:
+                history = (await cursor.fetchone())[0]
+            async with db.execute("SELECT COUNT(*) FROM user_game_stats WHERE user_id = ?", (user_id,)) as cursor:
+                stats = (await cursor.fetchone())[0]
+        return history, stats
+    finally:
+        await manager.close()
+
+
+def test_reset_drops_buffered_history(tmp_path):
+    assert asyncio.run(reset_during_bets(str(tmp_path / "casino.db"))) == (0, 0)
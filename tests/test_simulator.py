@@ -0,0 +1,40 @@
+"""
+RTP regression test: the simulator against the tables of config.GAMES and the live code
+"""
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from utils.game_engine import GAMES, AliasTable
+from utils.simulator import all_games, check, simulate, table_game
+
+# Small and seeded: the check allows CHECK_Z standard errors, so the result is stable
+ROUNDS = 20_000
+LIVE_ROUNDS = 2_000
+SEED = 1234
+
+
+@pytest.mark.parametrize("game", all_games(), ids=lambda game: game.name)
+def test_simulated_rtp_matches_tables_and_live_code(game):
+    random.seed(SEED)
+    result = simulate(game, ROUNDS, np.random.default_rng(SEED))
+    assert check(game, result, live_rounds=LIVE_ROUNDS) == []
+
+
+@pytest.mark.parametrize("name, bet", [(name, bet) for name, game in GAMES.items() for bet in game.bets])
+def test_exact_rtp_is_the_table_rtp(name, bet):
+    assert table_game(GAMES[name], bet).exact(None) == pytest.approx(GAMES[name].rtp(bet))
+
+
+def test_alias_table_draws_with_the_weights():
+    weights = GAMES['slots'].weights
+    table = AliasTable(weights)
+    random.seed(SEED)
+    draws = 200_000
+    counts = np.bincount([table.sample() for _ in range(draws)], minlength=len(weights))
+    probabilities = np.array(weights, dtype=np.float64) / sum(weights)
+    # Each count within 5 standard deviations of its binomial expectation
+    spread = np.sqrt(draws * probabilities * (1 - probabilities))
+    assert np.all(np.abs(counts - draws * probabilities) <= 5 * spread + 1)
@@ -0,0 +1,28 @@
+"""
+Vérifie que la lecture d'un compte existant ne passe pas par la file d'écriture
+"""
+import asyncio
+
+import config
+from database.db_manager import DatabaseManager
+
+
+async def read_while_writer_busy(db_path: str) -> tuple:
+    """Lit un compte absent du cache pendant qu'une écriture tient la connexion d'écriture"""
+    manager = DatabaseManager(db_path, shard_count=1)
+    await manager.initialize()
+    try:
+        user_id = 42
+        await manager.get_or_create_user(user_id)
+        manager.cache.invalidate(0, user_id)
+        async with manager.shards[0].pool.writer():
+            balance = await asyncio.wait_for(manager.get_balance(user_id), timeout=2)
+        return balance, manager.cache.get(0, user_id) is not None
+    finally:
+        await manager.close()
+
+
+def test_existing_user_read_skips_writer(tmp_path):
+    balance, cached = asyncio.run(read_while_writer_busy(str(tmp_path / "casino.db")))
+    assert balance == config.STARTING_BALANCE
+    assert cached
@@ -0,0 +1,40 @@
+"""
+Effets en mémoire (defer) d'un lot de la file d'écriture
+"""
+import asyncio
+
+from database.db_manager import DatabaseManager
+
+
+async def batch_with_failing_callback(db_path: str) -> tuple:
+    """Un lot de trois opérations dont la première enregistre un effet en mémoire qui échoue"""
+    manager = DatabaseManager(db_path, shard_count=1)
+    await manager.initialize()
+    applied = []
+    
+    def broken():
+        raise RuntimeError("broken callback")
+    
+    def make_operation(index: int):
+        async def operation(db, defer):
+            await db.execute("UPDATE global_stats SET total_games = total_games + 1")
+            if index == 0:
+                defer(broken)
+            defer(applied.append, index)
+            return index
+        return operation
+    
+    try:
+        writes = manager.shards[0].writes
+        batches = writes.batches
+        results = await asyncio.gather(*(writes.submit(make_operation(index)) for index in range(3)))
+        return results, applied, writes.batches - batches
+    finally:
+        await manager.close()
+
+
+def test_failing_callback_does_not_fail_the_batch(tmp_path):
+    results, applied, batches = asyncio.run(batch_with_failing_callback(str(tmp_path / "casino.db")))
+    assert batches == 1
+    assert results == [0, 1, 2]
+    assert applied == [0, 1, 2]
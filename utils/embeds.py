@@ -71,6 +71,15 @@ def error_embed(title: str, description: str) -> discord.Embed:
     """
     return create_embed(title, description, config.COLOR_ERROR)
 
+def busy_embed() -> discord.Embed:
+    """
+    Crée l'embed envoyé quand la file d'écriture de la base est pleine (DatabaseBusy)
+    
+    Returns:
+        Un embed rouge qui invite à réessayer
+    """
+    return error_embed("⏳ Bot très sollicité", "Trop d'opérations en cours, réessayez dans quelques secondes.")
+
 def info_embed(title: str, description: str) -> discord.Embed:
     """
     Crée un embed d'information (bleu)
@@ -172,32 +181,43 @@ def game_result_embed(game_name: str, won: bool, bet: int, payout: int, new_bala
     )
     return embed
 
-def leaderboard_embed(leaderboard_data: list, bot) -> discord.Embed:
+def leaderboard_embed(leaderboard_data: list, bot, page: int = 1, total_pages: int = 1) -> discord.Embed:
     """
     Crée un embed pour afficher le classement des joueurs
     
-    Affiche les 10 joueurs les plus riches avec leurs statistiques.
-    Les 3 premiers ont des médailles (🥇🥈🥉).
+    Affiche une page de 10 joueurs avec leurs statistiques.
+    Les 3 premiers du classement ont des médailles (🥇🥈🥉).
     
     Args:
         leaderboard_data: Liste de tuples (user_id, balance, total_won, total_lost, games_played)
         bot: L'instance du bot (pour récupérer les noms des utilisateurs)
+        page: Le numéro de la page affichée (1 = top 10)
+        total_pages: Le nombre total de pages
         
     Returns:
         Un embed avec le classement
     """
+    if page == 1:
+        description = "Top 10 des joueurs les plus riches"
+    else:
+        description = f"Joueurs les plus riches, page {page}"
+    
     embed = discord.Embed(
         title=f"{config.EMOJI_CHART} Classement des joueurs",
-        description="Top 10 des joueurs les plus riches",
+        description=description,
         color=config.COLOR_GAMBLING,
         timestamp=datetime.now()
     )
+    embed.set_footer(text=f"Page {page}/{total_pages}")
+    
+    # Rang du premier joueur de la page
+    first_rank = (page - 1) * 10 + 1
     
     # Médailles pour les 3 premiers
     medals = ["🥇", "🥈", "🥉"]
     
     # Parcourt chaque joueur dans le classement
-    for idx, (user_id, balance, total_won, total_lost, games_played) in enumerate(leaderboard_data, 1):
+    for idx, (user_id, balance, total_won, total_lost, games_played) in enumerate(leaderboard_data, first_rank):
         # Détermine la médaille ou le numéro
         medal = medals[idx - 1] if idx <= 3 else f"**{idx}.**"
         
@@ -214,6 +234,29 @@ def leaderboard_embed(leaderboard_data: list, bot) -> discord.Embed:
     
     return embed
 
+def rank_embed(user: discord.User, rank: dict) -> discord.Embed:
+    """
+    Crée un embed pour afficher la position d'un utilisateur dans le classement
+    
+    Args:
+        user: L'objet utilisateur Discord
+        rank: Dictionnaire {'rank', 'total', 'balance'} (voir DatabaseManager.get_rank)
+        
+    Returns:
+        Un embed affichant le rang
+    """
+    embed = discord.Embed(
+        title=f"{config.EMOJI_CHART} Rang de {user.display_name}",
+        description=(
+            f"**#{rank['rank']:,}** sur {rank['total']:,} joueurs\n"
+            f"{config.EMOJI_COIN} **{rank['balance']:,}** coins"
+        ),
+        color=config.COLOR_GAMBLING,
+        timestamp=datetime.now()
+    )
+    embed.set_thumbnail(url=user.display_avatar.url)
+    return embed
+
 def stats_embed(user: discord.User, stats: dict) -> discord.Embed:
     """
     Crée un embed pour afficher les statistiques détaillées d'un utilisateur
@@ -223,8 +266,9 @@ def stats_embed(user: discord.User, stats: dict) -> discord.Embed:
     - Nombre de parties jouées
     - Profit net
     - Total gagné et perdu
+    - Total misé et plus gros gain
     - Taux de réussite
-    - Répartition des jeux joués
+    - Détail par jeu (parties, mises, profit)
     
     Args:
         user: L'objet utilisateur Discord
@@ -291,10 +335,28 @@ def stats_embed(user: discord.User, stats: dict) -> discord.Embed:
             inline=True
         )
     
-    # Répartition des jeux joués
-    if stats['game_counts']:
-        # Crée une liste formatée des jeux joués
-        games_text = "\n".join([f"• {game}: {count} parties" for game, count in stats['game_counts'].items()])
+    # Total misé
+    embed.add_field(
+        name="💰 Total misé",
+        value=f"**{stats['total_wagered']:,}** coins",
+        inline=True
+    )
+    
+    # Plus gros gain en une seule partie
+    embed.add_field(
+        name="🏆 Plus gros gain",
+        value=f"**{stats['biggest_win']:,}** coins",
+        inline=True
+    )
+    
+    # Détail par jeu
+    if stats['games']:
+        # Crée une liste formatée des jeux joués: parties, mises et profit net
+        games_text = "\n".join([
+            f"• {game}: {detail['games']} parties, {detail['wagered']:,} misés, "
+            f"{detail['won'] - detail['lost']:+,} coins"
+            for game, detail in stats['games'].items()
+        ])
         embed.add_field(
             name="🎲 Jeux joués",
             value=games_text,
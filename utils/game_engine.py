@@ -0,0 +1,206 @@
+"""
+Data-driven game engine for the gambling bot
+Builds the fixed-outcome games declared in config.GAMES: every game becomes a flat
+table of outcomes with an alias sampler and pre-rendered result strings
+"""
+import itertools
+import random
+from typing import Dict, List, Optional, Tuple
+
+import config
+
+# Codes reserved for games that are not declared in config.GAMES (blackjack, crash)
+RESERVED_CODES = {5: 'blackjack', 6: 'crash'}
+
+
+class AliasTable:
+    """
+    Walker/Vose alias table: draws an index with the given weights in O(1)
+    
+    Built once in O(n); each draw costs one random number, one multiplication
+    and one comparison, whatever the number of outcomes.
+    """
+    
+    __slots__ = ('size', 'probability', 'alias')
+    
+    def __init__(self, weights: List[float]):
+        total = float(sum(weights))
+        if not weights or total <= 0 or any(weight < 0 for weight in weights):
+            raise ValueError("weights must be non-negative with a positive total")
+            
+        self.size = len(weights)
+        scaled = [weight * self.size / total for weight in weights]
+        self.probability = [1.0] * self.size
+        self.alias = list(range(self.size))
+        small = [index for index, value in enumerate(scaled) if value < 1.0]
+        large = [index for index, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            low, high = small.pop(), large.pop()
+            self.probability[low] = scaled[low]
+            self.alias[low] = high
+            scaled[high] += scaled[low] - 1.0
+            (small if scaled[high] < 1.0 else large).append(high)
+        # What is left is 1.0 up to rounding errors: keeps probability 1.0
+    
+    def sample(self) -> int:
+        """Draw an index"""
+        position = random.random() * self.size
+        index = int(position)
+        return index if position - index < self.probability[index] else self.alias[index]
+
+
+class TableGame:
+    """
+    A game whose rounds draw one outcome from a fixed table
+    
+    For each bet, multipliers[bet][i] and details[bet][i] give the multiplier and the
+    result text of outcome i, so a round is one alias draw and two list lookups.
+    Games without bets have a single bet, None.
+    """
+    
+    __slots__ = ('name', 'code', 'title', 'emoji', 'description', 'bets', 'weights',
+                 'multipliers', 'details', '_sampler')
+    
+    def __init__(self, name: str, spec: dict, outcomes: List[Tuple[float, str, Dict[Optional[str], float]]]):
+        """
+        Args:
+            name: Game type stored in the history (key of config.GAMES)
+            spec: The game declaration from config.GAMES
+            outcomes: (weight, text, {bet: multiplier}) for every outcome
+        """
+        self.name = name
+        self.code = spec['code']
+        self.title = spec.get('title', name.capitalize())
+        self.emoji = spec.get('emoji', "🎮")
+        self.description = spec.get('description', self.title)
+        self.bets: Dict[Optional[str], str] = {
+            bet: info.get('label', bet) for bet, info in spec.get('bets', {}).items()
+        } or {None: self.title}
+        self.weights = [weight for weight, _, _ in outcomes]
+        self._sampler = AliasTable(self.weights)
+        
+        jackpot = spec.get('jackpot')
+        self.multipliers: Dict[Optional[str], List[float]] = {}
+        self.details: Dict[Optional[str], List[str]] = {}
+        for bet, label in self.bets.items():
+            prefix = f"{self.emoji} Votre pari: **{label}**\nRésultat: " if bet is not None else f"{self.emoji} "
+            self.multipliers[bet] = []
+            self.details[bet] = []
+            for _, text, payouts in outcomes:
+                multiplier = payouts.get(bet, 0)
+                detail = prefix + text
+                if multiplier > 0:
+                    detail += f"\nMultiplicateur: **x{multiplier}**"
+                    if jackpot and multiplier >= jackpot:
+                        detail += " 🎊 **JACKPOT!** 🎊"
+                self.multipliers[bet].append(multiplier)
+                self.details[bet].append(detail)
+    
+    def play(self, bet: Optional[str] = None) -> Tuple[float, str]:
+        """
+        Play one round
+        Returns (multiplier, details); multiplier 0 means the bet is lost
+        """
+        index = self._sampler.sample()
+        return self.multipliers[bet][index], self.details[bet][index]
+    
+    def rtp(self, bet: Optional[str] = None) -> float:
+        """Exact return to player of a bet (share of the bet given back on average)"""
+        return sum(w * m for w, m in zip(self.weights, self.multipliers[bet])) / sum(self.weights)
+
+
+class CrashCurve:
+    """Crash point distribution: an alias draw of the band, then a uniform point inside it"""
+    
+    __slots__ = ('bands', '_sampler')
+    
+    def __init__(self, bands: List[Tuple[float, float, float]]):
+        self.bands = [(low, high - low) for _, low, high in bands]
+        self._sampler = AliasTable([probability for probability, _, _ in bands])
+    
+    def sample(self) -> float:
+        """Draw a crash point"""
+        low, width = self.bands[self._sampler.sample()]
+        return low + width * random.random()
+
+
+def _outcomes(name: str, spec: dict) -> List[Tuple[float, str, Dict[Optional[str], float]]]:
+    """Expand a game declaration into its flat list of (weight, text, {bet: multiplier})"""
+    kind = spec.get('kind', 'outcomes')
+    bets = list(spec.get('bets', {})) or [None]
+    
+    if kind == 'outcomes':
+        return [
+            (weight, text, payouts if isinstance(payouts, dict) else dict.fromkeys(bets, payouts))
+            for weight, text, payouts in spec['outcomes']
+        ]
+        
+    if kind == 'dice':
+        multipliers = spec['multipliers']
+        outcomes = []
+        for roll in itertools.product(range(1, spec['sides'] + 1), repeat=spec['dice']):
+            total = sum(roll)
+            text = f"Dés: {' + '.join(f'**{die}**' for die in roll)} = **{total}**"
+            outcomes.append((1, text, dict.fromkeys(bets, multipliers.get(total, 0))))
+        return outcomes
+        
+    if kind == 'reels':
+        symbols = spec['symbols']
+        outcomes = []
+        for combination in itertools.product(symbols, repeat=spec['reels']):
+            weight = 1
+            for symbol in combination:
+                weight *= symbols[symbol]
+            if len(set(combination)) == 1:
+                multiplier = spec['all_match'].get(combination[0], 0)
+            elif len(set(combination)) < len(combination):
+                multiplier = spec.get('pair', 0)
+            else:
+                multiplier = 0
+            outcomes.append((weight, f"**{' | '.join(combination)}**", dict.fromkeys(bets, multiplier)))
+        return outcomes
+        
+    if kind == 'wheel':
+        red = set(spec['red'])
+        winners = {bet: set(info['numbers']) for bet, info in spec['bets'].items()}
+        outcomes = []
+        for number in range(spec['numbers']):
+            if number == 0:
+                text = f"🟢 {number} (Vert)"
+            elif number in red:
+                text = f"🔴 {number} (Rouge, {'pair' if number % 2 == 0 else 'impair'})"
+            else:
+                text = f"⚫ {number} (Noir, {'pair' if number % 2 == 0 else 'impair'})"
+            payouts = {bet: spec['bets'][bet]['multiplier'] for bet in bets if number in winners[bet]}
+            outcomes.append((1, text, payouts))
+        return outcomes
+        
+    raise ValueError(f"Game {name!r}: unknown kind {kind!r}")
+
+
+def load_games(specs: Dict[str, dict]) -> Dict[str, TableGame]:
+    """
+    Build every game of config.GAMES
+    
+    Raises:
+        ValueError: if a declaration is invalid (missing field, duplicate or reserved code...)
+    """
+    games = {}
+    codes = dict(RESERVED_CODES)
+    for name, spec in specs.items():
+        code = spec.get('code')
+        if not isinstance(code, int) or not 1 <= code <= 999:
+            raise ValueError(f"Game {name!r}: 'code' must be an integer between 1 and 999")
+        if code in codes:
+            raise ValueError(f"Game {name!r}: code {code} is already used by {codes[code]!r}")
+        codes[code] = name
+        try:
+            games[name] = TableGame(name, spec, _outcomes(name, spec))
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Game {name!r}: invalid declaration ({e!r})") from None
+    return games
+
+
+# The games of config.GAMES, built once at import time
+GAMES = load_games(config.GAMES)
+CRASH = CrashCurve(config.CRASH_BANDS)
@@ -2,9 +2,21 @@
 Helper functions for the gambling bot
 """
 import random
-from typing import Tuple, List
+from typing import List, Optional, Tuple
 import config
 
+# Blackjack rules, shared with the RTP simulator (utils/simulator.py)
+# The fixed-outcome games are declared in config.GAMES (see utils/game_engine.py)
+# A card is an integer code: suit * 13 + rank (0 = ace, 12 = king)
+CARD_SUITS = ['♠️', '♥️', '♦️', '♣️']
+CARD_RANKS = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
+RANK_VALUES = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10]  # Hard values: an ace counts 1
+CARD_NAMES = [f"{rank}{suit}" for suit in CARD_SUITS for rank in CARD_RANKS]  # Only used for display
+BLACKJACK_STAND = 17  # The dealer hits below this value (and the simulator's reference player)
+BLACKJACK_NATURAL_MULTIPLIER = 2.5
+BLACKJACK_WIN_MULTIPLIER = 2
+BLACKJACK_PUSH_MULTIPLIER = 1
+
 def validate_bet(balance: int, bet: int) -> Tuple[bool, str]:
     """
     Validate if a bet is valid
@@ -21,223 +33,231 @@ def validate_bet(balance: int, bet: int) -> Tuple[bool, str]:
     
     return True, ""
 
-def coinflip(choice: str) -> Tuple[bool, str]:
+class Shoe:
     """
-    Simulate a coinflip
-    Returns (won, result)
+    Multi-deck blackjack shoe, stored as a byte array of card codes
+    
+    Cards are dealt by moving a position forward: dealing allocates nothing.
+    Once the cut card has come out, the shoe is reshuffled before the next hand.
     """
-    result = random.choice(['pile', 'face'])
-    won = result == choice.lower()
-    return won, result
-
-def roll_dice(num_dice: int = 2) -> List[int]:
-    """Roll dice and return results"""
-    return [random.randint(1, 6) for _ in range(num_dice)]
+    
+    __slots__ = ('cards', 'position', 'cut')
+    
+    def __init__(self, decks: int = config.BLACKJACK_DECKS, penetration: float = config.BLACKJACK_PENETRATION):
+        self.cards = bytearray(range(len(CARD_NAMES))) * max(1, decks)
+        self.cut = int(len(self.cards) * penetration)
+        self.position = 0
+        self.shuffle()
+    
+    def shuffle(self):
+        """Shuffle every card back into the shoe"""
+        random.shuffle(self.cards)
+        self.position = 0
+    
+    def start_hand(self):
+        """Reshuffle if the cut card came out during the previous hand"""
+        if self.position >= self.cut:
+            self.shuffle()
+    
+    def draw(self) -> int:
+        """Deal the next card code"""
+        if self.position >= len(self.cards):
+            # Only with a cut card at the very end of the shoe
+            self.shuffle()
+        card = self.cards[self.position]
+        self.position += 1
+        return card
 
-def spin_slots() -> Tuple[List[str], int]:
+class Hand:
     """
-    Spin slot machine
-    Returns (symbols, multiplier)
+    Blackjack hand tracked incrementally: hard total (aces count 1) and number of aces
+    The value counts one ace as 11 when that does not bust the hand
     """
-    symbols = ['🍒', '🍋', '🍊', '🍇', '💎', '7️⃣']
-    weights = [30, 25, 20, 15, 8, 2]  # Probability weights
-    
-    result = random.choices(symbols, weights=weights, k=3)
-    
-    # Calculate multiplier
-    if result[0] == result[1] == result[2]:
-        # All three match
-        if result[0] == '7️⃣':
-            multiplier = 50  # Jackpot!
-        elif result[0] == '💎':
-            multiplier = 20
-        elif result[0] == '🍇':
-            multiplier = 10
-        elif result[0] == '🍊':
-            multiplier = 5
-        elif result[0] == '🍋':
-            multiplier = 3
-        else:  # 🍒
-            multiplier = 2
-    elif result[0] == result[1] or result[1] == result[2] or result[0] == result[2]:
-        # Two match
-        multiplier = 1.5
-    else:
-        # No match
-        multiplier = 0
-    
-    return result, multiplier
+    
+    __slots__ = ('cards', 'hard', 'aces')
+    
+    def __init__(self):
+        self.cards: List[int] = []
+        self.hard = 0
+        self.aces = 0
+    
+    def add(self, card: int):
+        """Add a card code to the hand"""
+        self.cards.append(card)
+        rank = card % 13
+        self.hard += RANK_VALUES[rank]
+        if rank == 0:
+            self.aces += 1
+    
+    @property
+    def soft(self) -> bool:
+        """True when an ace counts as 11"""
+        return self.aces > 0 and self.hard <= 11
+    
+    @property
+    def value(self) -> int:
+        """Best total of the hand"""
+        return self.hard + 10 if self.soft else self.hard
+    
+    def __str__(self) -> str:
+        return ' '.join(CARD_NAMES[card] for card in self.cards)
 
-def spin_roulette(bet_type: str, bet_value: str = None) -> Tuple[bool, int, str]:
+class BlackjackGame:
     """
-    Spin roulette wheel
-    Returns (won, multiplier, result_description)
+    Interactive blackjack round dealt from a shoe
+    
+    The player plays each of their hands in turn (hit, stand, double, split), then
+    the dealer draws to BLACKJACK_STAND. A hand stops by itself at 21 or more.
+    stakes[i] is the stake of hands[i] in units of the initial bet (2 once doubled).
     """
-    number = random.randint(0, 36)
-    
-    # Determine color
-    if number == 0:
-        color = 'green'
-    elif number in [1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36]:
-        color = 'red'
-    else:
-        color = 'black'
-    
-    bet_type = bet_type.lower()
-    
-    # Check win conditions
-    if bet_type == 'rouge' or bet_type == 'red':
-        won = color == 'red'
-        multiplier = 2 if won else 0
-        result = f"🔴 {number} (Rouge)" if color == 'red' else f"⚫ {number} (Noir)" if color == 'black' else f"🟢 {number} (Vert)"
-    
-    elif bet_type == 'noir' or bet_type == 'black':
-        won = color == 'black'
-        multiplier = 2 if won else 0
-        result = f"⚫ {number} (Noir)" if color == 'black' else f"🔴 {number} (Rouge)" if color == 'red' else f"🟢 {number} (Vert)"
-    
-    elif bet_type == 'vert' or bet_type == 'green':
-        won = color == 'green'
-        multiplier = 36 if won else 0
-        result = f"🟢 {number} (Vert)"
-    
-    elif bet_type == 'pair' or bet_type == 'even':
-        won = number % 2 == 0 and number != 0
-        multiplier = 2 if won else 0
-        result = f"Le numéro {number} est {'pair' if number % 2 == 0 else 'impair'}"
-    
-    elif bet_type == 'impair' or bet_type == 'odd':
-        won = number % 2 == 1
-        multiplier = 2 if won else 0
-        result = f"Le numéro {number} est {'impair' if number % 2 == 1 else 'pair'}"
-    
-    else:
-        won = False
-        multiplier = 0
-        result = f"Type de pari invalide"
-    
-    return won, multiplier, result
-
-class BlackjackGame:
-    """Simple Blackjack game logic"""
     
-    def __init__(self):
-        self.deck = self._create_deck()
-        self.player_hand = []
-        self.dealer_hand = []
-    
-    def _create_deck(self) -> List[Tuple[str, int]]:
-        """Create a deck of cards"""
-        suits = ['♠️', '♥️', '♦️', '♣️']
-        ranks = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
-        values = [11, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10]
-        
-        deck = []
-        for suit in suits:
-            for rank, value in zip(ranks, values):
-                deck.append((f"{rank}{suit}", value))
-        
-        random.shuffle(deck)
-        return deck
+    __slots__ = ('shoe', 'hands', 'stakes', 'active', 'dealer_hand', 'finished')
     
-    def deal_card(self) -> Tuple[str, int]:
-        """Deal a card from the deck"""
-        return self.deck.pop()
+    def __init__(self, shoe: Optional[Shoe] = None):
+        """
+        shoe: the shoe of the channel (a fresh shoe when None)
+        """
+        self.shoe = shoe or Shoe()
+        self.hands: List[Hand] = [Hand()]
+        self.stakes: List[int] = [1]
+        self.active = 0
+        self.dealer_hand = Hand()
+        self.finished = False
     
-    def calculate_hand_value(self, hand: List[Tuple[str, int]]) -> int:
-        """Calculate the value of a hand"""
-        value = sum(card[1] for card in hand)
-        aces = sum(1 for card in hand if card[0].startswith('A'))
-        
-        # Adjust for aces
-        while value > 21 and aces > 0:
-            value -= 10
-            aces -= 1
-        
-        return value
+    def deal_card(self, hand: Hand):
+        """Deal a card from the shoe to a hand"""
+        hand.add(self.shoe.draw())
+    
+    def deal(self):
+        """Initial deal; a player blackjack ends the round at once"""
+        self.shoe.start_hand()
+        player = self.hands[0]
+        for hand in (player, player, self.dealer_hand, self.dealer_hand):
+            self.deal_card(hand)
+        if player.value == 21:
+            self.finished = True
+    
+    @property
+    def hand(self) -> Hand:
+        """The hand being played"""
+        return self.hands[self.active]
+    
+    def is_natural(self, hand: Hand) -> bool:
+        """Blackjack: 21 with the first two cards (not after a split)"""
+        return len(self.hands) == 1 and len(hand.cards) == 2 and hand.value == 21
+    
+    def can_double(self) -> bool:
+        return not self.finished and len(self.hand.cards) == 2
+    
+    def can_split(self) -> bool:
+        cards = self.hand.cards
+        return (not self.finished and len(cards) == 2 and len(self.hands) < config.BLACKJACK_MAX_HANDS
+                and RANK_VALUES[cards[0] % 13] == RANK_VALUES[cards[1] % 13])
+    
+    def hit(self):
+        """Draw a card on the current hand"""
+        self.deal_card(self.hand)
+        if self.hand.value >= 21:
+            self._next_hand()
     
-    def hand_to_string(self, hand: List[Tuple[str, int]]) -> str:
-        """Convert hand to readable string"""
-        return ' '.join(card[0] for card in hand)
+    def stand(self):
+        """Keep the current hand"""
+        self._next_hand()
     
-    def play(self) -> Tuple[bool, str, int]:
+    def double(self):
+        """Double the stake of the current hand, draw exactly one card and stand"""
+        self.stakes[self.active] *= 2
+        self.deal_card(self.hand)
+        self._next_hand()
+    
+    def split(self):
         """
-        Play a game of blackjack
-        Returns (won, description, multiplier)
+        Split a pair into two hands with the same stake, each getting a second card
+        Split aces get one card each and stand
         """
-        # Initial deal
-        self.player_hand = [self.deal_card(), self.deal_card()]
-        self.dealer_hand = [self.deal_card(), self.deal_card()]
-        
-        player_value = self.calculate_hand_value(self.player_hand)
-        dealer_value = self.calculate_hand_value(self.dealer_hand)
-        
-        description = f"**Votre main:** {self.hand_to_string(self.player_hand)} (Valeur: {player_value})\n"
-        description += f"**Main du croupier:** {self.dealer_hand[0][0]} + ?\n\n"
-        
-        # Check for player blackjack
-        if player_value == 21:
-            description += f"**Main du croupier:** {self.hand_to_string(self.dealer_hand)} (Valeur: {dealer_value})\n"
-            if dealer_value == 21:
-                description += "**Égalité!** Vous et le croupier avez un Blackjack!"
-                return False, description, 1  # Push, return bet
+        first, second = Hand(), Hand()
+        first.add(self.hand.cards[0])
+        second.add(self.hand.cards[1])
+        self.hands[self.active:self.active + 1] = [first, second]
+        self.stakes.insert(self.active + 1, self.stakes[self.active])
+        self.deal_card(first)
+        self.deal_card(second)
+        if first.cards[0] % 13 == 0:
+            self.active += 1
+            self._next_hand()
+        elif first.value == 21:
+            self._next_hand()
+    
+    def stand_all(self):
+        """Stand on every remaining hand (abandoned round)"""
+        while not self.finished:
+            self._next_hand()
+    
+    def _next_hand(self):
+        """Move to the next hand still to play, or let the dealer play"""
+        self.active += 1
+        while self.active < len(self.hands) and self.hands[self.active].value >= 21:
+            self.active += 1
+        if self.active < len(self.hands):
+            return
+        self.active = len(self.hands) - 1
+        # The dealer only draws if a hand can still win
+        if any(hand.value <= 21 for hand in self.hands):
+            while self.dealer_hand.value < BLACKJACK_STAND:
+                self.deal_card(self.dealer_hand)
+        self.finished = True
+    
+    def multipliers(self) -> List[float]:
+        """Multiplier of each hand's stake once the round is finished (0 = lost)"""
+        dealer_value = self.dealer_hand.value
+        results = []
+        for hand in self.hands:
+            value = hand.value
+            if self.is_natural(hand):
+                dealer_natural = len(self.dealer_hand.cards) == 2 and dealer_value == 21
+                results.append(BLACKJACK_PUSH_MULTIPLIER if dealer_natural else BLACKJACK_NATURAL_MULTIPLIER)
+            elif value > 21 or value < dealer_value <= 21:
+                results.append(0)
+            elif value == dealer_value:
+                results.append(BLACKJACK_PUSH_MULTIPLIER)
             else:
-                description += "**BLACKJACK!** 🎉"
-                return True, description, 2.5
-        
-        # Player hits until 17 or bust (simplified auto-play)
-        while player_value < 17:
-            card = self.deal_card()
-            self.player_hand.append(card)
-            player_value = self.calculate_hand_value(self.player_hand)
-        
-        description = f"**Votre main:** {self.hand_to_string(self.player_hand)} (Valeur: {player_value})\n"
-        
-        # Check for player bust
-        if player_value > 21:
-            description += f"**Main du croupier:** {self.hand_to_string(self.dealer_hand)} (Valeur: {dealer_value})\n"
-            description += "**Vous avez dépassé 21!** Vous perdez."
-            return False, description, 0
-        
-        # Dealer plays
-        while dealer_value < 17:
-            card = self.deal_card()
-            self.dealer_hand.append(card)
-            dealer_value = self.calculate_hand_value(self.dealer_hand)
-        
-        description += f"**Main du croupier:** {self.hand_to_string(self.dealer_hand)} (Valeur: {dealer_value})\n\n"
+                results.append(BLACKJACK_WIN_MULTIPLIER)
+        return results
+    
+    def payout(self, bet: int) -> int:
+        """Coins given back for an initial bet once the round is finished (stakes included)"""
+        return sum(int(bet * stake * multiplier) for stake, multiplier in zip(self.stakes, self.multipliers()))
+    
+    def describe(self) -> str:
+        """Hands as shown in the embed; the dealer's second card stays hidden until the end"""
+        lines = []
+        for index, (hand, stake) in enumerate(zip(self.hands, self.stakes)):
+            name = "Votre main" if len(self.hands) == 1 else f"Main {index + 1}"
+            marker = "▶️ " if not self.finished and len(self.hands) > 1 and index == self.active else ""
+            doubled = " (doublée)" if stake > 1 else ""
+            lines.append(f"{marker}**{name}:** {hand} (Valeur: {hand.value}){doubled}")
+        if not self.finished:
+            lines.append(f"**Main du croupier:** {CARD_NAMES[self.dealer_hand.cards[0]]} + ?")
+            return '\n'.join(lines)
         
-        # Determine winner
-        if dealer_value > 21:
-            description += "**Le croupier a dépassé 21!** Vous gagnez! 🎉"
-            return True, description, 2
-        elif player_value > dealer_value:
-            description += "**Vous gagnez!** 🎉"
-            return True, description, 2
-        elif player_value < dealer_value:
-            description += "**Le croupier gagne!** Vous perdez."
-            return False, description, 0
-        else:
-            description += "**Égalité!** Votre mise est retournée."
-            return False, description, 1  # Push, return bet
-
-def crash_game(cashout_multiplier: float) -> Tuple[bool, float]:
-    """
-    Simulate a crash game
-    Returns (won, crash_point)
-    """
-    # Generate crash point with weighted probability
-    # Lower multipliers are more common
-    rand = random.random()
-    
-    if rand < 0.33:
-        crash_point = random.uniform(1.0, 2.0)
-    elif rand < 0.66:
-        crash_point = random.uniform(2.0, 5.0)
-    elif rand < 0.90:
-        crash_point = random.uniform(5.0, 10.0)
-    else:
-        crash_point = random.uniform(10.0, 50.0)
-    
-    won = cashout_multiplier <= crash_point
-    return won, round(crash_point, 2)
+        lines.append(f"**Main du croupier:** {self.dealer_hand} (Valeur: {self.dealer_hand.value})\n")
+        for index, (hand, multiplier) in enumerate(zip(self.hands, self.multipliers())):
+            prefix = f"Main {index + 1}: " if len(self.hands) > 1 else ""
+            lines.append(prefix + self._outcome(hand, multiplier))
+        return '\n'.join(lines)
+    
+    def _outcome(self, hand: Hand, multiplier: float) -> str:
+        """Result line of a finished hand"""
+        if self.is_natural(hand):
+            if multiplier == BLACKJACK_PUSH_MULTIPLIER:
+                return "**Égalité!** Vous et le croupier avez un Blackjack!"
+            return "**BLACKJACK!** 🎉"
+        if hand.value > 21:
+            return "**Vous avez dépassé 21!** Vous perdez."
+        if self.dealer_hand.value > 21:
+            return "**Le croupier a dépassé 21!** Vous gagnez! 🎉"
+        if multiplier == BLACKJACK_WIN_MULTIPLIER:
+            return "**Vous gagnez!** 🎉"
+        if multiplier == BLACKJACK_PUSH_MULTIPLIER:
+            return "**Égalité!** Votre mise est retournée."
+        return "**Le croupier gagne!** Vous perdez."
@@ -0,0 +1,66 @@
+"""
+Per-user locks for the gambling bot
+Serializes the commands of one user without blocking the others
+"""
+import asyncio
+import time
+import weakref
+from contextlib import asynccontextmanager
+
+class UserLocks:
+    """
+    Registry of one asyncio.Lock per user
+    
+    Locks are kept in a WeakValueDictionary: a lock only lives while a command
+    holds or waits for it, so the registry never grows past the number of
+    users currently playing.
+    """
+    
+    def __init__(self):
+        self._locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self.acquisitions = 0
+        self.contended = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+    
+    def __len__(self) -> int:
+        return len(self._locks)
+    
+    @asynccontextmanager
+    async def hold(self, user_id: int):
+        """
+        Hold the lock of a user for the duration of the block
+        
+        Example:
+            async with locks.hold(user_id):
+                balance = await db.get_balance(user_id)
+                ...
+        """
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[user_id] = lock
+            
+        if lock.locked():
+            self.contended += 1
+        start = time.perf_counter()
+        async with lock:
+            waited = time.perf_counter() - start
+            self.acquisitions += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            yield
+    
+    def stats(self) -> dict:
+        """
+        Lock registry statistics
+        Returns {'active', 'acquisitions', 'contended', 'contention_rate', 'avg_wait_ms', 'max_wait_ms'}
+        """
+        return {
+            'active': len(self._locks),
+            'acquisitions': self.acquisitions,
+            'contended': self.contended,
+            'contention_rate': self.contended / self.acquisitions if self.acquisitions else 0.0,
+            'avg_wait_ms': self.total_wait / self.acquisitions * 1000 if self.acquisitions else 0.0,
+            'max_wait_ms': self.max_wait * 1000,
+        }
@@ -0,0 +1,207 @@
+"""
+In-memory state of open multi-step game rounds (interactive blackjack, multiplayer crash)
+"""
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import discord
+
+import config
+from utils.game_engine import CRASH
+from utils.helpers import BlackjackGame
+
+
+class BlackjackSession:
+    """An open blackjack round: the game, its escrowed bet and the message showing it"""
+    
+    __slots__ = ('user_id', 'guild_id', 'message_id', 'escrow_id', 'bet', 'game', 'interaction', 'expires')
+    
+    def __init__(self, user_id: int, guild_id: Optional[int], escrow_id: Optional[int], bet: int, game: BlackjackGame):
+        self.user_id = user_id
+        self.guild_id = guild_id
+        self.message_id: Optional[int] = None  # Known once the message is sent
+        self.escrow_id = escrow_id  # Known once the bet is escrowed
+        self.bet = bet
+        self.game = game
+        # Latest interaction of the round: its token edits the message for 15 minutes
+        self.interaction: Optional[discord.Interaction] = None
+        self.expires = 0.0
+
+
+class SessionStore:
+    """
+    Open sessions keyed by user, at most one per user and max_size in total
+    
+    Sessions are kept in order of last activity, so the expired ones are always at
+    the front: finding them costs nothing for the sessions still in play.
+    """
+    
+    __slots__ = ('ttl', 'max_size', '_sessions')
+    
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._sessions: "OrderedDict[int, BlackjackSession]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._sessions)
+    
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._sessions
+    
+    @property
+    def full(self) -> bool:
+        return len(self._sessions) >= self.max_size
+    
+    def get(self, user_id: int, message_id: Optional[int] = None) -> Optional[BlackjackSession]:
+        """The user's session, only if it is shown on message_id (when given)"""
+        session = self._sessions.get(user_id)
+        if session is None or (message_id is not None and session.message_id != message_id):
+            return None
+        return session
+    
+    def add(self, session: BlackjackSession) -> bool:
+        """Store a new session; False if the user already has one or the store is full"""
+        if session.user_id in self._sessions or self.full:
+            return False
+        self._sessions[session.user_id] = session
+        self.touch(session)
+        return True
+    
+    def touch(self, session: BlackjackSession):
+        """Push back the expiry of a session after an action"""
+        session.expires = time.monotonic() + self.ttl
+        self._sessions.move_to_end(session.user_id)
+    
+    def remove(self, session: BlackjackSession):
+        """Forget a session (round settled)"""
+        if self._sessions.get(session.user_id) is session:
+            del self._sessions[session.user_id]
+    
+    def expired(self) -> List[BlackjackSession]:
+        """Sessions with no action for ttl seconds (they stay stored until removed)"""
+        now = time.monotonic()
+        expired = []
+        for session in self._sessions.values():
+            if session.expires > now:
+                break
+            expired.append(session)
+        return expired
+
+
+# Phases of a crash round
+CRASH_BETTING = 'betting'
+CRASH_RUNNING = 'running'
+CRASH_CRASHED = 'crashed'
+
+
+def floor_multiplier(multiplier: float) -> float:
+    """Multiplier as shown and paid: rounded down to 2 decimals"""
+    return math.floor(multiplier * 100) / 100
+
+
+class CrashPlayer:
+    """A player of a crash round and their escrowed bet"""
+    
+    __slots__ = ('user_id', 'name', 'bet', 'escrow_id', 'auto_cashout', 'cashout')
+    
+    def __init__(self, user_id: int, name: str, bet: int, auto_cashout: Optional[float] = None):
+        self.user_id = user_id
+        self.name = name
+        self.bet = bet
+        self.escrow_id: Optional[int] = None  # Known once the bet is escrowed
+        self.auto_cashout = auto_cashout
+        self.cashout: Optional[float] = None  # Set by the cashout button
+    
+    def result(self, crash_point: float) -> Optional[float]:
+        """Multiplier the player cashed out at, None if they were still in at the crash"""
+        if self.cashout is not None:
+            return self.cashout
+        if self.auto_cashout is not None and self.auto_cashout <= crash_point:
+            return self.auto_cashout
+        return None
+    
+    def payout(self, crash_point: float) -> int:
+        multiplier = self.result(crash_point)
+        return int(self.bet * multiplier) if multiplier is not None else 0
+
+
+class CrashRound:
+    """
+    A crash round shared by the players of a channel
+    
+    The crash point is drawn once, when the round is created. The multiplier then only
+    depends on the time since takeoff (it doubles every CRASH_DOUBLING_SECONDS), so a
+    cashout reads it at the moment of the click without any per-tick work.
+    """
+    
+    __slots__ = ('channel_id', 'guild_id', 'crash_point', 'players', 'phase', 'betting_ends',
+                 'started', 'joining', 'message', 'dirty', 'task')
+    
+    def __init__(self, channel_id: int, guild_id: Optional[int]):
+        self.channel_id = channel_id
+        self.guild_id = guild_id
+        self.crash_point = CRASH.sample()
+        self.players: Dict[int, CrashPlayer] = {}
+        self.phase = CRASH_BETTING
+        self.betting_ends = time.monotonic() + config.CRASH_BETTING_SECONDS
+        self.started = 0.0
+        self.joining = 0  # Joins waiting for their escrow: takeoff waits for them
+        self.message: Optional[discord.Message] = None
+        self.dirty = True  # Something changed since the last edit of the message
+        self.task: Optional[asyncio.Task] = None  # The task driving the round (see cogs/games.py)
+    
+    @property
+    def open(self) -> bool:
+        """True while players can still join"""
+        return self.phase == CRASH_BETTING and time.monotonic() < self.betting_ends
+    
+    @property
+    def crash_time(self) -> float:
+        return self.started + config.CRASH_DOUBLING_SECONDS * math.log2(self.crash_point)
+    
+    def multiplier(self) -> float:
+        """Current multiplier (1 before takeoff, the crash point once crashed)"""
+        if self.phase == CRASH_BETTING:
+            return 1.0
+        if self.phase == CRASH_CRASHED:
+            return self.crash_point
+        return min(self.crash_point, 2 ** ((time.monotonic() - self.started) / config.CRASH_DOUBLING_SECONDS))
+    
+    def start(self):
+        self.phase = CRASH_RUNNING
+        self.started = time.monotonic()
+        self.dirty = True
+    
+    def crash(self):
+        self.phase = CRASH_CRASHED
+        self.dirty = True
+    
+    def cash_out(self, user_id: int) -> Optional[float]:
+        """
+        Cash a player out at the current multiplier
+        Returns the multiplier, or None if the player is not in play (or it is too late)
+        """
+        player = self.players.get(user_id)
+        if player is None or player.escrow_id is None or player.cashout is not None or self.phase != CRASH_RUNNING:
+            return None
+        current = self.multiplier()
+        if current >= self.crash_point:
+            return None
+        # An automatic cashout already reached wins over the click
+        if player.auto_cashout is not None and player.auto_cashout <= current:
+            player.cashout = player.auto_cashout
+        else:
+            player.cashout = floor_multiplier(current)
+        self.dirty = True
+        return player.cashout
+    
+    def settlements(self) -> List[Tuple[int, int, int]]:
+        """(escrow_id, user_id, payout) of every player, for DatabaseManager.settle_escrows"""
+        return [
+            (player.escrow_id, player.user_id, player.payout(self.crash_point))
+            for player in self.players.values() if player.escrow_id is not None
+        ]
@@ -0,0 +1,362 @@
+"""
+Monte Carlo RTP simulator for the gambling bot
+Estimates the return to player (RTP) of every game with NumPy, from the tables of
+config.GAMES (utils/game_engine.py) and the rules of utils/helpers.py,
+so the simulation cannot drift from the live games
+
+Usage:
+    python -m utils.simulator                              # 10^7 rounds per game
+    python -m utils.simulator --rounds 100000000 --game slots
+    python -m utils.simulator --bet 15                     # with the int() rounding of a 15 coins bet
+    python -m utils.simulator --check --max-rtp 1.0        # regression test (exit code 1 on failure)
+
+NumPy is optional for the bot itself: only this tool needs it (pip install numpy).
+"""
+import argparse
+import math
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import config
+from utils.game_engine import GAMES, TableGame
+from utils.helpers import (
+    CARD_SUITS, RANK_VALUES, BLACKJACK_STAND, BLACKJACK_NATURAL_MULTIPLIER,
+    BLACKJACK_WIN_MULTIPLIER, BLACKJACK_PUSH_MULTIPLIER, BlackjackGame, Shoe
+)
+from utils.sessions import CrashPlayer, CrashRound
+
+# Rounds simulated per NumPy batch (bounds memory use)
+BATCH_SIZE = 1_000_000
+# Blackjack keeps a whole shoe per round in memory: smaller batches
+BLACKJACK_BATCH_SIZE = 50_000
+# Rounds played with the live functions of utils/helpers.py by --check
+CHECK_ROUNDS = 100_000
+# Standard errors allowed by --check before reporting a mismatch (false alarm: ~1 run in 1.7 million)
+CHECK_Z = 5.0
+# Width of the reported confidence interval (95%)
+CI_Z = 1.96
+# Crash cashout multipliers simulated by default
+CRASH_CASHOUTS = [1.5, 2.0, 5.0, 10.0]
+
+Sampler = Callable[["np.random.Generator", int], "np.ndarray"]
+
+
+class Game:
+    """
+    One game (or one bet of a game) that can be simulated
+    
+    sample(rng, n) returns the multipliers of n rounds, live() plays one round with
+    the live code, exact(bet) is the exact RTP when the outcomes can be enumerated
+    """
+    
+    __slots__ = ('name', 'game_type', 'sample', 'live', 'exact', 'batch_size')
+    
+    def __init__(self, name: str, game_type: str, sample: Sampler, live: Callable[[], float],
+                 exact: Optional[Callable[[Optional[int]], float]] = None, batch_size: int = BATCH_SIZE):
+        self.name = name
+        self.game_type = game_type
+        self.sample = sample
+        self.live = live
+        self.exact = exact
+        self.batch_size = batch_size
+
+
+def returned(multipliers, bet: Optional[int] = None):
+    """
+    Share of the bet given back, with the int() rounding of the games for a given bet
+    (payout = int(bet * multiplier)); without a bet, the exact multipliers
+    """
+    if not bet:
+        return multipliers
+    return np.floor(np.multiply(bet, multipliers)) / bet
+
+
+def table_game(game: TableGame, bet: Optional[str]) -> Game:
+    """
+    One bet of a game from config.GAMES
+    
+    One random number per round picks the outcome in the game's own table
+    (weights and multipliers); the exact RTP is the weighted sum.
+    """
+    weights = np.array(game.weights, dtype=np.float64)
+    table = np.array(game.multipliers[bet], dtype=np.float64)
+    probabilities = weights / weights.sum()
+    
+    if np.all(weights == weights[0]):
+        def sample(rng, n):
+            return table[rng.integers(0, len(table), n)]
+    else:
+        cumulative = np.cumsum(weights)
+        cumulative /= cumulative[-1]
+        
+        def sample(rng, n):
+            return table[np.searchsorted(cumulative, rng.random(n), side='right')]
+    
+    def exact(bet_amount):
+        return float(np.dot(probabilities, returned(table, bet_amount)))
+    
+    def live():
+        return game.play(bet)[0]
+    
+    name = game.name if bet is None else f"{game.name} ({bet})"
+    return Game(name, game.name, sample, live, exact)
+
+
+def crash_game_for(cashout: float) -> Game:
+    """
+    Crash with a fixed cashout multiplier: a player of a live round with this
+    automatic cashout (CrashRound draws the crash point, CrashPlayer pays the player)
+    """
+    bands = config.CRASH_BANDS
+    probabilities = np.array([band[0] for band in bands], dtype=np.float64)
+    probabilities /= probabilities.sum()
+    cumulative = np.cumsum(probabilities)
+    cumulative[-1] = 1.0
+    lows = np.array([band[1] for band in bands])
+    widths = np.array([band[2] - band[1] for band in bands])
+    
+    def sample(rng, n):
+        # Same draws as CRASH.sample(): the band, then a uniform point inside it
+        band = np.searchsorted(cumulative, rng.random(n), side='right')
+        points = lows[band] + widths[band] * rng.random(n)
+        return np.where(points >= cashout, cashout, 0.0)
+    
+    def exact(bet):
+        # P(crash point >= cashout), band by band
+        survival = sum(
+            probability * min(max((high - cashout) / (high - low), 0.0), 1.0)
+            for probability, (_, low, high) in zip(probabilities, bands)
+        )
+        return float(survival * returned(cashout, bet))
+    
+    def live():
+        crash_round = CrashRound(0, None)
+        player = CrashPlayer(0, "", 1, auto_cashout=cashout)
+        return player.result(crash_round.crash_point) or 0.0
+        
+    return Game(f"crash (x{cashout})", "crash", sample, live, exact)
+
+
+def _add_card(hard, aces, card, mask):
+    """Add a card value (ace = 1) to the hands selected by mask, as Hand.add()"""
+    hard += np.where(mask, card, 0)
+    aces += mask & (card == 1)
+
+
+def _hand_value(hard, aces):
+    """Best total of the hands, as Hand.value"""
+    return hard + 10 * ((aces > 0) & (hard <= 11))
+
+
+def blackjack_sample(rng, n):
+    """
+    Play n rounds of BlackjackGame with the reference strategy at once
+    
+    Each round deals from its own freshly shuffled shoe of config.BLACKJACK_DECKS decks,
+    shuffled lazily (one Fisher-Yates step per card dealt): the player gets the first
+    two cards, the dealer the next two, then the player hits and the dealer hits with
+    the following cards, as in the live game. The live shoe is only reshuffled at the
+    cut card, but with a fixed strategy the depth in the shoe does not change the RTP.
+    """
+    values = np.array(RANK_VALUES * len(CARD_SUITS) * max(1, config.BLACKJACK_DECKS), dtype=np.int8)
+    deck = np.tile(values, (n, 1))
+    rows = np.arange(n)
+    position = 0
+    
+    def draw():
+        nonlocal position
+        swap = rng.integers(position, len(values), n)
+        card = deck[rows, swap]
+        deck[rows, swap] = deck[:, position]
+        deck[:, position] = card
+        position += 1
+        return card.astype(np.int16)
+    
+    everyone = np.ones(n, dtype=bool)
+    player, player_aces = np.zeros(n, dtype=np.int16), np.zeros(n, dtype=np.int16)
+    dealer, dealer_aces = np.zeros(n, dtype=np.int16), np.zeros(n, dtype=np.int16)
+    for hard, aces in ((player, player_aces), (player, player_aces), (dealer, dealer_aces), (dealer, dealer_aces)):
+        _add_card(hard, aces, draw(), everyone)
+    
+    natural = _hand_value(player, player_aces) == 21
+    hitting = ~natural & (_hand_value(player, player_aces) < BLACKJACK_STAND)
+    while hitting.any():
+        _add_card(player, player_aces, draw(), hitting)
+        hitting &= _hand_value(player, player_aces) < BLACKJACK_STAND
+    player = _hand_value(player, player_aces)
+    
+    bust = player > 21
+    hitting = ~natural & ~bust & (_hand_value(dealer, dealer_aces) < BLACKJACK_STAND)
+    while hitting.any():
+        _add_card(dealer, dealer_aces, draw(), hitting)
+        hitting &= _hand_value(dealer, dealer_aces) < BLACKJACK_STAND
+    dealer = _hand_value(dealer, dealer_aces)
+    
+    playing = ~natural & ~bust
+    return np.select(
+        [
+            natural & (dealer == 21),
+            natural,
+            playing & ((dealer > 21) | (player > dealer)),
+            playing & (player == dealer),
+        ],
+        [BLACKJACK_PUSH_MULTIPLIER, BLACKJACK_NATURAL_MULTIPLIER, BLACKJACK_WIN_MULTIPLIER, BLACKJACK_PUSH_MULTIPLIER],
+        0.0
+    ).astype(np.float64)
+
+
+def blackjack_game() -> Game:
+    """
+    Blackjack with the reference strategy of BLACKJACK_STAND: hit below 17, never double
+    or split. /blackjack lets the player choose, so its RTP depends on how they play.
+    The live rounds share one shoe.
+    """
+    shoe = Shoe()
+    
+    def live():
+        game = BlackjackGame(shoe)
+        game.deal()
+        while not game.finished:
+            if game.hand.value < BLACKJACK_STAND:
+                game.hit()
+            else:
+                game.stand()
+        return game.multipliers()[0]
+        
+    return Game("blackjack", "blackjack", blackjack_sample, live, batch_size=BLACKJACK_BATCH_SIZE)
+
+
+def all_games(cashouts: Optional[List[float]] = None) -> List[Game]:
+    """Every game of the bot, with one entry per bet and per crash cashout"""
+    return [
+        *(table_game(game, bet) for game in GAMES.values() for bet in game.bets),
+        blackjack_game(),
+        *(crash_game_for(cashout) for cashout in (cashouts or CRASH_CASHOUTS)),
+    ]
+
+
+def simulate(game: Game, rounds: int, rng: "np.random.Generator", bet: Optional[int] = None) -> dict:
+    """
+    Simulate rounds of a game in batches
+    
+    Returns {'game', 'rounds', 'rtp', 'variance', 'std_error', 'ci_low', 'ci_high',
+    'hit_rate', 'exact', 'seconds'} where variance is per unit bet and hit_rate is
+    the share of rounds paying back more than the bet
+    """
+    start = time.perf_counter()
+    total = squares = 0.0
+    hits = 0
+    done = 0
+    while done < rounds:
+        size = min(game.batch_size, rounds - done)
+        multipliers = returned(game.sample(rng, size), bet)
+        total += float(multipliers.sum())
+        squares += float(np.dot(multipliers, multipliers))
+        hits += int(np.count_nonzero(multipliers > 1))
+        done += size
+        
+    rtp = total / rounds
+    variance = max(squares / rounds - rtp * rtp, 0.0) * rounds / max(rounds - 1, 1)
+    std_error = math.sqrt(variance / rounds)
+    return {
+        'game': game.name,
+        'rounds': rounds,
+        'rtp': rtp,
+        'variance': variance,
+        'std_error': std_error,
+        'ci_low': rtp - CI_Z * std_error,
+        'ci_high': rtp + CI_Z * std_error,
+        'hit_rate': hits / rounds,
+        'exact': game.exact(bet) if game.exact else None,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def check(game: Game, result: dict, bet: Optional[int] = None, max_rtp: Optional[float] = None,
+          live_rounds: int = CHECK_ROUNDS) -> List[str]:
+    """
+    Regression checks for one simulated game
+    
+    - The simulated RTP matches the exact RTP (when known)
+    - The simulated RTP matches live_rounds rounds played with the live functions
+    - The RTP (exact, or the low end of the confidence interval) does not exceed max_rtp
+    
+    Returns the list of problems (empty = passed)
+    """
+    problems = []
+    if result['exact'] is not None and abs(result['rtp'] - result['exact']) > CHECK_Z * result['std_error']:
+        problems.append(f"simulated RTP {result['rtp']:.4%} differs from the exact RTP {result['exact']:.4%}")
+        
+    live = [float(returned(game.live(), bet)) for _ in range(live_rounds)]
+    live_rtp = math.fsum(live) / live_rounds
+    live_variance = math.fsum((value - live_rtp) ** 2 for value in live) / max(live_rounds - 1, 1)
+    spread = math.sqrt(result['std_error'] ** 2 + live_variance / live_rounds)
+    if abs(result['rtp'] - live_rtp) > CHECK_Z * spread:
+        problems.append(f"simulated RTP {result['rtp']:.4%} differs from the live code ({live_rtp:.4%})")
+        
+    if max_rtp is not None:
+        rtp = result['exact'] if result['exact'] is not None else result['ci_low']
+        if rtp > max_rtp:
+            problems.append(f"RTP {rtp:.4%} is above the maximum {max_rtp:.2%}")
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Estimate the return to player of every game")
+    parser.add_argument('--rounds', type=int, default=10_000_000, help="rounds per game (default: 10^7)")
+    parser.add_argument('--game', choices=[*GAMES, 'blackjack', 'crash'],
+                        action='append', help="only simulate this game (repeatable)")
+    parser.add_argument('--cashout', type=float, action='append', help="crash cashout multiplier (repeatable)")
+    parser.add_argument('--bet', type=int, help="apply the int() payout rounding of this bet")
+    parser.add_argument('--seed', type=int, help="random seed (simulation and live checks)")
+    parser.add_argument('--check', action='store_true',
+                        help="compare with the exact RTP and the live code, exit code 1 on mismatch")
+    parser.add_argument('--max-rtp', type=float, help="with --check, fail games whose RTP is above this value")
+    args = parser.parse_args(argv)
+    
+    if np is None:
+        print("❌ NumPy is required for the simulator: pip install numpy")
+        return 1
+    if args.rounds < 2:
+        parser.error("--rounds must be at least 2")
+        
+    rng = np.random.default_rng(args.seed)
+    if args.seed is not None:
+        random.seed(args.seed)
+    games = [game for game in all_games(args.cashout) if not args.game or game.game_type in args.game]
+    
+    print(f"{'Game':<20} {'RTP':>9} {'95% CI':>21} {'Exact':>9} {'Variance':>10} {'Hit rate':>9} {'Time':>7}")
+    failures: Dict[str, List[str]] = {}
+    for game in games:
+        result = simulate(game, args.rounds, rng, args.bet)
+        interval = f"[{result['ci_low']:.4%}, {result['ci_high']:.4%}]"
+        exact = f"{result['exact']:.4%}" if result['exact'] is not None else "-"
+        print(
+            f"{game.name:<20} {result['rtp']:>9.4%} {interval:>21} {exact:>9} "
+            f"{result['variance']:>10.4f} {result['hit_rate']:>9.2%} {result['seconds']:>6.1f}s"
+        )
+        if args.check:
+            problems = check(game, result, args.bet, args.max_rtp)
+            if problems:
+                failures[game.name] = problems
+                
+    if not args.check:
+        return 0
+    for name, problems in failures.items():
+        for problem in problems:
+            print(f"❌ {name}: {problem}")
+    if failures:
+        return 1
+    print(f"✅ {len(games)} game(s) checked")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())